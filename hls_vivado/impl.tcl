@@ -0,0 +1,113 @@
+# impl.tcl - stage 3 of the flow: place + route, reports and results.txt
+# Assumes vivado is run from the 'build' directory after synth.tcl.
+
+# standalone: reopen the project synth.tcl left behind
+if {[llength [get_projects -quiet]] == 0} {
+    open_project ./vivado_project.xpr
+}
+
+# --- Run Implementation ---
+puts "Starting implementation..."
+reset_runs impl_1
+launch_runs impl_1 -to_step route_design -jobs 4
+wait_on_run impl_1
+
+# Check Implementation Status more thoroughly
+set impl_status [get_property STATUS [get_runs impl_1]]
+set impl_progress [get_property PROGRESS [get_runs impl_1]]
+if {$impl_status != "route_design Complete!" || $impl_progress != "100%"} {
+    puts "ERROR: Implementation failed or did not complete."
+    puts "ERROR: Status: $impl_status, Progress: $impl_progress"
+    if {[get_property NEEDS_REFRESH [get_runs impl_1]] == 0} {
+        open_run impl_1
+        report_timing_summary -file ./timing_summary_fail.rpt
+        report_utilization -file ./impl_util_fail.rpt
+        close_design
+    }
+    exit 1
+}
+puts "INFO: Implementation completed successfully."
+
+puts "Opening implemented design..."
+open_run impl_1
+
+# --- Generate Reports ---
+# --- FIX: Removed ./build/ prefix. Paths are now relative to the current dir (build/) ---
+puts "Generating timing report..."
+report_timing_summary -file ./timing_report.txt -delay_type min_max -report_unconstrained -check_timing_verbose -max_paths 10
+
+puts "Generating power report..."
+report_power -file ./power_report.txt
+
+puts "Generating utilization report..."
+report_utilization -file ./utilization_report.txt
+
+# --- Extract Results ---
+puts "Extracting results..."
+
+# Extract WNS
+set wns "N/A"
+if {![catch {get_timing_paths -max_paths 1 -nworst 1 -setup} timing_paths]} {
+    if {[llength $timing_paths] > 0} {
+        set wns [get_property SLACK [lindex $timing_paths 0]]
+    } else {
+        puts "WARN: No setup timing paths found for WNS extraction (design might be unconstrained or meet timing perfectly)."
+    }
+} else {
+     puts "WARN: Could not get setup timing paths."
+}
+
+
+# Extract WHS
+set whs "N/A"
+if {![catch {get_timing_paths -max_paths 1 -nworst 1 -hold} hold_paths]} {
+    if {[llength $hold_paths] > 0} {
+        set whs [get_property SLACK [lindex $hold_paths 0]]
+    } else {
+        puts "WARN: No hold timing paths found for WHS extraction."
+    }
+} else {
+     puts "WARN: Could not get hold timing paths."
+}
+
+# Extract Total Power (Robust Method)
+set power "N/A"
+# --- FIX: Removed ./build/ prefix. ---
+set power_report_path "./power_report.txt"
+if {[file exists $power_report_path]} {
+    if {[catch {open $power_report_path r} fp_power]} {
+        puts "ERROR: Could not open power report file '$power_report_path': $fp_power"
+    } else {
+        set power_content [read $fp_power]
+        close $fp_power
+        if {[regexp -nocase {\|\s*Total On-Chip Power \(W\)\s*\|\s*([\d\.]+)\s*\|} $power_content match power_value]} {
+            set power $power_value
+        } else {
+            puts "WARN: Could not find 'Total On-Chip Power (W)' line with expected format in $power_report_path"
+        }
+    }
+} else {
+    puts "WARN: Power report file not found at $power_report_path"
+}
+
+# --- Write results to a single file ---
+# --- FIX: Removed ./build/ prefix. ---
+set results_file_path "./results.txt"
+if {[catch {open $results_file_path w} fp_results]} {
+     puts "ERROR: Could not open results file '$results_file_path' for writing: $fp_results"
+} else {
+    puts $fp_results "WNS: $wns"
+    puts $fp_results "WHS: $whs"
+    puts $fp_results "Power: $power"
+    if {[catch {close $fp_results}]} {
+        puts "ERROR: Could not close results file '$results_file_path'"
+    } else {
+        puts "INFO: Results written to $results_file_path"
+    }
+}
+
+puts "Build complete. WNS=$wns ns, WHS=$whs ns, Power=$power W"
+
+close_project
+exit ; # Explicitly exit Tcl script
+
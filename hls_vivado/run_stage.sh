@@ -0,0 +1,64 @@
+#!/bin/bash
+set -e # stops script on any error
+
+# One stage of the staged flow (see data_collector.run_staged_flow):
+#   run_stage.sh hls    clears the build dir, HLS C-synthesis + IP export (v++)
+#   run_stage.sh synth  Vivado project + out-of-context synthesis (synth.tcl)
+#   run_stage.sh impl   Vivado place + route, reports, results.txt (impl.tcl)
+# Later stages continue in the build dir the previous stage left behind.
+# Same BUILD_DIR / GENERATED_CPP_FILE / HLS_CONFIG_FILE overrides as run_synthesis.sh.
+
+STAGE="$1"
+
+SCRIPT_DIR=$( cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )
+PROJECT_ROOT="$SCRIPT_DIR/.."
+
+CPP_SRC_DIR="$PROJECT_ROOT/hls_vivado/src"
+HLS_CONFIG_FILE="${HLS_CONFIG_FILE:-$PROJECT_ROOT/hls_vivado/hls_config.cfg}"
+BUILD_DIR="${BUILD_DIR:-$PROJECT_ROOT/build}"
+GENERATED_CPP_FILE="${GENERATED_CPP_FILE:-$CPP_SRC_DIR/generated_design.cpp}"
+
+case "$STAGE" in
+    hls|synth|impl) ;;
+    *)
+        echo "ERROR: unknown stage '$STAGE' (expected hls, synth or impl)"
+        exit 2
+        ;;
+esac
+
+# loads AMD Vitis/Vivado environment
+source /tools/Xilinx/2025.1/Vitis/settings64.sh
+
+echo "-----------------------------------"
+echo "STAGE $STAGE..."
+echo "-----------------------------------"
+
+if [ "$STAGE" = "hls" ]; then
+    if [ ! -f "$GENERATED_CPP_FILE" ]; then
+        echo "ERROR: $GENERATED_CPP_FILE not found!"
+        exit 1
+    fi
+    if [ ! -f "$CPP_SRC_DIR/ops.h" ]; then
+        echo "ERROR: $CPP_SRC_DIR/ops.h not found!"
+        exit 1
+    fi
+
+    rm -rf "$BUILD_DIR"
+    mkdir -p "$BUILD_DIR"
+    cd "$BUILD_DIR"
+    v++ -c --mode hls --config "$HLS_CONFIG_FILE"
+
+    if [ ! -d "top_function" ]; then
+        echo "ERROR: HLS did not generate IP directory 'top_function'!"
+        exit 1
+    fi
+else
+    if [ ! -d "$BUILD_DIR/top_function" ]; then
+        echo "ERROR: $BUILD_DIR/top_function not found, run the hls stage first!"
+        exit 1
+    fi
+    cd "$BUILD_DIR"
+    vivado -mode batch -source "$SCRIPT_DIR/$STAGE.tcl"
+fi
+
+echo "STAGE $STAGE FINISHED."
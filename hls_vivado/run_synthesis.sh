@@ -14,19 +14,22 @@ PROJECT_ROOT="$SCRIPT_DIR/.."
 source /tools/Xilinx/2025.1/Vitis/settings64.sh
 
 # --- MODIFIED: Paths are now relative to PROJECT_ROOT ---
-HLS_CONFIG_FILE="$PROJECT_ROOT/hls_vivado/hls_config.cfg"
+# HLS_CONFIG_FILE, BUILD_DIR and GENERATED_CPP_FILE can be overridden from the
+# environment (absolute paths) so parallel jobs each get their own build dir
 BUILD_TCL_FILE="$PROJECT_ROOT/hls_vivado/build.tcl"
-BUILD_DIR="$PROJECT_ROOT/build"
 CPP_SRC_DIR="$PROJECT_ROOT/hls_vivado/src"
+HLS_CONFIG_FILE="${HLS_CONFIG_FILE:-$PROJECT_ROOT/hls_vivado/hls_config.cfg}"
+BUILD_DIR="${BUILD_DIR:-$PROJECT_ROOT/build}"
+GENERATED_CPP_FILE="${GENERATED_CPP_FILE:-$CPP_SRC_DIR/generated_design.cpp}"
 
 # 2. check if generated c++ files exist
-if [ ! -f "$CPP_SRC_DIR/generated_design.cpp" ]; then
-    echo "ERROR: $CPP_SRC_DIR/generated_design.cpp not found!"
+if [ ! -f "$GENERATED_CPP_FILE" ]; then
+    echo "ERROR: $GENERATED_CPP_FILE not found!"
     exit 1
 fi
 
-if [ ! -f "$CPP_SRC_DIR/ops.cpp" ]; then
-    echo "ERROR: $CPP_SRC_DIR/ops.cpp not found!"
+if [ ! -f "$CPP_SRC_DIR/ops.h" ]; then
+    echo "ERROR: $CPP_SRC_DIR/ops.h not found!"
     exit 1
 fi
 
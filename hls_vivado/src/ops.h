@@ -0,0 +1,266 @@
+// --- HLS kernels of the generated designs (hw_nas/cpp_generator.py) ---
+// Layer shapes and parallelism knobs are template parameters, so every layer
+// instance gets fixed trip counts and its own pragmas:
+//   PIPELINE_II  initiation interval of the pipelined inner (MAC) loop
+//   UNROLL       output channels / features computed in parallel, the local
+//                weight and accumulator arrays are partitioned to match
+//   BITS         conv / linear datapath precision: 8 / 16 bit fixed point
+//                MACs (datapath<BITS>), 32 is float
+//   RELU         conv / linear apply the following ReLU on the way out
+//                (fused, no separate pass over the activations)
+// Activations are flat C x H x W float arrays, weights and biases use the
+// PyTorch parameter layout. Plain C++: g++ ignores the HLS pragmas, which is
+// how hw_nas/csim.py emulates generated designs in software.
+
+#ifndef HW_NAS_OPS_H
+#define HW_NAS_OPS_H
+
+#include <cmath>
+#include <cstdint>
+
+// max activation buffer size (must match cpp_generator.MAX_FEAT_SIZE)
+#define MAX_FEAT_SIZE (32 * 32 * 128)
+
+// per layer activation arrays of dataflow designs: static in the software
+// emulation (too big for the stack), plain locals (PIPO buffers) for HLS
+#ifdef __SYNTHESIS__
+#define SW_STATIC
+#else
+#define SW_STATIC static
+#endif
+
+// --- DATAPATH PRECISION ---
+// Weights and inputs of a fixed point layer are quantized on load with
+// power of two scales (round half up, saturating), products are summed
+// exactly in a wide integer accumulator that starts at the bias (quantized
+// to the product scale) and the result is scaled back to float, so the
+// activations between layers stay float arrays.
+// The formats must match FIXED_POINT_FORMATS in hw_nas/pytorch_model.py.
+template <typename T, int FRAC, typename R>
+R quantize(float x) {
+    const float lo = -(float)(1 << (8 * sizeof(T) - 1));
+    const float hi = (float)((1 << (8 * sizeof(T) - 1)) - 1);
+    float q = std::floor(x * (float)(1 << FRAC) + 0.5f);
+    return (R)(q < lo ? lo : (q > hi ? hi : q));
+}
+
+template <typename T, int WEIGHT_FRAC, int ACT_FRAC>
+struct fixed_point {
+    typedef T value_t;
+    typedef int64_t acc_t;
+    static value_t weight(float w) { return quantize<T, WEIGHT_FRAC, T>(w); }
+    static value_t act(float x) { return quantize<T, ACT_FRAC, T>(x); }
+    static acc_t bias(float b) { return (acc_t)std::floor(b * (float)(1 << (WEIGHT_FRAC + ACT_FRAC)) + 0.5f); }
+    static float out(acc_t acc) { return (float)acc * (1.0f / (float)(1 << (WEIGHT_FRAC + ACT_FRAC))); }
+};
+
+// float (BITS = 32)
+template <int BITS>
+struct datapath {
+    typedef float value_t;
+    typedef float acc_t;
+    static value_t weight(float w) { return w; }
+    static value_t act(float x) { return x; }
+    static acc_t bias(float b) { return b; }
+    static float out(acc_t acc) { return acc; }
+};
+// Q1.6 weights, Q3.4 activations
+template <>
+struct datapath<8> : fixed_point<int8_t, 6, 4> {};
+// Q3.12 weights, Q7.8 activations
+template <>
+struct datapath<16> : fixed_point<int16_t, 12, 8> {};
+
+// --- COPY (gmem <-> on chip, load / store processes of dataflow designs) ---
+template <int SIZE>
+void copy_buffer(const float* input, float* output) {
+    copy_loop: for (int i = 0; i < SIZE; i++) {
+#pragma HLS PIPELINE II=1
+        output[i] = input[i];
+    }
+}
+
+// --- RELU (in place) ---
+template <int SIZE>
+void relu(float* data) {
+    relu_loop: for (int i = 0; i < SIZE; i++) {
+#pragma HLS PIPELINE II=1
+        if (data[i] < 0.0f) {
+            data[i] = 0.0f;
+        }
+    }
+}
+
+// --- RELU (out of place, dataflow designs have one producer per array) ---
+template <int SIZE>
+void relu(const float* input, float* output) {
+    relu_loop: for (int i = 0; i < SIZE; i++) {
+#pragma HLS PIPELINE II=1
+        output[i] = (input[i] < 0.0f) ? 0.0f : input[i];
+    }
+}
+
+// --- CONV 2D ---
+// weights: [OUT_C][IN_C][K][K], bias: [OUT_C]
+// UNROLL output channels share each input read, their weights are held on
+// chip (UNROLL x IN_C*K*K) while the group sweeps the whole output map.
+template <int IN_C, int OUT_C, int K, int IN_H, int IN_W, int OUT_H, int OUT_W, int STRIDE, int PAD,
+          int PIPELINE_II, int UNROLL, int BITS = 32, bool RELU = false>
+void conv(const float* input, float* output, const float* weights, const float* bias) {
+    typedef datapath<BITS> dp;
+    typedef typename dp::acc_t acc_t;
+    const int TAPS = IN_C * K * K;
+    typename dp::value_t w_local[UNROLL][TAPS];
+    acc_t b_local[UNROLL];
+#pragma HLS ARRAY_PARTITION variable=w_local type=complete dim=1
+#pragma HLS ARRAY_PARTITION variable=b_local type=complete
+
+    out_groups: for (int oc0 = 0; oc0 < OUT_C; oc0 += UNROLL) {
+        load_bias: for (int u = 0; u < UNROLL; u++) {
+            b_local[u] = dp::bias((oc0 + u < OUT_C) ? bias[oc0 + u] : 0.0f);
+        }
+        load_weights: for (int t = 0; t < TAPS; t++) {
+#pragma HLS PIPELINE II=1
+            for (int u = 0; u < UNROLL; u++) {
+                w_local[u][t] = dp::weight((oc0 + u < OUT_C) ? weights[(oc0 + u) * TAPS + t] : 0.0f);
+            }
+        }
+
+        rows: for (int oh = 0; oh < OUT_H; oh++) {
+            cols: for (int ow = 0; ow < OUT_W; ow++) {
+                acc_t acc[UNROLL];
+#pragma HLS ARRAY_PARTITION variable=acc type=complete
+                init: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+                    acc[u] = b_local[u];
+                }
+
+                taps: for (int t = 0; t < TAPS; t++) {
+#pragma HLS PIPELINE II=PIPELINE_II
+                    int ic = t / (K * K);
+                    int kh = (t / K) % K;
+                    int kw = t % K;
+                    int ih = oh * STRIDE - PAD + kh;
+                    int iw = ow * STRIDE - PAD + kw;
+                    // zero padding
+                    typename dp::value_t x = dp::act((ih >= 0 && ih < IN_H && iw >= 0 && iw < IN_W) ? input[(ic * IN_H + ih) * IN_W + iw] : 0.0f);
+                    macs: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+                        acc[u] += (acc_t)w_local[u][t] * x;
+                    }
+                }
+
+                store: for (int u = 0; u < UNROLL; u++) {
+                    if (oc0 + u < OUT_C) {
+                        float y = dp::out(acc[u]);
+                        output[((oc0 + u) * OUT_H + oh) * OUT_W + ow] = (RELU && y < 0.0f) ? 0.0f : y;
+                    }
+                }
+            }
+        }
+    }
+}
+
+// --- MAX POOL ---
+// UNROLL channels are pooled in parallel
+template <int C, int IN_H, int IN_W, int K, int STRIDE, int OUT_H, int OUT_W, int PIPELINE_II, int UNROLL>
+void max_pool(const float* input, float* output) {
+    channel_groups: for (int c0 = 0; c0 < C; c0 += UNROLL) {
+        rows: for (int oh = 0; oh < OUT_H; oh++) {
+            cols: for (int ow = 0; ow < OUT_W; ow++) {
+#pragma HLS PIPELINE II=PIPELINE_II
+                channels: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+                    int c = c0 + u;
+                    if (c < C) {
+                        const float* window = input + (c * IN_H + oh * STRIDE) * IN_W + ow * STRIDE;
+                        float m = window[0];
+                        for (int kh = 0; kh < K; kh++) {
+                            for (int kw = 0; kw < K; kw++) {
+                                float v = window[kh * IN_W + kw];
+                                m = (v > m) ? v : m;
+                            }
+                        }
+                        output[(c * OUT_H + oh) * OUT_W + ow] = m;
+                    }
+                }
+            }
+        }
+    }
+}
+
+// --- GLOBAL AVG POOL ---
+// UNROLL channels are averaged in parallel
+template <int C, int IN_H, int IN_W, int PIPELINE_II, int UNROLL>
+void avg_pool(const float* input, float* output) {
+    const int AREA = IN_H * IN_W;
+    channel_groups: for (int c0 = 0; c0 < C; c0 += UNROLL) {
+        float acc[UNROLL];
+#pragma HLS ARRAY_PARTITION variable=acc type=complete
+        init: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+            acc[u] = 0.0f;
+        }
+
+        pixels: for (int p = 0; p < AREA; p++) {
+#pragma HLS PIPELINE II=PIPELINE_II
+            sums: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+                if (c0 + u < C) {
+                    acc[u] += input[(c0 + u) * AREA + p];
+                }
+            }
+        }
+
+        store: for (int u = 0; u < UNROLL; u++) {
+            if (c0 + u < C) {
+                output[c0 + u] = acc[u] / AREA;
+            }
+        }
+    }
+}
+
+// --- LINEAR ---
+// weights: [OUT_F][IN_F], bias: [OUT_F]
+// UNROLL output features share each input read
+template <int IN_F, int OUT_F, int PIPELINE_II, int UNROLL, int BITS = 32, bool RELU = false>
+void linear(const float* input, float* output, const float* weights, const float* bias) {
+    typedef datapath<BITS> dp;
+    typedef typename dp::acc_t acc_t;
+    typename dp::value_t w_local[UNROLL][IN_F];
+#pragma HLS ARRAY_PARTITION variable=w_local type=complete dim=1
+
+    out_groups: for (int o0 = 0; o0 < OUT_F; o0 += UNROLL) {
+        load_weights: for (int i = 0; i < IN_F; i++) {
+#pragma HLS PIPELINE II=1
+            for (int u = 0; u < UNROLL; u++) {
+                w_local[u][i] = dp::weight((o0 + u < OUT_F) ? weights[(o0 + u) * IN_F + i] : 0.0f);
+            }
+        }
+
+        acc_t acc[UNROLL];
+#pragma HLS ARRAY_PARTITION variable=acc type=complete
+        init: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+            acc[u] = dp::bias((o0 + u < OUT_F) ? bias[o0 + u] : 0.0f);
+        }
+
+        inputs: for (int i = 0; i < IN_F; i++) {
+#pragma HLS PIPELINE II=PIPELINE_II
+            typename dp::value_t x = dp::act(input[i]);
+            macs: for (int u = 0; u < UNROLL; u++) {
+#pragma HLS UNROLL
+                acc[u] += (acc_t)w_local[u][i] * x;
+            }
+        }
+
+        store: for (int u = 0; u < UNROLL; u++) {
+            if (o0 + u < OUT_F) {
+                float y = dp::out(acc[u]);
+                output[o0 + u] = (RELU && y < 0.0f) ? 0.0f : y;
+            }
+        }
+    }
+}
+
+#endif // HW_NAS_OPS_H
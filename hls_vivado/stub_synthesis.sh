@@ -0,0 +1,184 @@
+#!/bin/bash
+set -e # stops script on any error
+
+# Stand-in for run_synthesis.sh that needs no AMD tools.
+# Honors the same BUILD_DIR / GENERATED_CPP_FILE overrides, sleeps for
+# STUB_SYNTH_SECONDS (default 1) to mimic tool runtime and writes a
+# results.txt whose WNS/Power are a deterministic function of the layer
+# calls in the generated design (bigger workloads -> worse timing, more power),
+# plus timing/power/utilization reports and a csynth.xml (latency, II,
+# resource estimates) in the formats the real tools use.
+# An optional stage argument (hls, synth or impl, like run_stage.sh) only
+# runs that part: hls writes csynth.xml, synth the post-synthesis
+# synth_results.txt / synth_utilization_report.txt, impl the rest. The
+# stages sleep 20% / 30% / 50% of STUB_SYNTH_SECONDS.
+
+STAGE="${1:-all}"
+
+SCRIPT_DIR=$( cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )
+PROJECT_ROOT="$SCRIPT_DIR/.."
+
+CPP_SRC_DIR="$PROJECT_ROOT/hls_vivado/src"
+BUILD_DIR="${BUILD_DIR:-$PROJECT_ROOT/build}"
+GENERATED_CPP_FILE="${GENERATED_CPP_FILE:-$CPP_SRC_DIR/generated_design.cpp}"
+
+if [ ! -f "$GENERATED_CPP_FILE" ]; then
+    echo "ERROR: $GENERATED_CPP_FILE not found!"
+    exit 1
+fi
+
+CSYNTH_REPORT_DIR="top_function/hls/syn/report" # same place as v++
+
+case "$STAGE" in
+    all) SHARE=1.0 ;;
+    hls) SHARE=0.2; rm -rf "$BUILD_DIR" ;;
+    synth) SHARE=0.3 ;;
+    impl) SHARE=0.5 ;;
+    *)
+        echo "ERROR: unknown stage '$STAGE' (expected hls, synth or impl)"
+        exit 2
+        ;;
+esac
+if [ "$STAGE" = "synth" ] || [ "$STAGE" = "impl" ]; then
+    if [ ! -d "$BUILD_DIR/top_function" ]; then
+        echo "ERROR: $BUILD_DIR/top_function not found, run the hls stage first!"
+        exit 1
+    fi
+fi
+
+mkdir -p "$BUILD_DIR"
+cd "$BUILD_DIR"
+mkdir -p "$CSYNTH_REPORT_DIR"
+
+sleep "$(awk -v total="${STUB_SYNTH_SECONDS:-1}" -v share="$SHARE" 'BEGIN { print total * share }')"
+
+# small design dependent jitter so identical workloads are not all identical
+JITTER=$(cksum < "$GENERATED_CPP_FILE" | cut -d' ' -f1)
+
+# sum up MACs of conv and linear calls (numeric template / call arguments only)
+awk -v jitter="$JITTER" -v csynth_dir="$CSYNTH_REPORT_DIR" -v stage="$STAGE" '
+function write_csynth(    xml) {
+    xml = csynth_dir "/csynth.xml"
+    printf "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<profile>\n  <PerformanceEstimates>\n" > xml
+    printf "    <SummaryOfTimingAnalysis><unit>ns</unit><EstimatedClockPeriod>%.3f</EstimatedClockPeriod></SummaryOfTimingAnalysis>\n", clock > xml
+    printf "    <SummaryOfOverallLatency><unit>clock cycles</unit><Best-caseLatency>%d</Best-caseLatency><Worst-caseLatency>%d</Worst-caseLatency>", latency, latency > xml
+    printf "<Interval-min>%d</Interval-min><Interval-max>%d</Interval-max></SummaryOfOverallLatency>\n", interval, interval > xml
+    printf "  </PerformanceEstimates>\n  <AreaEstimates>\n    <Resources><BRAM_18K>%d</BRAM_18K><DSP>%d</DSP><FF>%d</FF><LUT>%d</LUT><URAM>0</URAM></Resources>\n", bram, dsp, ff, lut > xml
+    printf "  </AreaEstimates>\n</profile>\n" > xml
+}
+# on chip activations: the two ping-pong buffers, or in dataflow designs
+# one array per layer that HLS doubles into a PIPO buffer
+/#pragma HLS DATAFLOW/ { dataflow = 1 }
+/^[ \t]*(static|SW_STATIC) float [A-Za-z_0-9]+\[[0-9]+\]/ {
+    size = $0
+    sub(/^[^[]*\[/, "", size)
+    sub(/\].*$/, "", size)
+    activation_values += ($1 == "SW_STATIC" ? 2 : 1) * size
+}
+# trained weights of small layers as on chip constants (ROMs)
+/^static const float [A-Za-z_0-9]+\[[0-9]+\]/ {
+    size = $0
+    sub(/^[^[]*\[/, "", size)
+    sub(/\].*$/, "", size)
+    rom_values += size
+}
+# separate ReLU passes, one value per cycle (fused ReLUs are free)
+/^[ \t]*relu</ {
+    size = $0
+    sub(/^[^<]*</, "", size)
+    sub(/>.*$/, "", size)
+    cycles += size
+    if (size > max_layer_cycles) max_layer_cycles = size
+}
+/^[ \t]*conv[A-Za-z_]*[<(]/ || /^[ \t]*linear[A-Za-z_]*[<(]/ {
+    line = $0
+    is_conv = (line ~ /^[ \t]*conv/)
+    # shapes and knobs are template arguments (conv<...>(...)), else call arguments
+    if (line ~ /^[^(]*</) {
+        sub(/^[^<]*</, "", line)
+        sub(/>.*$/, "", line)
+    } else {
+        sub(/^[^(]*\(/, "", line)
+        sub(/\).*$/, "", line)
+    }
+    n = split(line, fields, ",")
+    k = 0
+    for (i = 1; i <= n; i++) {
+        gsub(/[ \t]/, "", fields[i])
+        if (fields[i] ~ /^[0-9]+$/) nums[++k] = fields[i] + 0
+    }
+    # conv: in_c, out_c, kernel, in_h, in_w, out_h, out_w, stride, padding, pipeline_ii, unroll, bits
+    if (is_conv && k >= 7) {
+        macs = nums[1] * nums[2] * nums[3] * nums[3] * nums[6] * nums[7]
+        ii = (k >= 11) ? nums[10] : 1
+        par = (k >= 11) ? nums[11] : 1
+        bits = (k >= 12) ? nums[12] : 32
+        layer_weights = nums[1] * nums[2] * nums[3] * nums[3]
+        float_dsp = 5
+        float_lut = 1450
+        convs++
+    }
+    # linear: in_features, out_features, pipeline_ii, unroll, bits
+    else if (!is_conv && k >= 2) {
+        macs = nums[1] * nums[2]
+        ii = (k >= 4) ? nums[3] : 1
+        par = (k >= 4) ? nums[4] : 1
+        bits = (k >= 5) ? nums[5] : 32
+        layer_weights = nums[1] * nums[2]
+        float_dsp = 3
+        float_lut = 900
+        linears++
+    }
+    else next
+    # fixed point MACs: one DSP per 16 bit MAC, two 8 bit MACs share one,
+    # narrower weights (in float words) and less logic / switching per MAC
+    width = bits / 32
+    dsp += (bits >= 32 ? float_dsp : (bits >= 16 ? 1 : 0.5)) * par
+    lut_par += float_lut * (0.2 + 0.8 * width) * par
+    weights += layer_weights * width
+    work += macs * width
+    # par MACs per ii cycles
+    layer_cycles = macs * ii / par
+    cycles += layer_cycles
+    if (layer_cycles > max_layer_cycles) max_layer_cycles = layer_cycles
+    spread += width * log(par) / log(2)
+}
+END {
+    dsp = int(dsp + 0.5) # DSPs of unpaired 8 bit MACs
+    noise = (jitter % 1000) / 1000.0 - 0.5
+    # wider datapaths are harder to route: timing and power get worse with the unroll factors
+    wns = 4.0 - 0.6 * log(1 + work / 1e5) - 0.08 * spread + 0.2 * noise
+    whs = 0.02 + 0.01 * noise
+    tns = (wns < 0) ? wns * (3 + convs) : 0
+    power = 0.25 + 0.04 * log(1 + work / 1e4) + 0.004 * dsp + 0.01 * noise
+    # HLS estimates: sequential kernels, unroll MACs every pipeline_ii cycles
+    latency = int(cycles + 120 * (convs + linears) + 20)
+    # dataflow overlaps the layers of consecutive inputs, the slowest one sets the interval
+    interval = dataflow ? int(max_layer_cycles + 140) : latency + 1
+    clock = 6.0 + 0.6 * log(1 + work / 1e5) + 0.05 * spread + 0.1 * noise
+    lut = int(1800 + lut_par + 40 * log(1 + work))
+    ff = int(1.15 * lut + 300 * convs)
+    bram = int(2 * (convs + linears) + (weights + activation_values + rom_values) * 4 / 2304 + 0.999)
+    if (stage == "synth" || stage == "all") {
+        # post-synthesis estimates: no routing delay yet, so optimistic timing
+        printf "WNS: %.3f\n", wns + 0.4 > "synth_results.txt"
+        printf "| Site Type | Used |\n| CLB LUTs* | %d |\n| CLB Registers | %d |\n| Block RAM Tile | %.1f |\n| DSPs | %d |\n", \
+            int(0.9 * lut), ff, bram / 2, dsp > "synth_utilization_report.txt"
+    }
+    if (stage != "impl" && stage != "all") {
+        if (stage == "hls") write_csynth()
+        exit
+    }
+    printf "WNS: %.3f\nWHS: %.3f\nPower: %.3f\n", wns, whs, power > "results.txt"
+    printf "Timing Summary Report (stub)\n\n| Design Timing Summary\n\n" > "timing_report.txt"
+    printf "    WNS(ns)      TNS(ns)  TNS Failing Endpoints  TNS Total Endpoints      WHS(ns)      THS(ns)\n" > "timing_report.txt"
+    printf "    -------      -------  ---------------------  -------------------      -------      -------\n" > "timing_report.txt"
+    printf "  %9.3f    %9.3f  %21d  %19d    %9.3f        0.000\n", wns, tns, (wns < 0) ? 3 + convs : 0, 4000 + 10 * lut / 7, whs > "timing_report.txt"
+    printf "| Total On-Chip Power (W)  | %.3f |\n", power > "power_report.txt"
+    printf "| Site Type | Used |\n| CLB LUTs | %d |\n| CLB Registers | %d |\n| Block RAM Tile | %.1f |\n| DSPs | %d |\n", \
+        int(0.85 * lut), int(0.95 * ff), bram / 2, dsp > "utilization_report.txt"
+    if (stage == "all") write_csynth()
+}
+' "$GENERATED_CPP_FILE"
+
+echo "STUB: stage $STAGE done in $BUILD_DIR"
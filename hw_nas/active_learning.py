@@ -0,0 +1,148 @@
+import random
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestRegressor
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.predictor import featurize_batch
+
+def forest_uncertainty(forest, X):
+    """Mean and spread (std) of the per-tree predictions of a fitted forest."""
+    per_tree = np.stack([tree.predict(X) for tree in forest.estimators_])
+    return per_tree.mean(axis=0), per_tree.std(axis=0)
+
+def _min_distances(Z, Z_ref):
+    """Distance of every row of Z to its closest row of Z_ref."""
+    squared = (Z * Z).sum(axis=1)[:, None] - 2 * Z @ Z_ref.T + (Z_ref * Z_ref).sum(axis=1)[None, :]
+    return np.sqrt(np.maximum(squared.min(axis=1), 0.0))
+
+def select_informative(X, uncertainty, k, X_labeled, seed=0):
+    """
+    Picks k diverse, informative rows: clusters X into k groups with k-means
+    weighted by uncertainty (features scaled per column), then takes from
+    every cluster the row farthest from the already labeled rows X_labeled.
+    The clusters follow the uncertain parts of the pool but still cover it,
+    so the picks neither crowd into one corner nor repeat labeled designs.
+    Returns the selected row indices.
+    """
+    k = min(k, len(X))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+
+    scale = np.vstack([X, X_labeled]).std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = X / scale
+    distance = _min_distances(Z, X_labeled / scale)
+    labels = KMeans(n_clusters=k, n_init=1, random_state=seed).fit(
+        Z, sample_weight=uncertainty + 1e-12).labels_
+
+    selected = []
+    for cluster in range(k):
+        members = np.flatnonzero(labels == cluster)
+        if len(members):
+            selected.append(members[np.argmax(distance[members])])
+    # empty clusters (duplicate rows) are filled with the next farthest rows
+    for index in np.argsort(-distance):
+        if len(selected) == k:
+            break
+        if index not in selected:
+            selected.append(index)
+    return np.array(selected, dtype=np.int64)
+
+def fit_forests(X, y_timing, y_power, n_estimators=100):
+    """Fits the timing and power forests (same settings as train_predictors)."""
+    timing_predictor = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
+    timing_predictor.fit(X, y_timing)
+    power_predictor = RandomForestRegressor(n_estimators=n_estimators, random_state=42)
+    power_predictor.fit(X, y_power)
+    return timing_predictor, power_predictor
+
+def holdout_error(timing_predictor, power_predictor, X, y_timing, y_power):
+    """Mean absolute error of both predictors on a holdout set."""
+    mae_timing = float(np.mean(np.abs(timing_predictor.predict(X) - y_timing)))
+    mae_power = float(np.mean(np.abs(power_predictor.predict(X) - y_power)))
+    return mae_timing, mae_power
+
+def run_active_learning(synthesize, num_initial=20, num_rounds=10, batch_size=10, pool_size=5000,
+                        seed=0, holdout=None, target_error=None, strategy="uncertainty"):
+    """
+    Active learning collection loop (experimental, see
+    scripts/benchmark_active_learning.py: on the stub synthesizer it beats
+    random sampling on average, but not for every seed).
+    synthesize(archs) runs the given architectures through synthesis and
+    returns a list of (arch, features, wns, power) for the successful ones.
+    Starts with num_initial random designs, then every round draws a pool of
+    pool_size unseen random candidates, sends batch_size of them picked by
+    select_informative to synthesis and refits both forests. The uncertainty
+    of a candidate is the per tree spread of both forests, each relative to
+    the spread of its target so neither dominates.
+    strategy="random" sends only random pool members (baseline).
+    holdout = (X, y_timing, y_power) enables per round error reporting and,
+    with target_error = (mae_timing, mae_power), an early stop once reached.
+    Returns (timing_predictor, power_predictor, history), history holds
+    (num_synthesized, mae_timing, mae_power) per round.
+    """
+    rng = random.Random(seed)
+    X, y_timing, y_power = [], [], []
+    seen = set()
+    num_synthesized = 0
+    history = []
+
+    def add_results(archs):
+        nonlocal num_synthesized
+        num_synthesized += len(archs)
+        seen.update(archs)
+        for _, features, wns, power in synthesize(archs):
+            X.append(features)
+            y_timing.append(wns)
+            y_power.append(power)
+
+    def draw_unseen(n):
+        candidates = []
+        pool = set()
+        for _ in range(10 * n):
+            if len(candidates) == n:
+                break
+            arch = get_random_architecture(rng=rng)
+            if arch not in seen and arch not in pool:
+                pool.add(arch)
+                candidates.append(arch)
+        return candidates
+
+    add_results(draw_unseen(num_initial))
+    if not X:
+        print("ERROR: No initial datapoint could be synthesized, stopping active learning.")
+        return None, None, history
+    timing_predictor, power_predictor = fit_forests(np.array(X), np.array(y_timing), np.array(y_power))
+
+    for round_index in range(num_rounds + 1):
+        if holdout is not None:
+            mae_timing, mae_power = holdout_error(timing_predictor, power_predictor, *holdout)
+            history.append((num_synthesized, mae_timing, mae_power))
+            print(f"round {round_index}: {num_synthesized} synthesized, "
+                  f"holdout MAE WNS {mae_timing:.4f} ns, power {mae_power:.4f} W")
+            if target_error is not None and mae_timing <= target_error[0] and mae_power <= target_error[1]:
+                print(f"target error reached after {num_synthesized} synthesis runs")
+                break
+        if round_index == num_rounds:
+            break
+
+        candidates = draw_unseen(pool_size)
+        if not candidates:
+            print("WARN: no unseen candidates left, stopping.")
+            break
+        if strategy == "random":
+            chosen = rng.sample(range(len(candidates)), min(batch_size, len(candidates)))
+        else:
+            X_pool = featurize_batch(candidates).astype(np.float64)
+            _, std_timing = forest_uncertainty(timing_predictor, X_pool)
+            _, std_power = forest_uncertainty(power_predictor, X_pool)
+            # put both targets on the same scale before combining
+            uncertainty = std_timing / (np.std(y_timing) + 1e-12) + std_power / (np.std(y_power) + 1e-12)
+            chosen = select_informative(X_pool, uncertainty, batch_size, np.array(X, dtype=np.float64),
+                                        seed=round_index)
+
+        add_results([candidates[i] for i in chosen])
+        timing_predictor, power_predictor = fit_forests(np.array(X), np.array(y_timing), np.array(y_power))
+
+    return timing_predictor, power_predictor, history
@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import numpy as np
+
+from hw_nas.search_space import Architecture, OP_CODES, PARAM_KEYS, PADDING_SAME
+
+# totals computed per architecture, keys of analyze_batch results and cost limits
+COST_NAMES = ['macs', 'params', 'peak_activation_bytes', 'max_layer_macs']
+BYTES_PER_ELEMENT = 4 # float32 activations
+
+_CONV, _MAX_POOL, _AVG_POOL, _FLATTEN, _LINEAR = (
+    OP_CODES[op] for op in ('conv', 'max_pool', 'global_avg_pool', 'flatten', 'linear')
+)
+_COL = {key: 1 + PARAM_KEYS.index(key) for key in PARAM_KEYS}
+
+@dataclass
+class LayerCost:
+    """Cost of one block, shapes without the batch dimension ((C, H, W) or (features,))."""
+    op_type: str
+    input_shape: Tuple[int, ...]
+    output_shape: Tuple[int, ...]
+    macs: int
+    params: int
+    live_bytes: int # activations alive while the layer runs (input + output)
+
+@dataclass
+class ArchitectureCost:
+    layers: List[LayerCost] = field(default_factory=list)
+    macs: int = 0
+    params: int = 0
+    peak_activation_bytes: int = 0
+    max_layer_macs: int = 0
+
+def _conv_size(size, kernel_size, padding, stride):
+    # 'same' is only valid with stride 1 in torch and keeps the size
+    if padding == 'same':
+        return size
+    return (size + 2 * padding - kernel_size) // stride + 1
+
+def analyze(arch: Architecture, input_channels=3, input_size=32, bytes_per_element=BYTES_PER_ELEMENT):
+    """
+    Walks an architecture like TranslatedPytorchModel.forward and returns its
+    per layer and total cost. MACs count multiply-accumulates of conv and
+    linear layers (bias adds are not counted), params include biases.
+    Raises ValueError where the torch model would fail on a shape mismatch.
+    """
+    cost = ArchitectureCost()
+    shape = (input_channels, input_size, input_size)
+
+    for i, block in enumerate(arch.blocks):
+        op_type = block.op_type
+        params = block.params
+        macs = 0
+        num_params = 0
+
+        if op_type == 'conv':
+            channels, height, width = shape
+            if params['in_channels'] != channels:
+                raise ValueError(f"block {i}: conv expects {params['in_channels']} channels, gets {channels}")
+            kernel_size = params['kernel_size']
+            out_channels = params['out_channels']
+            out_shape = (
+                out_channels,
+                _conv_size(height, kernel_size, params['padding'], params['stride']),
+                _conv_size(width, kernel_size, params['padding'], params['stride']),
+            )
+            weights = out_channels * channels * kernel_size * kernel_size
+            macs = weights * out_shape[1] * out_shape[2]
+            num_params = weights + out_channels
+        elif op_type == 'relu':
+            out_shape = shape
+        elif op_type == 'max_pool':
+            channels, height, width = shape
+            kernel_size, stride = params['kernel_size'], params['stride']
+            out_shape = (channels, (height - kernel_size) // stride + 1, (width - kernel_size) // stride + 1)
+        elif op_type == 'global_avg_pool':
+            out_shape = (shape[0], 1, 1)
+        elif op_type == 'flatten':
+            out_shape = (int(np.prod(shape)),)
+        elif op_type == 'linear':
+            if len(shape) != 1 or params['in_features'] != shape[0]:
+                raise ValueError(f"block {i}: linear expects {params['in_features']} features, gets shape {shape}")
+            macs = params['in_features'] * params['out_features']
+            num_params = macs + params['out_features']
+            out_shape = (params['out_features'],)
+        else:
+            raise ValueError(f"block {i}: unknown op type {op_type}")
+
+        if min(out_shape) <= 0:
+            raise ValueError(f"block {i}: {op_type} output shape {out_shape} is empty")
+
+        # flatten is a view, it allocates no new activation
+        live = int(np.prod(shape)) + (0 if op_type == 'flatten' else int(np.prod(out_shape)))
+        layer = LayerCost(op_type, shape, out_shape, macs, num_params, live * bytes_per_element)
+        cost.layers.append(layer)
+        cost.macs += macs
+        cost.params += num_params
+        cost.peak_activation_bytes = max(cost.peak_activation_bytes, layer.live_bytes)
+        cost.max_layer_macs = max(cost.max_layer_macs, macs)
+        shape = out_shape
+
+    return cost
+
+def analyze_batch(archs, input_channels=3, input_size=32, bytes_per_element=BYTES_PER_ELEMENT):
+    """
+    Totals of analyze() for many architectures at once, vectorized over the
+    compact block arrays (one NumPy pass per block position, not per block).
+    Returns {name: int64 array} for every name in COST_NAMES.
+    """
+    n = len(archs)
+    totals = {name: np.zeros(n, dtype=np.int64) for name in COST_NAMES}
+    if n == 0:
+        return totals
+
+    lengths = np.fromiter((len(arch) for arch in archs), dtype=np.int64, count=n)
+    blocks = np.concatenate([arch.array for arch in archs]).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    # current activation shape, flat tensors keep their features in channels (height = width = 1)
+    channels = np.full(n, input_channels, dtype=np.int64)
+    height = np.full(n, input_size, dtype=np.int64)
+    width = np.full(n, input_size, dtype=np.int64)
+    flat = np.zeros(n, dtype=bool)
+
+    for position in range(int(lengths.max())):
+        active = np.flatnonzero(lengths > position)
+        rows = blocks[offsets[active] + position]
+        op = rows[:, 0]
+        c, h, w = channels[active], height[active], width[active]
+        in_elements = c * h * w
+        macs = np.zeros(len(active), dtype=np.int64)
+        params = np.zeros(len(active), dtype=np.int64)
+
+        conv = op == _CONV
+        if conv.any():
+            kernel = rows[conv, _COL['kernel_size']]
+            padding = rows[conv, _COL['padding']]
+            stride = rows[conv, _COL['stride']]
+            out_c = rows[conv, _COL['out_channels']]
+            if (rows[conv, _COL['in_channels']] != c[conv]).any() or flat[active][conv].any():
+                bad = active[conv][(rows[conv, _COL['in_channels']] != c[conv]) | flat[active][conv]][0]
+                raise ValueError(f"architecture {bad}, block {position}: conv input channel mismatch")
+            same = padding == PADDING_SAME
+            pad = np.maximum(padding, 0)
+            out_h = np.where(same, h[conv], (h[conv] + 2 * pad - kernel) // stride + 1)
+            out_w = np.where(same, w[conv], (w[conv] + 2 * pad - kernel) // stride + 1)
+            weights = out_c * c[conv] * kernel * kernel
+            macs[conv] = weights * out_h * out_w
+            params[conv] = weights + out_c
+            c[conv], h[conv], w[conv] = out_c, out_h, out_w
+
+        pool = op == _MAX_POOL
+        if pool.any():
+            kernel = rows[pool, _COL['kernel_size']]
+            stride = rows[pool, _COL['stride']]
+            h[pool] = (h[pool] - kernel) // stride + 1
+            w[pool] = (w[pool] - kernel) // stride + 1
+
+        avg_pool = op == _AVG_POOL
+        h[avg_pool] = 1
+        w[avg_pool] = 1
+
+        flatten = op == _FLATTEN
+        c[flatten] = in_elements[flatten]
+        h[flatten] = 1
+        w[flatten] = 1
+        flat[active[flatten]] = True
+
+        linear = op == _LINEAR
+        if linear.any():
+            in_features = rows[linear, _COL['in_features']]
+            out_features = rows[linear, _COL['out_features']]
+            if (in_features != c[linear]).any() or not flat[active][linear].all():
+                bad = active[linear][(in_features != c[linear]) | ~flat[active][linear]][0]
+                raise ValueError(f"architecture {bad}, block {position}: linear input feature mismatch")
+            macs[linear] = in_features * out_features
+            params[linear] = macs[linear] + out_features
+            c[linear] = out_features
+
+        if (np.minimum(h, w) <= 0).any():
+            bad = active[np.minimum(h, w) <= 0][0]
+            raise ValueError(f"architecture {bad}, block {position}: empty output shape")
+
+        out_elements = np.where(flatten, 0, c * h * w)
+        channels[active], height[active], width[active] = c, h, w
+        totals['macs'][active] += macs
+        totals['params'][active] += params
+        # active holds every architecture at most once, plain fancy indexing is safe
+        totals['max_layer_macs'][active] = np.maximum(totals['max_layer_macs'][active], macs)
+        totals['peak_activation_bytes'][active] = np.maximum(
+            totals['peak_activation_bytes'][active], (in_elements + out_elements) * bytes_per_element)
+
+    return totals
+
+def cost_features_batch(archs, input_channels=3, input_size=32):
+    """(N, len(COST_NAMES)) log1p of the analyze_batch totals, e.g. as extra predictor features."""
+    totals = analyze_batch(archs, input_channels, input_size)
+    return np.log1p(np.column_stack([totals[name] for name in COST_NAMES]).astype(np.float64))
+
+def within_limits(totals, limits):
+    """
+    Boolean mask of the architectures whose analyze_batch totals stay within
+    limits ({name: max value}, e.g. {'macs': 50e6}), the cheap pre-filter
+    before predictors or synthesis.
+    """
+    n = len(next(iter(totals.values())))
+    mask = np.ones(n, dtype=bool)
+    for name, bound in limits.items():
+        mask &= totals[name] <= bound
+    return mask
@@ -1,137 +1,314 @@
 import math
+import numpy as np
 
-# max buffer size (must match ops.cpp)
+from hw_nas.search_space import DEFAULT_PIPELINE_II, DEFAULT_UNROLL, DEFAULT_BITS
+from hw_nas.weight_export import EMBED_WEIGHTS_MAX_BYTES
+
+# max buffer size (must match ops.h)
 MAX_FEAT_SIZE = 32 * 32 * 128
+# kernel header, found through the include path of the HLS config (syn.cflags)
+OPS_HEADER = "ops.h"
+
+def _knobs(params):
+    """(pipeline_ii, unroll) template arguments of a block."""
+    return params.get('pipeline_ii', DEFAULT_PIPELINE_II), params.get('unroll', DEFAULT_UNROLL)
+
+def _plan_layers(arch, input_channels, input_size, fuse_relu):
+    """
+    Kernel calls of an architecture, in order. Each call is a dict with the
+    kernel name, its template arguments, the weight / bias offsets into
+    weights_gmem (kernels with parameters), the input and output sizes and
+    whether it works in place. With fuse_relu a ReLU right after a conv or
+    linear block becomes the RELU template argument of that call.
+    Returns (calls, input size, number of weights).
+    """
+    calls = []
+
+    # Track data shape
+    current_channels = input_channels
+    current_h = input_size
+    current_w = input_size
+    current_features = 0  # for linear layers
+    is_linear = False     # Flag to track if we're in 1D (linear) mode
+    weight_offset = 0     # next parameter in weights_gmem
+
+    blocks = arch.blocks
+    fused = set() # relu blocks folded into the previous call
+    for i, block in enumerate(blocks):
+        if i in fused:
+            continue
+        op_type = block.op_type
+        params = block.params
+        in_size = current_features if is_linear else current_channels * current_h * current_w
+        call = {"block": i, "op_type": op_type, "in_size": in_size, "in_place": False, "weights": None}
+
+        if op_type == 'conv':
+            out_channels = params['out_channels']
+            kernel_size = params['kernel_size']
+            padding = params.get('padding', 0)
+            stride = params.get('stride', 1)
+
+            # Calculate output shape
+            if padding == 'same':
+                out_h = math.ceil(current_h / stride)
+                out_w = math.ceil(current_w / stride)
+                # odd kernels only, so 'same' pads symmetrically
+                padding_int = kernel_size // 2
+            else:
+                padding_int = padding
+                out_h = math.floor((current_h - kernel_size + 2 * padding_int) / stride) + 1
+                out_w = math.floor((current_w - kernel_size + 2 * padding_int) / stride) + 1
+
+            num_weights = out_channels * current_channels * kernel_size * kernel_size
+            call["kernel"] = "conv"
+            call["args"] = [current_channels, out_channels, kernel_size, current_h, current_w, out_h, out_w,
+                            stride, padding_int, *_knobs(params), params.get('bits', DEFAULT_BITS)]
+            call["weights"] = (weight_offset, weight_offset + num_weights)
+            call["weight_sizes"] = (num_weights, out_channels)
+            weight_offset += num_weights + out_channels
+
+            # Update shape
+            current_channels = out_channels
+            current_h, current_w = out_h, out_w
+            current_features = 0
+            is_linear = False
+
+        elif op_type == 'relu':
+            call["kernel"] = "relu"
+            call["args"] = [in_size]
+            call["in_place"] = True
+
+        elif op_type == 'max_pool':
+            kernel_size = params.get('kernel_size', 2)
+            stride = params.get('stride', 2)
+
+            out_h = math.floor((current_h - kernel_size) / stride) + 1
+            out_w = math.floor((current_w - kernel_size) / stride) + 1
+
+            call["kernel"] = "max_pool"
+            call["args"] = [current_channels, current_h, current_w, kernel_size, stride, out_h, out_w, *_knobs(params)]
+
+            current_h, current_w = out_h, out_w
+            current_features = 0
+            is_linear = False
+
+        elif op_type == 'global_avg_pool':
+            call["kernel"] = "avg_pool"
+            call["args"] = [current_channels, current_h, current_w, *_knobs(params)]
+
+            current_h, current_w = 1, 1
+            current_features = current_channels
+            is_linear = True
+
+        elif op_type == 'flatten':
+            # Flatten: No C++ op needed
+            call["kernel"] = None
+            current_features = current_channels * current_h * current_w
+            is_linear = True
 
-def generate_cpp_from_architecture(arch, output_file="generated_design.cpp"):
+        elif op_type == 'linear':
+            in_features = params['in_features']
+            out_features = params['out_features']
+
+            if in_features == 0: in_features = current_features # Get last layer's features
+
+            num_weights = in_features * out_features
+            call["kernel"] = "linear"
+            call["args"] = [in_features, out_features, *_knobs(params), params.get('bits', DEFAULT_BITS)]
+            call["weights"] = (weight_offset, weight_offset + num_weights)
+            call["weight_sizes"] = (num_weights, out_features)
+            weight_offset += num_weights + out_features
+
+            current_features = out_features
+            is_linear = True
+
+        else:
+            raise ValueError(f"block {i}: no HLS kernel for op type {op_type}")
+
+        if fuse_relu and call["weights"] is not None and i + 1 < len(blocks) and blocks[i + 1].op_type == 'relu':
+            call["args"].append("true")
+            call["fused_relu"] = i + 1
+            fused.add(i + 1)
+
+        call["out_size"] = current_features if is_linear else current_channels * current_h * current_w
+        if call["out_size"] > MAX_FEAT_SIZE:
+            raise ValueError(f"block {i}: {op_type} output of {call['out_size']} values exceeds MAX_FEAT_SIZE ({MAX_FEAT_SIZE})")
+        calls.append(call)
+
+    return calls, input_channels * input_size * input_size, weight_offset
+
+def _float_literals(values, per_line=8):
+    # shortest float32 round trip form, e.g. 1.5e-01f
+    literals = [np.format_float_scientific(v, unique=True) + "f" for v in np.asarray(values, dtype=np.float32).ravel()]
+    return ",\n".join("    " + ", ".join(literals[i:i + per_line]) for i in range(0, len(literals), per_line))
+
+def _place_weights(calls, weights, embed_max_bytes):
     """
-    Generates a simple ++ file from an Architecture object
-    for HLS synthesis testing and predictor data collection.
+    Sets the weight / bias operands of every call with parameters. Without
+    a blob they are weights_gmem offsets of the dense model.parameters()
+    layout. With a WeightBlob they come from its offset table, and layers
+    with at most embed_max_bytes of parameters become on chip constant
+    arrays holding the blob values instead.
+    Returns the declarations of those arrays.
     """
-    
+    declarations = []
+    for call in calls:
+        if call["weights"] is None:
+            continue
+        if weights is None:
+            call["weight_operands"] = [f"weights_gmem + {offset}" for offset in call["weights"]]
+            continue
+        names = [f"layers.{call['block']}.{name}" for name in ("weight", "bias")]
+        if any(name not in weights for name in names):
+            raise ValueError(f"block {call['block']}: weight blob has no {' / '.join(names)}")
+        entries = [weights.entry(name) for name in names]
+        for entry, size in zip(entries, call["weight_sizes"]):
+            if entry.size != size:
+                raise ValueError(f"block {call['block']}: {entry.name} has {entry.size} values, the layer needs {size}")
+        if sum(entry.size for entry in entries) * 4 <= embed_max_bytes:
+            names = [entry.name.replace(".", "_") for entry in entries] # e.g. layers_0_weight
+            for name, entry in zip(names, entries):
+                declarations.append(f"static const float {name}[{entry.size}] = {{\n"
+                                    f"{_float_literals(weights.tensor(entry.name))}\n}};")
+            call["weight_operands"] = names
+            call["on_chip_weights"] = True
+        else:
+            call["weight_operands"] = [f"weights_gmem + {entry.offset}" for entry in entries]
+    return declarations
+
+def _call_line(call, src, dst=None):
+    """C++ statement of one planned call reading src and writing dst (None: in place)."""
+    template = ", ".join(str(arg) for arg in call["args"])
+    operands = [src] if dst is None else [src, dst]
+    if call["weights"] is not None:
+        operands += call["weight_operands"]
+    line = f"    {call['kernel']}<{template}>({', '.join(operands)});"
+    return line + " // In-place" if dst is None else line
+
+def _comment(call):
+    op_type = call["op_type"] + (" + relu (fused)" if "fused_relu" in call else "")
+    weights = " (on chip weights)" if call.get("on_chip_weights") else ""
+    return f"    // --- Block {call['block']}: {op_type}{weights} ---"
+
+def generate_cpp_from_architecture(arch, output_file="generated_design.cpp", input_channels=3, input_size=32,
+                                   fuse_relu=False, dataflow=False, weight_blob=None,
+                                   embed_max_bytes=EMBED_WEIGHTS_MAX_BYTES):
+    """
+    Generates the HLS C++ design of an Architecture: one ops.h kernel call
+    per block with its shape, parallelism knobs (pipeline_ii, unroll) and
+    datapath precision (bits, fixed point below 32) as template arguments.
+    Without weight_blob, weights and biases are read from the weights_gmem port
+    in PyTorch parameter order (the flattened model.parameters() of the
+    same architecture). With a WeightBlob of trained parameters
+    (weight_export.pack_state_dict) they are read at its offsets, the port
+    then carries blob.data, and layers with at most embed_max_bytes of
+    parameters get them as on chip constant arrays instead.
+    Raises ValueError if the blob does not fit the architecture.
+    fuse_relu folds a ReLU into the conv / linear call before it.
+    Without dataflow layers run one after the other on two ping-pong buffers
+    (sized to the largest activation). With dataflow every layer writes its
+    own array under #pragma HLS DATAFLOW, HLS turns them into PIPO buffers
+    and the layers run as concurrent processes (task level pipelining).
+    A dataflow process may not share an m_axi argument with another, so
+    there a single load_weights process reads weights_gmem and hands every
+    layer its weights / bias in arrays of its own.
+    Returns output_file.
+    """
+    calls, input_elements, num_weights = _plan_layers(arch, input_channels, input_size, fuse_relu)
+    constants = _place_weights(calls, weight_blob, embed_max_bytes)
+    if weight_blob is not None:
+        num_weights = weight_blob.data.size
+    output_elements = calls[-1]["out_size"] if calls else input_elements
+    lines = []
+    loader = []
+
+    if dataflow:
+        # weights_gmem has one reader, the loader, every layer reads its own copy
+        weight_arrays = []
+        for call in calls:
+            if call["weights"] is None or call.get("on_chip_weights"):
+                continue
+            names = [f"{name}_{call['block']}" for name in ("weight", "bias")]
+            for name, size, operand in zip(names, call["weight_sizes"], call["weight_operands"]):
+                weight_arrays.append((name, size))
+                loader.append(f"    copy_buffer<{size}>({operand}, {name});")
+            call["weight_operands"] = names
+        # act_0 is the input, every call with a kernel writes the next array
+        arrays = [("act_0", input_elements)]
+        if weight_arrays:
+            lines.append(f"    load_weights(weights_gmem, {', '.join(name for name, _ in weight_arrays)});\n")
+        lines.append(f"    copy_buffer<{input_elements}>(input_gmem, act_0);\n")
+        for call in calls:
+            lines.append(_comment(call))
+            if call["kernel"] is None:
+                lines.append(f"    // Flatten: No C++ op needed\n")
+                continue
+            src = arrays[-1][0]
+            dst = f"act_{len(arrays)}"
+            arrays.append((dst, call["out_size"]))
+            # out of place (relu too), every array has a single producer
+            lines.append(_call_line(call, src, dst) + "\n")
+        result = arrays[-1][0]
+        lines.append(f"    copy_buffer<{output_elements}>({result}, output_gmem);")
+        declarations = [f"    SW_STATIC float {name}[{size}];" for name, size in weight_arrays + arrays]
+        if weight_arrays:
+            params = ", ".join(f"float {name}[{size}]" for name, size in weight_arrays)
+            loader = [f"static void load_weights(const float* weights_gmem, {params}) {{"] + loader + ["}"]
+    else:
+        # layers read src and write dst, in place ops (relu) and flatten keep them
+        src, dst = "buffer_a", "buffer_b"
+        lines.append("    for(int i=0; i < INPUT_SIZE; ++i) buffer_a[i] = input_gmem[i];\n")
+        for call in calls:
+            lines.append(_comment(call))
+            if call["kernel"] is None:
+                lines.append(f"    // Flatten: No C++ op needed\n")
+                continue
+            if call["in_place"]:
+                lines.append(_call_line(call, src) + "\n")
+                continue
+            lines.append(_call_line(call, src, dst) + "\n")
+            src, dst = dst, src
+        lines.append(f"    // Write final result from {src} back to gmem")
+        lines.append(f"    for(int i=0; i < OUTPUT_SIZE; ++i) output_gmem[i] = {src}[i];")
+        buffer_size = max([input_elements] + [call["out_size"] for call in calls])
+        declarations = [
+            f"    static float buffer_a[{buffer_size}];",
+            f"    static float buffer_b[{buffer_size}];",
+            "    #pragma HLS BIND_STORAGE variable=buffer_a type=RAM_2P",
+            "    #pragma HLS BIND_STORAGE variable=buffer_b type=RAM_2P",
+        ]
+
     with open(output_file, 'w') as f:
         f.write(f"// Auto-generated HLS design\n")
         f.write(f"// Arch: {arch}\n")
-        f.write("#include <cstddef>\n\n")
-        
-        # HLS sizing constraint
-        f.write(f"#define MAX_FEAT_SIZE {MAX_FEAT_SIZE}\n\n")
-
-        # function declarations from ops.cpp
-        f.write("void relu(float* data, int size);\n")
-        f.write("void max_pool(float* input, float* output, int in_channels, int in_h, int in_w, int stride);\n") 
-        f.write("void avg_pool(float* input, float* output, int in_channels, int in_h, int in_w);\n")
-        f.write("void linear(float* input, float* output, const float* weights, const float* bias, int in_features, int out_features);\n")
-        f.write("void conv(float* input, float* output, const float* weights, const float* bias, int in_channels, int out_channels, int kernel_size, int in_h, int in_w, int out_h, int out_w, int stride);\n\n") 
-        
-        # placeholder weights to match function signatures
-        f.write("const float dummy_weights[1] = {0.0f};\n")
-        f.write("const float dummy_bias[1] = {0.0f};\n\n")
+        f.write(f"// Codegen: fuse_relu={fuse_relu}, dataflow={dataflow}\n")
+        if weight_blob is not None:
+            f.write(f"// Weights: packed blob of {weight_blob.nbytes} bytes, {len(constants)} tensors on chip\n")
+        f.write(f'#include "{OPS_HEADER}"\n\n')
+
+        f.write(f"#define INPUT_SIZE {input_elements}\n")
+        f.write(f"#define OUTPUT_SIZE {output_elements}\n")
+        f.write(f"#define NUM_WEIGHTS {max(num_weights, 1)}\n\n")
+        if constants:
+            # trained parameters of small layers, HLS maps them to ROMs
+            f.write("\n".join(constants) + "\n\n")
+        if loader:
+            # dataflow: the only process reading weights_gmem
+            f.write("\n".join(loader) + "\n\n")
 
         # main top function
-        f.write("void top_function(float* input_gmem, float* output_gmem) {\n")
-        
-        # important for HLS?? TODO: verify necessity
-        f.write("    #pragma HLS INTERFACE m_axi port=input_gmem bundle=gmem0 depth=MAX_FEAT_SIZE\n")
-        f.write("    #pragma HLS INTERFACE m_axi port=output_gmem bundle=gmem1 depth=MAX_FEAT_SIZE\n")
-        f.write("    #pragma HLS INTERFACE s_axilite port=return\n\n")
-        
-        # --- Single Buffer for all operations ---
-        f.write(f"    static float buffer[MAX_FEAT_SIZE];\n")
-        f.write("    #pragma HLS BIND_STORAGE variable=buffer type=RAM_2P\n\n")
-
-        # --- 5. Generate Layer Calls ---
-        
-        # Track data shape
-        current_channels = 3  # Start with RGB
-        current_h = 32
-        current_w = 32
-        current_features = 0  # for linear layers
-        is_linear = False     # Flag to track if we're in 1D (linear) mode
-        
-        # Load initial data from memory
-        f.write(f"    int load_size = {current_channels * current_h * current_w};\n")
-        f.write(f"    if (load_size > MAX_FEAT_SIZE) load_size = MAX_FEAT_SIZE;\n")
-        f.write(f"    for(int i=0; i < load_size; ++i) buffer[i] = input_gmem[i];\n\n")
-
-        for i, block in enumerate(arch.blocks):
-            op_type = block.op_type
-            params = block.params
-            f.write(f"    // --- Block {i}: {op_type} ---\n")
-            
-            if op_type == 'conv':
-                out_channels = params['out_channels']
-                kernel_size = params['kernel_size']
-                padding = params.get('padding', 0)
-                stride = params.get('stride', 1) 
-                
-                # Calculate output shape
-                if padding == 'same':
-                    out_h = math.ceil(current_h / stride)
-                    out_w = math.ceil(current_w / stride)
-                else:
-                    padding_int = padding
-                    out_h = math.floor((current_h - kernel_size + 2 * padding_int) / stride) + 1
-                    out_w = math.floor((current_w - kernel_size + 2 * padding_int) / stride) + 1
-                
-                f.write(f"    conv(buffer, buffer, dummy_weights, dummy_bias, {current_channels}, {out_channels}, {kernel_size}, {current_h}, {current_w}, {out_h}, {out_w}, {stride});\n") 
-                
-                # Update shape
-                current_channels = out_channels
-                current_h, current_w = out_h, out_w
-                current_features = 0
-                is_linear = False
-                
-            elif op_type == 'relu':
-                size = current_features if is_linear else (current_channels * current_h * current_w)
-                if size <= 0: size = MAX_FEAT_SIZE
-                if size > MAX_FEAT_SIZE: size = MAX_FEAT_SIZE
-                f.write(f"    relu(buffer, {size}); // In-place\n")
-
-            elif op_type == 'max_pool':
-                kernel_size = params.get('kernel_size', 2)
-                stride = params.get('stride', 2) 
-                
-                out_h = math.floor((current_h - kernel_size) / stride) + 1
-                out_w = math.floor((current_w - kernel_size) / stride) + 1
-                
-                f.write(f"    max_pool(buffer, buffer, {current_channels}, {current_h}, {current_w}, {stride});\n")
-                
-                current_h, current_w = out_h, out_w
-                current_features = 0
-                is_linear = False
-
-            elif op_type == 'global_avg_pool':
-                f.write(f"    avg_pool(buffer, buffer, {current_channels}, {current_h}, {current_w});\n")
-                
-                current_h, current_w = 1, 1
-                current_features = current_channels 
-                is_linear = True
-            
-            elif op_type == 'flatten':
-                current_features = current_channels * current_h * current_w
-                f.write(f"    // Flatten: No C++ op needed\n")
-                is_linear = True
-                
-            elif op_type == 'linear':
-                in_features = params['in_features']
-                out_features = params['out_features']
-                
-                if in_features == 0: in_features = current_features # Get last layer's features
-                
-                f.write(f"    linear(buffer, buffer, dummy_weights, dummy_bias, {in_features}, {out_features});\n")
-                
-                current_features = out_features
-                is_linear = True
-            
-            f.write("\n") # Add a newline for readability
-
-        # --- 6. Write final result back to global memory ---
-        f.write(f"    // Write final result from buffer back to gmem\n")
-        f.write(f"    int out_size = {current_features};\n")
-        f.write(f"    if (out_size <= 0 || out_size > MAX_FEAT_SIZE) out_size = MAX_FEAT_SIZE;\n")
-        f.write(f"    for(int i=0; i < out_size; ++i) output_gmem[i] = buffer[i];\n")
+        f.write("void top_function(const float* input_gmem, float* output_gmem, const float* weights_gmem) {\n")
+        f.write("    #pragma HLS INTERFACE m_axi port=input_gmem bundle=gmem0 depth=INPUT_SIZE\n")
+        f.write("    #pragma HLS INTERFACE m_axi port=output_gmem bundle=gmem1 depth=OUTPUT_SIZE\n")
+        f.write("    #pragma HLS INTERFACE m_axi port=weights_gmem bundle=gmem2 depth=NUM_WEIGHTS\n")
+        f.write("    #pragma HLS INTERFACE s_axilite port=return\n")
+        if dataflow:
+            f.write("    #pragma HLS DATAFLOW\n")
+        f.write("\n")
+
+        f.write("\n".join(declarations) + "\n\n")
+        f.write("\n".join(lines) + "\n")
         f.write("}\n")
-    
+
     print(f"Generated C++ file: {output_file}")
-    return output_file
\ No newline at end of file
+    return output_file
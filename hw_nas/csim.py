@@ -0,0 +1,218 @@
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+from hw_nas.cpp_generator import generate_cpp_from_architecture
+from hw_nas.search_space import Architecture
+
+# software emulation (C simulation) of generated designs: the design plus a
+# small testbench compiled with plain g++ (HLS pragmas are ignored there)
+OPS_INCLUDE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'hls_vivado', 'src'))
+CXX = "g++"
+CXX_FLAGS = ["-O2", "-std=c++14", "-Wall", "-Wno-unknown-pragmas"]
+
+# design validation (validate_design): random inputs per design and the
+# allowed deviation from the torch reference
+CSIM_INPUTS = 4
+CSIM_RTOL = 1e-4
+CSIM_ATOL = 1e-4
+# fixed point layers round their inputs, float layers in front of them may
+# flip a rounding step (different summation order), so designs with fixed
+# point layers only have to agree to this absolute error
+CSIM_ATOL_FIXED_POINT = 0.5
+
+# reads the inputs / weights, runs the design on every input, writes the
+# outputs (raw float32 files) and prints the mean time of one run
+TESTBENCH = r"""
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <vector>
+
+void top_function(const float* input_gmem, float* output_gmem, const float* weights_gmem);
+
+static std::vector<float> read_floats(const char* path, long count) {
+    std::vector<float> data(count > 0 ? count : 1);
+    FILE* f = std::fopen(path, "rb");
+    if (!f || (long)std::fread(data.data(), sizeof(float), count, f) != count) {
+        std::fprintf(stderr, "cannot read %ld floats from %s\n", count, path);
+        std::exit(1);
+    }
+    std::fclose(f);
+    return data;
+}
+
+int main(int argc, char** argv) {
+    if (argc != 8) {
+        std::fprintf(stderr, "usage: %s input n_input weights n_weights output n_output n_runs\n", argv[0]);
+        return 2;
+    }
+    long n_input = std::atol(argv[2]);
+    long n_output = std::atol(argv[6]);
+    long n_runs = std::atol(argv[7]);
+    std::vector<float> input = read_floats(argv[1], n_input * n_runs);
+    std::vector<float> weights = read_floats(argv[3], std::atol(argv[4]));
+    std::vector<float> output(n_output * n_runs);
+    auto start = std::chrono::steady_clock::now();
+    for (long r = 0; r < n_runs; r++) {
+        top_function(input.data() + r * n_input, output.data() + r * n_output, weights.data());
+    }
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+    FILE* f = std::fopen(argv[5], "wb");
+    std::fwrite(output.data(), sizeof(float), output.size(), f);
+    std::fclose(f);
+    std::printf("seconds_per_run: %.9f\n", elapsed.count() / n_runs);
+    return 0;
+}
+"""
+
+def model_weights(model):
+    """Parameters of a TranslatedPytorchModel as one float32 array, the weights_gmem layout."""
+    return np.concatenate([p.detach().cpu().numpy().ravel() for p in model.parameters()]).astype(np.float32)
+
+def compile_design(design_file, binary_file, cxx=CXX, flags=CXX_FLAGS):
+    """
+    Compiles a generated design with the testbench into binary_file.
+    Raises RuntimeError with the compiler output if it fails.
+    """
+    testbench = os.path.join(os.path.dirname(os.path.abspath(binary_file)), "testbench.cpp")
+    with open(testbench, 'w') as f:
+        f.write(TESTBENCH)
+    result = subprocess.run([cxx] + list(flags) + ["-I", OPS_INCLUDE_DIR, design_file, testbench, "-o", binary_file],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{cxx} failed on {design_file}:\n{result.stderr}")
+    return binary_file
+
+def run_binary(binary_file, x, weights, num_outputs, work_dir):
+    """
+    Runs a compiled design on a batch of inputs x (N x C x H x W) with the
+    flat weights. Returns (outputs, seconds_per_run): the (N, num_outputs)
+    float32 outputs and the mean time of one run of the design.
+    Raises RuntimeError if the binary fails.
+    """
+    paths = {name: os.path.join(work_dir, f"{name}.bin") for name in ("input", "weights", "output")}
+    x = np.asarray(x, dtype=np.float32)
+    num_runs = len(x)
+    x = x.reshape(num_runs, -1)
+    weights = np.asarray(weights, dtype=np.float32).ravel()
+    x.tofile(paths["input"])
+    weights.tofile(paths["weights"])
+    result = subprocess.run([binary_file, paths["input"], str(x.shape[1]), paths["weights"], str(weights.size),
+                             paths["output"], str(num_outputs), str(num_runs)], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{binary_file} exited with {result.returncode}:\n{result.stderr}")
+    seconds_per_run = float(result.stdout.split("seconds_per_run:")[1].split()[0])
+    return np.fromfile(paths["output"], dtype=np.float32).reshape(num_runs, num_outputs), seconds_per_run
+
+def simulate(arch, x, weights, work_dir, num_outputs, input_channels=3, input_size=32, **codegen_options):
+    """
+    Generates the design of arch (codegen_options: fuse_relu, dataflow) in
+    work_dir, compiles and runs it on the inputs x (N x C x H x W).
+    Returns the (N, num_outputs) output array.
+    """
+    design = os.path.join(work_dir, "generated_design.cpp")
+    binary = os.path.join(work_dir, "design")
+    generate_cpp_from_architecture(arch, design, input_channels, input_size, **codegen_options)
+    compile_design(design, binary)
+    return run_binary(binary, x, weights, num_outputs, work_dir)[0]
+
+def tolerance(arch):
+    """(rtol, atol) a C simulation of arch has to meet against the quantized torch model."""
+    fixed_point = any(block.params.get('bits', 32) < 32 for block in arch.blocks)
+    return CSIM_RTOL, CSIM_ATOL_FIXED_POINT if fixed_point else CSIM_ATOL
+
+@dataclass
+class CSimReport:
+    """Outcome of validate_design, status is 'ok' or the step that failed."""
+    arch: Architecture
+    status: str # ok, codegen_error, compile_error, reference_error, runtime_error or mismatch
+    message: str = ""
+    num_outputs: int = 0
+    mismatches: int = 0 # outputs outside the tolerance
+    max_abs_error: Optional[float] = None
+    compile_seconds: Optional[float] = None
+    csim_seconds: Optional[float] = None # one run of the design
+    torch_seconds: Optional[float] = None # one input through the torch reference
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+# torch.manual_seed is process wide, threads seed and build their reference one at a time
+_REFERENCE_LOCK = threading.Lock()
+
+def validate_design(arch, work_dir, num_inputs=CSIM_INPUTS, seed=0, input_channels=3, input_size=32,
+                    **codegen_options):
+    """
+    Checks that the generated design of arch computes what the torch model
+    does: generates it in work_dir (codegen_options: fuse_relu, dataflow),
+    compiles it with the testbench and runs it on num_inputs random inputs
+    with randomly initialized weights, compared against the quantized
+    TranslatedPytorchModel (see tolerance). Never raises for a broken
+    design, returns a CSimReport.
+    """
+    # torch only for the reference outputs, importing csim stays light
+    import torch
+    from hw_nas.pytorch_model import build_pytorch_model
+
+    os.makedirs(work_dir, exist_ok=True)
+    design = os.path.join(work_dir, "generated_design.cpp")
+    binary = os.path.join(work_dir, "design")
+    try:
+        generate_cpp_from_architecture(arch, design, input_channels, input_size, **codegen_options)
+    except ValueError as e:
+        return CSimReport(arch, "codegen_error", str(e))
+
+    start_time = time.time()
+    try:
+        compile_design(design, binary)
+    except RuntimeError as e:
+        return CSimReport(arch, "compile_error", str(e), compile_seconds=time.time() - start_time)
+    compile_seconds = time.time() - start_time
+
+    x = np.random.default_rng(seed).standard_normal((num_inputs, input_channels, input_size, input_size),
+                                                    dtype=np.float32)
+    try:
+        with _REFERENCE_LOCK:
+            torch.manual_seed(seed)
+            model = build_pytorch_model(arch, quantized=True).eval()
+        start_time = time.time()
+        with torch.no_grad():
+            expected = model(torch.from_numpy(x)).numpy()
+        torch_seconds = (time.time() - start_time) / num_inputs
+    except (RuntimeError, ValueError) as e:
+        # shape mismatches the generated code does not catch
+        return CSimReport(arch, "reference_error", f"torch model failed: {e}", compile_seconds=compile_seconds)
+
+    try:
+        got, csim_seconds = run_binary(binary, x, model_weights(model), expected.shape[1], work_dir)
+    except RuntimeError as e:
+        return CSimReport(arch, "runtime_error", str(e), compile_seconds=compile_seconds)
+
+    rtol, atol = tolerance(arch)
+    mismatches = int(np.sum(~np.isclose(got, expected, rtol=rtol, atol=atol)))
+    max_abs_error = float(np.max(np.abs(got - expected)))
+    status = "mismatch" if mismatches else "ok"
+    message = f"{mismatches}/{expected.size} outputs differ, max abs error {max_abs_error:.2e}" if mismatches else ""
+    return CSimReport(arch, status, message, expected.size, mismatches, max_abs_error,
+                      compile_seconds, csim_seconds, torch_seconds)
+
+def validate_designs(archs, work_dir, num_workers=None, **options):
+    """
+    validate_design for many architectures, compiled and run by up to
+    num_workers (default: CPU count) threads at once, each design in its
+    own directory below work_dir. Returns the CSimReports in input order.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+
+    def validate(i, arch):
+        return validate_design(arch, os.path.join(work_dir, f"design_{i:05d}"), **options)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        return list(pool.map(validate, range(len(archs)), archs))
@@ -1,15 +1,44 @@
 import subprocess
+import json
+import operator
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from hw_nas.search_space import get_random_architecture
 from hw_nas.predictor import featurize
 from hw_nas.cpp_generator import generate_cpp_from_architecture
-from hw_nas.utils import read_vivado_results
+from hw_nas.csim import validate_design, validate_designs, CXX
+from hw_nas.synthesis_cache import compute_cache_key, PARTIAL_OUTCOMES
+from hw_nas.report_parser import parse_build_dir, read_metrics, SynthesisMetrics, METRICS_FILE
 
-def _run_synthesis_script(config):
-    """Helper to run the synthesis script."""
-    print("starting HLS + Vivado synthesis...")
+# staged flow (config["STAGE_SCRIPT"]): HLS C-synthesis -> out-of-context synthesis -> place + route
+STAGES = ["hls", "synth", "impl"]
+# amd kria kv260 (xck26)
+KV260_RESOURCES = {"lut": 117120, "ff": 234240, "dsp": 1248, "bram_18k": 288}
+# designs breaking one of these after HLS never reach Vivado, {metric: (op, bound)}.
+# any SynthesisMetrics field works, e.g. "latency_cycles": ("<=", 5_000_000)
+DEFAULT_HLS_LIMITS = {
+    "lut": ("<=", KV260_RESOURCES["lut"]),
+    "ff": ("<=", KV260_RESOURCES["ff"]),
+    "dsp": ("<=", KV260_RESOURCES["dsp"]),
+    "bram_18k": ("<=", KV260_RESOURCES["bram_18k"]),
+    "estimated_clock_ns": ("<=", 13.0), # 10 ns target, this far off it will not close timing
+}
+# same after out-of-context synthesis, before place + route
+DEFAULT_SYNTH_LIMITS = {
+    "synth_lut": ("<=", KV260_RESOURCES["lut"]),
+    "synth_ff": ("<=", KV260_RESOURCES["ff"]),
+    "synth_dsp": ("<=", KV260_RESOURCES["dsp"]),
+    "synth_bram_tiles": ("<=", KV260_RESOURCES["bram_18k"] / 2), # 36K tiles
+    "synth_wns": (">=", -3.0),
+}
+_COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+# C simulation (config["CSIM_CHECK"]): designs that do not compile or disagree
+# with the torch model are rejected before synthesis, work dirs below this
+DEFAULT_CSIM_DIR = "build_csim"
 
-    # cleanup old synthesis files
+def _clean_build_dir(config):
     if os.path.exists(config["VIVADO_LOG"]): os.remove(config["VIVADO_LOG"])
     if os.path.exists(config["VIVADO_JOU"]): os.remove(config["VIVADO_JOU"])
     if os.path.exists(config["BUILD_DIR"]):
@@ -17,26 +46,248 @@ def _run_synthesis_script(config):
     if os.path.exists(config["HLS_OUTPUT_DIR"]):
          subprocess.run(["rm", "-rf", config["HLS_OUTPUT_DIR"]])
 
+def _run_synthesis_script(config, env=None, log_file=None, stage=None):
+    """
+    Helper to run the synthesis script.
+    env overrides the script environment, log_file captures its output
+    instead of printing it to the console.
+    With a stage, runs config["STAGE_SCRIPT"] for just that stage (the build
+    dir is only cleared before the first one, later stages append to the log).
+    """
+    if stage is None:
+        print("starting HLS + Vivado synthesis...")
+        script = config["VIVADO_SCRIPT"]
+        command = ["bash", script]
+    else:
+        print(f"starting stage {stage}...")
+        script = config["STAGE_SCRIPT"]
+        command = ["bash", script, stage]
+
+    # cleanup old synthesis files
+    if stage is None or stage == STAGES[0]:
+        _clean_build_dir(config)
+
     # start HLS + Vivado synthesis using shell script
     # catch errors if synthesis fails, and skip data point
     try:
-        subprocess.run(["bash", config["VIVADO_SCRIPT"]], check=True) # print logs directly to console
+        if log_file is None:
+            subprocess.run(command, check=True, env=env) # print logs directly to console
+        else:
+            with open(log_file, 'w' if stage is None or stage == STAGES[0] else 'a') as log:
+                subprocess.run(command, check=True, env=env, stdout=log, stderr=subprocess.STDOUT)
     except subprocess.CalledProcessError as e:
         print(f"ERROR: Synthesis script failed with return code {e.returncode}!")
+        if log_file is not None:
+            print(f" - see {log_file}")
         return False # Indicate failure
     except FileNotFoundError:
-        print(f"ERROR: Synthesis script not found at {config['VIVADO_SCRIPT']}")
+        print(f"ERROR: Synthesis script not found at {script}")
         return False
         
-    print("Synthesis finished.")
+    print("Synthesis finished." if stage is None else f"Stage {stage} finished.")
     return True # Indicate success
 
-def collect_single_datapoint(iteration, total_iterations, config):
+def check_limits(metrics, limits):
+    """
+    Reasons why metrics break limits ({metric: (op, bound)}), empty if they
+    pass. Metrics the reports did not provide are not held against a design.
+    """
+    reasons = []
+    for name, (op, bound) in limits.items():
+        value = getattr(metrics, name)
+        if value is not None and not _COMPARISONS[op](value, bound):
+            reasons.append(f"{name} {value} not {op} {bound}")
+    return reasons
+
+def run_staged_flow(config, env=None, log_file=None):
+    """
+    Runs the flow stage by stage (STAGES, via config["STAGE_SCRIPT"]) up to
+    config["STOP_AFTER"] (default "impl"). After HLS the csynth estimates are
+    checked against config["HLS_LIMITS"], after synthesis the post synthesis
+    numbers against config["SYNTH_LIMITS"]; a design breaking them stops there.
+    Returns the SynthesisMetrics of all reports written so far, with stage,
+    outcome ('complete', 'stopped', 'rejected', 'failed'), rejection and
+    stage_seconds filled in.
+    """
+    stop_after = config.get("STOP_AFTER", STAGES[-1])
+    limits = {
+        "hls": config.get("HLS_LIMITS", DEFAULT_HLS_LIMITS),
+        "synth": config.get("SYNTH_LIMITS", DEFAULT_SYNTH_LIMITS),
+    }
+    stage_seconds = {}
+    completed = None
+    outcome = "complete"
+    reasons = []
+    metrics = None
+
+    for stage in STAGES[:STAGES.index(stop_after) + 1]:
+        start_time = time.time()
+        success = _run_synthesis_script(config, env=env, log_file=log_file, stage=stage)
+        stage_seconds[stage] = time.time() - start_time
+        if not success:
+            outcome = "failed"
+            break
+        completed = stage
+
+        metrics = parse_build_dir(config["BUILD_DIR"])
+        reasons = check_limits(metrics, limits.get(stage, {}))
+        if reasons:
+            print(f"REJECTED after {stage}: {'; '.join(reasons)}")
+            outcome = "rejected"
+            break
+    else:
+        if stop_after != STAGES[-1]:
+            outcome = "stopped"
+
+    metrics = parse_build_dir(config["BUILD_DIR"]) if metrics is None else metrics
+    metrics.update(stage=completed, outcome=outcome, rejection="; ".join(reasons) or None,
+                   stage_seconds=stage_seconds)
+    try:
+        metrics.save(os.path.join(config["BUILD_DIR"], METRICS_FILE))
+    except OSError as e:
+        print(f"WARN: Could not write {METRICS_FILE}: {e}")
+    return metrics
+
+class StageReport:
+    """
+    Per stage statistics of staged runs: how often each stage ran, how
+    long it took and which designs it rejected. The time saved by a rejection
+    is estimated from the mean time of the stages it skipped.
+    """
+    def __init__(self):
+        self.runs = {stage: 0 for stage in STAGES}
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self.rejected = {stage: 0 for stage in STAGES}
+        self.failed = {stage: 0 for stage in STAGES}
+
+    def add(self, metrics):
+        """Records the SynthesisMetrics of one run_staged_flow result (others are ignored)."""
+        if metrics is None or not metrics.stage_seconds:
+            return
+        for stage, seconds in metrics.stage_seconds.items():
+            self.runs[stage] += 1
+            self.seconds[stage] += seconds
+        last = list(metrics.stage_seconds)[-1]
+        if metrics.outcome == "rejected":
+            self.rejected[last] += 1
+        elif metrics.outcome == "failed":
+            self.failed[last] += 1
+
+    def mean_seconds(self, stage):
+        return self.seconds[stage] / self.runs[stage] if self.runs[stage] else None
+
+    def time_saved(self, stage):
+        """Estimated seconds saved by rejecting after stage, None while a skipped stage has no timing yet."""
+        skipped = [self.mean_seconds(later) for later in STAGES[STAGES.index(stage) + 1:]]
+        if self.rejected[stage] == 0:
+            return 0.0
+        if any(seconds is None for seconds in skipped):
+            return None
+        return self.rejected[stage] * sum(skipped)
+
+    def print_report(self):
+        print("--- STAGED FLOW ---")
+        total_saved = 0.0
+        for stage in STAGES:
+            mean = self.mean_seconds(stage)
+            saved = self.time_saved(stage)
+            total_saved += saved or 0.0
+            print(f"{stage:6s} runs {self.runs[stage]:4d}, "
+                  f"mean {'n/a' if mean is None else f'{mean:.1f}s':>8s}, "
+                  f"rejected {self.rejected[stage]:4d}, failed {self.failed[stage]:4d}, "
+                  f"time saved {'n/a' if saved is None else f'{saved:.1f}s'}")
+        spent = sum(self.seconds.values())
+        if spent > 0:
+            print(f"total: {spent:.1f}s spent, ~{total_saved:.1f}s saved by early rejection "
+                  f"({total_saved / (spent + total_saved):.0%} of the unstaged flow time)")
+
+def _read_synthesis_metrics(build_dir):
+    """Parses all reports of a finished run and stores them as metrics.json next to them."""
+    metrics = parse_build_dir(build_dir)
+    try:
+        metrics.save(os.path.join(build_dir, METRICS_FILE))
+    except OSError as e:
+        print(f"WARN: Could not write {METRICS_FILE}: {e}")
+    return metrics
+
+def _synthesize(config, env=None, log_file=None):
+    """
+    Runs the staged flow if config has a STAGE_SCRIPT, else VIVADO_SCRIPT in
+    one go. Returns the parsed SynthesisMetrics, None if the one-shot script failed.
+    """
+    if config.get("STAGE_SCRIPT"):
+        return run_staged_flow(config, env=env, log_file=log_file)
+    if not _run_synthesis_script(config, env=env, log_file=log_file):
+        return None
+    return _read_synthesis_metrics(config["BUILD_DIR"])
+
+def _codegen_options(config):
+    return {"fuse_relu": config.get("FUSE_RELU", False), "dataflow": config.get("DATAFLOW", False)}
+
+def _generate_design(arch, output_file, config):
+    """generate_cpp_from_architecture with the code generation options of config (FUSE_RELU, DATAFLOW)."""
+    return generate_cpp_from_architecture(arch, output_file, **_codegen_options(config))
+
+def _csim_enabled(config):
+    if not config.get("CSIM_CHECK", False):
+        return False
+    if shutil.which(CXX) is None:
+        print(f"WARN: {CXX} not found, skipping the C simulation check.")
+        return False
+    return True
+
+def _csim_rejection(report):
+    """SynthesisMetrics of a design the C simulation rejected (stored with status 'rejected')."""
+    reason = report.message.strip().splitlines()[0] if report.message.strip() else report.status
+    print(f"REJECTED by C simulation ({report.status}): {reason}")
+    return SynthesisMetrics(outcome="rejected", rejection=f"csim {report.status}: {reason}")
+
+def _synthesis_cache_key(arch, generated_cpp_file, config):
+    """Cache key over the architecture and every input file of the synthesis flow."""
+    # build.tcl only sources the stage scripts, they are inputs too
+    tcl_files = [config[key] for key in ("SYNTH_TCL_FILE", "IMPL_TCL_FILE") if key in config]
+    return compute_cache_key(arch, [
+        generated_cpp_file,
+        config["OPS_HEADER_FILE"],
+        config["HLS_CONFIG_FILE"],
+        config["BUILD_TCL_FILE"],
+    ] + tcl_files)
+
+def _flow_signature(config):
+    """
+    The settings a rejected / stopped outcome of the staged flow depends on
+    (stop stage and limits), stored with such cache entries. None for the
+    one-shot flow, which never ends early.
+    """
+    if not config.get("STAGE_SCRIPT"):
+        return None
+    return json.dumps({
+        "stop_after": config.get("STOP_AFTER", STAGES[-1]),
+        "hls_limits": config.get("HLS_LIMITS", DEFAULT_HLS_LIMITS),
+        "synth_limits": config.get("SYNTH_LIMITS", DEFAULT_SYNTH_LIMITS),
+    }, sort_keys=True)
+
+def _cacheable(metrics):
+    """Results worth caching: complete runs with WNS and power, or an early reject / stop of the staged flow."""
+    if metrics is None:
+        return False
+    if metrics.outcome in PARTIAL_OUTCOMES:
+        return True
+    return metrics.wns is not None and metrics.power is not None
+
+def collect_single_datapoint(iteration, total_iterations, config, cache=None):
     """
     Runs one data collection cycle.
-    Returns (features, wns, power) on success, or (None, None, None) on failure.
+    With a SynthesisCache, previously synthesized designs are served from the
+    cache (report files restored into BUILD_DIR) instead of running the tools,
+    early rejects / stops of the staged flow too (same flow settings only).
+    Returns (arch, features, wns, power, elapsed_s, metrics), wns and power are
+    None on failure, metrics is the SynthesisMetrics of all parsed reports (or None).
+    wns and power are None for designs the staged flow rejected or stopped early
+    too, metrics then holds the partial results (see run_staged_flow).
     """
     print(f"\n--- run {iteration}/{total_iterations} ---")
+    start_time = time.time()
 
     # 1. define random architecture and featurize it
     arch = get_random_architecture()
@@ -47,19 +298,42 @@ def collect_single_datapoint(iteration, total_iterations, config):
     print(f"Features: {features}")
     print("Generating C++ code from architecture...")
     try:
-        generate_cpp_from_architecture(arch, config["GENERATED_CPP_FILE"])
+        _generate_design(arch, config["GENERATED_CPP_FILE"], config)
     except Exception as e:
         print(f"ERROR: C++ generation failed: {e}")
-        return None, None, None
+        return arch, features, None, None, time.time() - start_time, None
+
+    # skip the tools for designs we already synthesized
+    cache_key = None
+    if cache is not None:
+        cache_key = _synthesis_cache_key(arch, config["GENERATED_CPP_FILE"], config)
+        if os.path.exists(config["BUILD_DIR"]):
+            shutil.rmtree(config["BUILD_DIR"])
+        cached = cache.lookup(cache_key, restore_dir=config["BUILD_DIR"], flow=_flow_signature(config))
+        if cached is not None:
+            wns, power, outcome = cached
+            print(f"CACHE HIT: reusing synthesis results ({cache_key[:12]}, {outcome})")
+            return arch, features, wns, power, time.time() - start_time, read_metrics(config["BUILD_DIR"])
 
-    # 3. hardware run (HLS + Vivado synthesis)
-    success = _run_synthesis_script(config)
-    if not success:
-        return None, None, None # Synthesis failed
+    # broken designs never reach the tools
+    if _csim_enabled(config):
+        report = validate_design(arch, config.get("CSIM_DIR", DEFAULT_CSIM_DIR), **_codegen_options(config))
+        if not report.ok:
+            return arch, features, None, None, time.time() - start_time, _csim_rejection(report)
+        print(f"C simulation OK: max abs error {report.max_abs_error:.1e}, {report.csim_seconds * 1e3:.2f} ms per run")
 
-    # 4. read results file and extract WNS and Power
-    print("reading synthesis results.")
-    wns, power = read_vivado_results(config["RESULTS_FILE"])
+    # 3. hardware run (HLS + Vivado synthesis, staged if configured)
+    # 4. read results and reports (WNS, power, latency, II, resources)
+    metrics = _synthesize(config)
+    if metrics is None:
+        return arch, features, None, None, time.time() - start_time, None # Synthesis failed
+    wns, power = metrics.wns, metrics.power
+    if cache is not None and _cacheable(metrics):
+        cache.store(cache_key, config["BUILD_DIR"], wns, power, metrics.outcome or "complete", _flow_signature(config))
+
+    if metrics.outcome in PARTIAL_OUTCOMES:
+        print(f"no WNS/Power: design {metrics.outcome} after stage {metrics.stage}, keeping the partial results.")
+        return arch, features, None, None, time.time() - start_time, metrics
 
     # error handling for missing/invalid results
     if wns is None or power is None:
@@ -68,8 +342,147 @@ def collect_single_datapoint(iteration, total_iterations, config):
             print(" - WNS read failed or was N/A.")
         if power is None:
             print(" - Power read failed or was N/A.")
-        return None, None, None
-    
+        return arch, features, None, None, time.time() - start_time, metrics
+
     # return valid data point
-    return features, wns, power
+    return arch, features, wns, power, time.time() - start_time, metrics
+
+
+def _write_job_hls_config(template_path, output_path, source_files, include_dirs=()):
+    """
+    Copies the HLS config template, pointing syn.file at the given sources
+    and the include path (syn.cflags) at include_dirs.
+    """
+    with open(template_path, 'r') as f:
+        lines = f.readlines()
+
+    written_sources = False
+    with open(output_path, 'w') as f:
+        for line in lines:
+            if line.strip().startswith('syn.file='):
+                # replace the template's (relative) source list once
+                if not written_sources:
+                    for src in source_files:
+                        f.write(f"syn.file={src}\n")
+                    written_sources = True
+                continue
+            if line.strip().startswith('syn.cflags=') and include_dirs:
+                # relative include paths of the template do not resolve from the job dir
+                line = "syn.cflags=" + " ".join(f"-I{path}" for path in include_dirs) + "\n"
+            f.write(line)
+
+def _prepare_job(job_id, config):
+    """
+    Creates an isolated job directory with its own generated source,
+    HLS config and build dir. Returns a copy of config pointing at it.
+    """
+    job_dir = os.path.abspath(os.path.join(config["JOBS_DIR"], f"job_{job_id:05d}"))
+    if os.path.exists(job_dir):
+        shutil.rmtree(job_dir)
+    os.makedirs(os.path.join(job_dir, "src"))
+    build_dir = os.path.join(job_dir, "build")
+
+    job_config = dict(config)
+    job_config.update({
+        "JOB_DIR": job_dir,
+        "GENERATED_CPP_FILE": os.path.join(job_dir, "src", "generated_design.cpp"),
+        "HLS_CONFIG_FILE": os.path.join(job_dir, "hls_config.cfg"),
+        "BUILD_DIR": build_dir,
+        "RESULTS_FILE": os.path.join(build_dir, "results.txt"),
+        "VIVADO_LOG": os.path.join(build_dir, "vivado.log"),
+        "VIVADO_JOU": os.path.join(build_dir, "vivado.jou"),
+        "HLS_OUTPUT_DIR": os.path.join(build_dir, "top_function"),
+        "SYNTHESIS_LOG": os.path.join(job_dir, "synthesis.log"),
+    })
+    _write_job_hls_config(
+        config["HLS_CONFIG_FILE"],
+        job_config["HLS_CONFIG_FILE"],
+        [job_config["GENERATED_CPP_FILE"]],
+        [os.path.dirname(os.path.abspath(config["OPS_HEADER_FILE"]))]
+    )
+    return job_config
+
+def _run_job(job_id, arch, config, cache=None):
+    """
+    Runs one synthesis job in its own job directory.
+    Returns (wns, power, elapsed_s, metrics), wns and power are None on failure.
+    """
+    start_time = time.time()
+    job_config = _prepare_job(job_id, config)
+
+    try:
+        _generate_design(arch, job_config["GENERATED_CPP_FILE"], job_config)
+    except Exception as e:
+        print(f"ERROR: C++ generation failed for job {job_id}: {e}")
+        return None, None, time.time() - start_time, None
+
+    # key on the shared config, the per job HLS config only differs in paths
+    cache_key = None
+    if cache is not None:
+        cache_key = _synthesis_cache_key(arch, job_config["GENERATED_CPP_FILE"], config)
+        cached = cache.lookup(cache_key, restore_dir=job_config["BUILD_DIR"], flow=_flow_signature(config))
+        if cached is not None:
+            wns, power, outcome = cached
+            print(f"CACHE HIT: job {job_id} reuses synthesis results ({cache_key[:12]}, {outcome})")
+            return wns, power, time.time() - start_time, read_metrics(job_config["BUILD_DIR"])
+
+    # the synthesis script picks up the per job paths from its environment
+    env = dict(os.environ,
+               BUILD_DIR=job_config["BUILD_DIR"],
+               GENERATED_CPP_FILE=job_config["GENERATED_CPP_FILE"],
+               HLS_CONFIG_FILE=job_config["HLS_CONFIG_FILE"])
+    metrics = _synthesize(job_config, env=env, log_file=job_config["SYNTHESIS_LOG"])
+    if metrics is None:
+        return None, None, time.time() - start_time, None
+    wns, power = metrics.wns, metrics.power
+    if cache is not None and _cacheable(metrics):
+        cache.store(cache_key, job_config["BUILD_DIR"], wns, power, metrics.outcome or "complete", _flow_signature(config))
+    return wns, power, time.time() - start_time, metrics
+
+def collect_datapoints_parallel(architectures, num_workers, config, cache=None):
+    """
+    Synthesizes the given architectures with up to num_workers HLS + Vivado
+    jobs running at once, each in its own directory below config["JOBS_DIR"].
+    An optional SynthesisCache is shared by all jobs.
+    With config["CSIM_CHECK"] all designs are first compiled and simulated
+    (config["CSIM_WORKERS"] at once, default CPU count), the rejected ones
+    are yielded right away and never queued for synthesis.
+    Yields (index, arch, features, wns, power, elapsed_s, metrics) in
+    completion order, index is the position of arch in architectures (sort
+    on it where the order matters). wns and power are None for failed jobs.
+    """
+    queued = list(range(len(architectures)))
+    if _csim_enabled(config):
+        start_time = time.time()
+        reports = validate_designs(architectures, config.get("CSIM_DIR", DEFAULT_CSIM_DIR),
+                                   config.get("CSIM_WORKERS"), **_codegen_options(config))
+        rejected = [index for index, report in enumerate(reports) if not report.ok]
+        print(f"C simulation: {len(rejected)} of {len(reports)} designs rejected in {time.time() - start_time:.1f}s")
+        for index in rejected:
+            report = reports[index]
+            yield index, report.arch, featurize(report.arch), None, None, report.compile_seconds or 0.0, _csim_rejection(report)
+        queued = [index for index, report in enumerate(reports) if report.ok]
+
+    total = len(queued)
+    print(f"starting {total} synthesis jobs on {num_workers} worker slots")
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        futures = {
+            pool.submit(_run_job, job_id, architectures[index], config, cache): index
+            for job_id, index in enumerate(queued)
+        }
+        for finished, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            arch = architectures[index]
+            try:
+                wns, power, elapsed, metrics = future.result()
+            except Exception as e:
+                print(f"ERROR: Synthesis job crashed: {e}")
+                wns, power, elapsed, metrics = None, None, 0.0, None
 
+            print(f"\n--- job {finished}/{total} finished in {elapsed:.1f}s ---")
+            if metrics is not None and metrics.outcome in ("rejected", "stopped"):
+                print(f"design {metrics.outcome} after stage {metrics.stage}, no WNS/Power.")
+            elif wns is None or power is None:
+                print("ERROR: Failed to read valid WNS or Power for this job.")
+            yield index, arch, featurize(arch), wns, power, elapsed, metrics
@@ -0,0 +1,199 @@
+import json
+import sqlite3
+import time
+import numpy as np
+
+from hw_nas.search_space import Architecture
+from hw_nas.synthesis_cache import architecture_key_string
+
+# rows fetched per round trip for bulk reads
+FETCH_BATCH_SIZE = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datapoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    architecture TEXT NOT NULL,
+    num_features INTEGER,
+    features BLOB,
+    wns REAL,
+    power REAL,
+    synthesis_seconds REAL,
+    status TEXT NOT NULL,
+    metrics TEXT
+)
+"""
+
+def architecture_from_json(arch_json):
+    """Inverse of architecture_key_string."""
+    return Architecture.from_list(json.loads(arch_json))
+
+class DatapointStore:
+    """
+    Append-only SQLite store of collected synthesis datapoints.
+    Every datapoint (also failed ones) is committed as soon as it is added,
+    so an interrupted collection run loses at most the job in flight.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(_SCHEMA)
+        # stores created before the metrics column existed
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(datapoints)")]
+        if "metrics" not in columns:
+            self.conn.execute("ALTER TABLE datapoints ADD COLUMN metrics TEXT")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def append(self, arch, features, wns, power, synthesis_seconds=None, metrics=None):
+        """
+        Adds one datapoint, wns or power None marks a failed run.
+        metrics (SynthesisMetrics or dict) keeps everything parsed from the reports.
+        Runs of the staged flow without wns/power get the status 'rejected'
+        (broke the stage limits) or 'stopped' (STOP_AFTER reached), their
+        partial metrics are kept all the same.
+        """
+        if metrics is not None and not isinstance(metrics, dict):
+            metrics = metrics.to_dict()
+        status = "ok" if wns is not None and power is not None else "failed"
+        if status == "failed" and metrics is not None and metrics.get("outcome") in ("rejected", "stopped"):
+            status = metrics["outcome"]
+        features_blob = None
+        num_features = None
+        if features is not None:
+            features = np.asarray(features, dtype=np.float64)
+            features_blob = features.tobytes()
+            num_features = features.shape[0]
+        metrics_json = json.dumps(metrics) if metrics is not None else None
+
+        with self.conn: # commits (or rolls back) right away
+            self.conn.execute(
+                "INSERT INTO datapoints (created_at, architecture, num_features, features, "
+                "wns, power, synthesis_seconds, status, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), architecture_key_string(arch), num_features, features_blob,
+                 wns, power, synthesis_seconds, status, metrics_json)
+            )
+
+    def count(self, status=None):
+        """Number of stored datapoints, optionally only those with the given status."""
+        if status is None:
+            return self.conn.execute("SELECT COUNT(*) FROM datapoints").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM datapoints WHERE status = ?", (status,)).fetchone()[0]
+
+    def _architectures_where(self, where, columns, params=()):
+        """Architectures plus the given columns of the matching rows, in insertion order."""
+        archs = []
+        values = []
+        cursor = self.conn.execute(f"SELECT architecture, {columns} FROM datapoints {where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for arch_json, *row in rows:
+                archs.append(architecture_from_json(arch_json))
+                values.append(row)
+        return archs, values
+
+    def load_training_data(self, num_features=None, pipeline=None):
+        """
+        Bulk reads all valid datapoints into preallocated arrays.
+        Only rows with num_features features are used (default: the feature
+        count of the most recent valid row).
+        With a FeaturePipeline (hw_nas.features), X is recomputed from the
+        stored architectures instead (memoized), all valid rows are used.
+        Returns (X, y_timing, y_power) as NumPy arrays.
+        """
+        if pipeline is not None:
+            archs, values = self._architectures_where("WHERE status = 'ok'", "wns, power")
+            targets = np.array(values, dtype=np.float64).reshape(-1, 2)
+            return pipeline.transform(archs), targets[:, 0], targets[:, 1]
+
+        if num_features is None:
+            row = self.conn.execute(
+                "SELECT num_features FROM datapoints WHERE status = 'ok' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return np.empty((0, 0)), np.empty(0), np.empty(0)
+            num_features = row[0]
+
+        where = "WHERE status = 'ok' AND num_features = ?"
+        n = self.conn.execute(f"SELECT COUNT(*) FROM datapoints {where}", (num_features,)).fetchone()[0]
+
+        X = np.empty((n, num_features), dtype=np.float64)
+        y_timing = np.empty(n, dtype=np.float64)
+        y_power = np.empty(n, dtype=np.float64)
+
+        cursor = self.conn.execute(f"SELECT features, wns, power FROM datapoints {where} ORDER BY id", (num_features,))
+        i = 0
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for features_blob, wns, power in rows:
+                X[i] = np.frombuffer(features_blob, dtype=np.float64)
+                y_timing[i] = wns
+                y_power[i] = power
+                i += 1
+
+        return X[:i], y_timing[:i], y_power[:i]
+
+    def load_metric_targets(self, target_names, num_features=None, pipeline=None):
+        """
+        Rows with all of target_names present in their stored metrics.
+        With a FeaturePipeline, X is recomputed from the architectures.
+        Returns (X, Y) with Y of shape (n, len(target_names)).
+        """
+        if pipeline is not None:
+            archs, values = self._architectures_where("WHERE status = 'ok' AND metrics IS NOT NULL", "metrics")
+            kept = []
+            Y = []
+            for arch, (metrics_json,) in zip(archs, values):
+                metrics = json.loads(metrics_json)
+                targets = [metrics.get(name) for name in target_names]
+                if all(value is not None for value in targets):
+                    kept.append(arch)
+                    Y.append(targets)
+            return pipeline.transform(kept), np.array(Y, dtype=np.float64).reshape(-1, len(target_names))
+
+        if num_features is None:
+            row = self.conn.execute(
+                "SELECT num_features FROM datapoints WHERE status = 'ok' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return np.empty((0, 0)), np.empty((0, len(target_names)))
+            num_features = row[0]
+
+        X = []
+        Y = []
+        cursor = self.conn.execute(
+            "SELECT features, metrics FROM datapoints WHERE status = 'ok' AND num_features = ? "
+            "AND metrics IS NOT NULL ORDER BY id", (num_features,)
+        )
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for features_blob, metrics_json in rows:
+                metrics = json.loads(metrics_json)
+                targets = [metrics.get(name) for name in target_names]
+                if any(value is None for value in targets):
+                    continue
+                X.append(np.frombuffer(features_blob, dtype=np.float64))
+                Y.append(targets)
+
+        if not X:
+            return np.empty((0, num_features)), np.empty((0, len(target_names)))
+        return np.vstack(X), np.array(Y, dtype=np.float64)
+
+    def iter_architectures(self, status="ok"):
+        """Yields the stored architectures, e.g. to recompute features."""
+        cursor = self.conn.execute("SELECT architecture FROM datapoints WHERE status = ? ORDER BY id", (status,))
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for (arch_json,) in rows:
+                yield architecture_from_json(arch_json)
@@ -0,0 +1,368 @@
+import math
+import os
+import random
+import time
+from collections import deque
+import joblib
+import numpy as np
+
+from hw_nas.search_space import (
+    Architecture, NetworkBlock, get_random_architecture,
+    KERNEL_SIZES, CHANNEL_MULTIPLIERS, MAX_CHANNELS, STRIDES,
+    MIN_DOWNSAMPLE_SIZE, LINEAR_FEATURES, OUTPUT_FEATURES,
+    PIPELINE_IIS, UNROLL_FACTORS, BIT_WIDTHS, DEFAULT_PIPELINE_II, DEFAULT_UNROLL, DEFAULT_BITS,
+)
+from hw_nas.cost_model import analyze_batch, within_limits
+from hw_nas.features import model_feature_schema, pipeline_for_schema
+
+# penalty (fitness units per ns) for negative slack in the default fitness
+TIMING_PENALTY = 1.0
+# max remembered predictions, the memo is dropped once it grows beyond this
+MAX_SCORE_CACHE_SIZE = 1000000
+
+def default_fitness(wns, power):
+    """
+    Hardware only fitness (higher is better): lower power, with designs
+    that miss timing (WNS < 0) pushed down by TIMING_PENALTY per ns.
+    """
+    return -power + TIMING_PENALTY * np.minimum(wns, 0.0)
+
+# --- genotype: the free choices behind an architecture ---
+# stem genes: ('conv', kernel_size, channel_multiplier, stride, pipeline_ii, unroll, bits), ('relu',), ('max_pool',)
+# head genes: (out_features, pipeline_ii, unroll, bits) of every linear layer, the last
+# layer's out_features is fixed (OUTPUT_FEATURES), only its knobs are free
+
+def _knob_genes(params):
+    return (params.get('pipeline_ii', DEFAULT_PIPELINE_II), params.get('unroll', DEFAULT_UNROLL),
+            params.get('bits', DEFAULT_BITS))
+
+def architecture_to_genes(arch):
+    """Extracts the (stem, head) genes of a search space architecture."""
+    stem = []
+    head = []
+    in_stem = True
+    for block in arch.blocks:
+        op_type = block.op_type
+        params = block.params
+        if op_type == 'global_avg_pool':
+            in_stem = False
+        elif in_stem and op_type == 'conv':
+            in_channels = params['in_channels']
+            out_channels = params['out_channels']
+            # first multiplier that reproduces out_channels (incl. the cap), else the closest one
+            multiplier = min(
+                CHANNEL_MULTIPLIERS,
+                key=lambda m: (min(in_channels * m, MAX_CHANNELS) != out_channels, abs(m - out_channels / in_channels))
+            )
+            stem.append(('conv', params['kernel_size'], multiplier, params['stride']) + _knob_genes(params))
+        elif in_stem:
+            stem.append((op_type,))
+        elif op_type == 'linear':
+            head.append((params['out_features'],) + _knob_genes(params))
+    return stem, head
+
+def genes_to_architecture(stem, head, input_channels=3, input_size=32):
+    """
+    Builds an Architecture from genes, applying the same shape rules as
+    get_random_architecture (channel cap, no downsampling of small feature
+    maps, no leading or back-to-back ReLUs, fixed bridge and classifier).
+    """
+    blocks = []
+    current_channels = input_channels
+    current_size = input_size
+
+    for gene in stem:
+        op = gene[0]
+        if op == 'conv':
+            _, kernel_size, multiplier, stride, pipeline_ii, unroll, bits = gene
+            out_channels = min(current_channels * multiplier, MAX_CHANNELS)
+            if current_size <= MIN_DOWNSAMPLE_SIZE and stride == 2:
+                stride = 1
+            if stride == 1:
+                padding = 'same'
+                current_size = math.ceil(current_size / stride)
+            else:
+                padding = kernel_size // 2
+                current_size = math.floor((current_size - kernel_size + 2 * padding) / stride) + 1
+            blocks.append(NetworkBlock('conv', {
+                'in_channels': current_channels,
+                'out_channels': out_channels,
+                'kernel_size': kernel_size,
+                'padding': padding,
+                'stride': stride,
+                'pipeline_ii': pipeline_ii,
+                'unroll': unroll,
+                'bits': bits
+            }))
+            current_channels = out_channels
+        elif op == 'relu':
+            if not blocks or blocks[-1].op_type == 'relu':
+                continue
+            blocks.append(NetworkBlock('relu', {}))
+        elif op == 'max_pool':
+            if current_size <= MIN_DOWNSAMPLE_SIZE:
+                continue
+            blocks.append(NetworkBlock('max_pool', {'kernel_size': 2, 'stride': 2}))
+            current_size = math.floor((current_size - 2) / 2) + 1
+
+    # fixed bridge to 1D
+    blocks.append(NetworkBlock('global_avg_pool', {}))
+    blocks.append(NetworkBlock('flatten', {'in_features': current_channels}))
+
+    # classifier, ReLU between linear layers
+    current_features = current_channels
+    head = list(head) or [(OUTPUT_FEATURES, DEFAULT_PIPELINE_II, DEFAULT_UNROLL, DEFAULT_BITS)]
+    for i, (out_features, pipeline_ii, unroll, bits) in enumerate(head):
+        if i > 0:
+            blocks.append(NetworkBlock('relu', {}))
+        if i == len(head) - 1:
+            out_features = OUTPUT_FEATURES
+        blocks.append(NetworkBlock('linear', {
+            'in_features': current_features,
+            'out_features': out_features,
+            'pipeline_ii': pipeline_ii,
+            'unroll': unroll,
+            'bits': bits
+        }))
+        current_features = out_features
+
+    return Architecture(blocks)
+
+def _random_stem_gene(rng):
+    op = rng.choice(['conv', 'conv', 'relu', 'max_pool']) # same conv bias as get_random_architecture
+    if op == 'conv':
+        return ('conv', rng.choice(KERNEL_SIZES), rng.choice(CHANNEL_MULTIPLIERS), rng.choice(STRIDES),
+                rng.choice(PIPELINE_IIS), rng.choice(UNROLL_FACTORS), rng.choice(BIT_WIDTHS))
+    return (op,)
+
+def mutate_architecture(arch, rng, max_depth=8, input_channels=3, input_size=32, max_tries=10):
+    """
+    Returns a child that differs from arch by one random edit of its genes
+    (kernel, channels, stride, insert/remove/replace a stem op, classifier
+    width, pipeline II, unroll factor or bit width of a conv / linear layer). Shape invariants are restored by
+    genes_to_architecture.
+    """
+    stem, head = architecture_to_genes(arch)
+    max_stem = max_depth - 3
+
+    for _ in range(max_tries):
+        new_stem = list(stem)
+        new_head = list(head)
+        conv_positions = [i for i, gene in enumerate(new_stem) if gene[0] == 'conv']
+        mutation = rng.choice(['kernel', 'channels', 'stride', 'insert', 'remove', 'replace', 'head',
+                               'pipeline_ii', 'unroll', 'bits'])
+
+        if mutation in ('kernel', 'channels', 'stride') and conv_positions:
+            i = rng.choice(conv_positions)
+            _, kernel_size, multiplier, stride, *knobs = new_stem[i]
+            if mutation == 'kernel':
+                kernel_size = rng.choice([k for k in KERNEL_SIZES if k != kernel_size])
+            elif mutation == 'channels':
+                multiplier = rng.choice([m for m in CHANNEL_MULTIPLIERS if m != multiplier])
+            else:
+                stride = rng.choice([s for s in STRIDES if s != stride])
+            new_stem[i] = ('conv', kernel_size, multiplier, stride, *knobs)
+        elif mutation in ('pipeline_ii', 'unroll', 'bits'):
+            # knobs are the last three entries of conv and head genes
+            genes = [(new_stem, i) for i in conv_positions] + [(new_head, i) for i in range(len(new_head))]
+            target, i = rng.choice(genes)
+            *rest, pipeline_ii, unroll, bits = target[i]
+            if mutation == 'pipeline_ii':
+                pipeline_ii = rng.choice([ii for ii in PIPELINE_IIS if ii != pipeline_ii])
+            elif mutation == 'unroll':
+                unroll = rng.choice([u for u in UNROLL_FACTORS if u != unroll])
+            else:
+                bits = rng.choice([b for b in BIT_WIDTHS if b != bits])
+            target[i] = tuple(rest) + (pipeline_ii, unroll, bits)
+        elif mutation == 'insert' and len(new_stem) < max_stem:
+            new_stem.insert(rng.randint(0, len(new_stem)), _random_stem_gene(rng))
+        elif mutation == 'remove' and len(new_stem) > 1:
+            del new_stem[rng.randrange(len(new_stem))]
+        elif mutation == 'replace' and new_stem:
+            new_stem[rng.randrange(len(new_stem))] = _random_stem_gene(rng)
+        elif mutation == 'head' and new_head:
+            # toggle the hidden layer or change its width, the classifier stays
+            hidden, classifier = new_head[:-1], new_head[-1]
+            if not hidden or rng.random() < 0.5:
+                hidden = [] if hidden else [(rng.choice(LINEAR_FEATURES), rng.choice(PIPELINE_IIS),
+                                             rng.choice(UNROLL_FACTORS), rng.choice(BIT_WIDTHS))]
+            else:
+                out_features, *knobs = hidden[0]
+                hidden = [(rng.choice([f for f in LINEAR_FEATURES if f != out_features]), *knobs)]
+            new_head = hidden + [classifier]
+        else:
+            continue
+
+        child = genes_to_architecture(new_stem, new_head, input_channels, input_size)
+        if child != arch:
+            return child
+
+    # no effective edit found, fall back to a fresh sample
+    return get_random_architecture(max_depth, input_channels, input_size, rng=rng)
+
+class RegularizedEvolution:
+    """
+    Regularized (aging) evolution over the search space, scored with the
+    timing and power predictors. Every generation mutates generation_size
+    tournament winners, scores all children in one predictor batch and
+    retires the same number of oldest population members.
+    With cost_limits ({cost_model name: max value}, e.g. {'macs': 50e6})
+    candidates over budget are rejected analytically, before the predictors
+    run, with fitness -inf and NaN WNS/power.
+    Candidates are featurized with the feature schema of the predictors.
+    """
+    def __init__(self, timing_predictor, power_predictor, population_size=100, sample_size=25,
+                 generation_size=256, seed=0, fitness_fn=default_fitness,
+                 max_depth=8, input_channels=3, input_size=32, cost_limits=None):
+        self.timing_predictor = timing_predictor
+        self.power_predictor = power_predictor
+        self.population_size = population_size
+        self.sample_size = sample_size
+        self.generation_size = generation_size
+        self.fitness_fn = fitness_fn
+        self.max_depth = max_depth
+        self.input_channels = input_channels
+        self.input_size = input_size
+        self.cost_limits = cost_limits
+        schema = model_feature_schema(timing_predictor)
+        if model_feature_schema(power_predictor) != schema:
+            raise ValueError(f"timing and power predictors use different feature schemas "
+                             f"({schema!r}, {model_feature_schema(power_predictor)!r})")
+        # the score memo below covers repeats, the pipeline needs no row cache
+        self.pipeline = pipeline_for_schema(schema, cache_size=0)
+
+        self.rng = random.Random(seed)
+        self.population = deque() # (arch, fitness, wns, power), oldest first
+        self.generation = 0
+        self.num_evaluated = 0
+        self.best = None # (arch, fitness, wns, power)
+        self._scores = {} # arch -> (wns, power), skips re-predicting duplicates
+        self.num_rejected = 0 # candidates the cost limits kept from the predictors
+
+    def evaluate(self, archs):
+        """Predicts WNS and power for a batch of architectures, returns (wns, power, fitness)."""
+        wns = np.empty(len(archs))
+        power = np.empty(len(archs))
+        unseen = []
+        for i, arch in enumerate(archs):
+            cached = self._scores.get(arch)
+            if cached is None:
+                unseen.append(i)
+            else:
+                wns[i], power[i] = cached
+
+        if unseen and self.cost_limits:
+            totals = analyze_batch([archs[i] for i in unseen], self.input_channels, self.input_size)
+            keep = within_limits(totals, self.cost_limits)
+            for i in np.asarray(unseen)[~keep]:
+                wns[i] = power[i] = np.nan
+                self._scores[archs[i]] = (np.nan, np.nan)
+            self.num_rejected += int((~keep).sum())
+            unseen = [i for i, kept in zip(unseen, keep) if kept]
+
+        if unseen:
+            if len(self._scores) > MAX_SCORE_CACHE_SIZE:
+                self._scores.clear()
+            X = self.pipeline.transform([archs[i] for i in unseen])
+            wns[unseen] = self.timing_predictor.predict(X)
+            power[unseen] = self.power_predictor.predict(X)
+            for i in unseen:
+                self._scores[archs[i]] = (wns[i], power[i])
+
+        self.num_evaluated += len(archs)
+        fitness = self.fitness_fn(wns, power)
+        return wns, power, np.where(np.isnan(wns), -np.inf, fitness)
+
+    def _add(self, archs, wns, power, fitness):
+        for i, arch in enumerate(archs):
+            member = (arch, float(fitness[i]), float(wns[i]), float(power[i]))
+            self.population.append(member)
+            if self.best is None or member[1] > self.best[1]:
+                self.best = member
+        while len(self.population) > self.population_size:
+            self.population.popleft() # aging: the oldest dies, not the worst
+
+    def initialize(self):
+        """Fills the population with random architectures."""
+        archs = [
+            get_random_architecture(self.max_depth, self.input_channels, self.input_size, rng=self.rng)
+            for _ in range(self.population_size)
+        ]
+        self._add(archs, *self.evaluate(archs))
+
+    def _tournament(self):
+        contestants = self.rng.sample(range(len(self.population)), min(self.sample_size, len(self.population)))
+        return max((self.population[i] for i in contestants), key=lambda member: member[1])[0]
+
+    def step(self):
+        """Runs one generation."""
+        children = [
+            mutate_architecture(self._tournament(), self.rng, self.max_depth, self.input_channels, self.input_size)
+            for _ in range(self.generation_size)
+        ]
+        self._add(children, *self.evaluate(children))
+        self.generation += 1
+        return children
+
+    def run(self, num_generations, checkpoint_path=None, checkpoint_every=10):
+        """Runs (or continues) the search, checkpointing every checkpoint_every generations."""
+        if not self.population:
+            self.initialize()
+
+        start_time = time.time()
+        start_evaluated = self.num_evaluated
+        target = self.generation + num_generations
+        while self.generation < target:
+            self.step()
+            if checkpoint_path and self.generation % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_path)
+            if self.generation % 10 == 0:
+                print(f"generation {self.generation}: best fitness {self.best[1]:.4f} "
+                      f"(WNS {self.best[2]:.2f} ns, power {self.best[3]:.4f} W)")
+
+        if checkpoint_path:
+            self.save_checkpoint(checkpoint_path)
+        elapsed = time.time() - start_time
+        evaluated = self.num_evaluated - start_evaluated
+        print(f"evaluated {evaluated} candidates in {elapsed:.2f}s ({evaluated / max(elapsed, 1e-9):,.0f}/s)")
+        if self.cost_limits:
+            print(f"{self.num_rejected} candidates over the cost limits {self.cost_limits} so far")
+        return self.best
+
+    def top(self, k=5):
+        """The k fittest members of the current population."""
+        return sorted(self.population, key=lambda member: member[1], reverse=True)[:k]
+
+    def save_checkpoint(self, path):
+        """Writes the search state (not the predictors) atomically to path."""
+        state = {
+            "population": list(self.population),
+            "generation": self.generation,
+            "num_evaluated": self.num_evaluated,
+            "best": self.best,
+            "rng_state": self.rng.getstate(),
+            "settings": {
+                "population_size": self.population_size,
+                "sample_size": self.sample_size,
+                "generation_size": self.generation_size,
+                "max_depth": self.max_depth,
+                "input_channels": self.input_channels,
+                "input_size": self.input_size,
+                "cost_limits": self.cost_limits,
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_checkpoint(cls, path, timing_predictor, power_predictor, fitness_fn=default_fitness):
+        """Restores a search saved with save_checkpoint."""
+        state = joblib.load(path)
+        search = cls(timing_predictor, power_predictor, fitness_fn=fitness_fn, **state["settings"])
+        search.population = deque(state["population"])
+        search.generation = state["generation"]
+        search.num_evaluated = state["num_evaluated"]
+        search.best = state["best"]
+        search.rng.setstate(state["rng_state"])
+        return search
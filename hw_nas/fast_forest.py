@@ -0,0 +1,286 @@
+import json
+import os
+import numpy as np
+
+from hw_nas.features import check_feature_schema
+
+# rows walked through the trees at once, bounds the (rows, trees) index arrays
+PREDICT_CHUNK_ROWS = 2048
+# batches of at least this many rows go to sklearn's compiled apply() when the
+# sklearn model is available, the numpy walk only wins below that
+SKLEARN_MIN_ROWS = 1024
+# file layout of an exported forest directory
+_ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots')
+_META_FILE = "meta.json"
+# written by the trainer once a timing / power pair is saved, readers reload on it
+PUBLISH_FILE = "predictors_published.json"
+
+def flat_path(model_path):
+    """Directory of the flat export that belongs to a .joblib model file."""
+    root, _ = os.path.splitext(model_path)
+    return root + ".flat"
+
+def _round_down_float32(values):
+    """
+    float32 thresholds t32 <= t with (x <= t) == (x <= t32) for every float32 x,
+    so the walk can compare in float32 and still split exactly like sklearn.
+    """
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+class FlatForest:
+    """
+    A tree ensemble stored as contiguous node arrays (all trees concatenated,
+    child indices global). children[2 * node + went_right] is the next node;
+    leaves point to themselves, so walking max_depth steps from the roots
+    ends on every tree's leaf. predict() walks all trees for a whole batch
+    at once and matches RandomForestRegressor.predict.
+    estimator (the sklearn forest) or estimator_path (its .joblib file,
+    loaded on first use) lets batches of SKLEARN_MIN_ROWS or more rows find
+    their leaves with estimator.apply instead.
+    """
+    def __init__(self, feature, threshold, children, value, roots, max_depth, n_features_in, target_names=None,
+                 feature_schema=None, estimator=None, estimator_path=None):
+        self.feature = feature # int32, split feature (0 for leaves)
+        self.threshold = threshold # float32, rounded down (+inf for leaves)
+        self.children = children # int32, (left, right) pairs
+        self.value = value # float64, (n_nodes, n_outputs)
+        self.roots = roots # int32, root node of every tree
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in
+        self.target_names_ = target_names # output names of multi-target predictors
+        self.feature_schema_ = feature_schema # schema id of the training features (hw_nas.features)
+        self._internal = children[0::2] != np.arange(len(feature), dtype=children.dtype)
+        self._estimator = estimator
+        # (path, mtime) of the .joblib model, checked before it is loaded
+        self._estimator_path = None
+        if estimator_path is not None and os.path.exists(estimator_path):
+            self._estimator_path = (estimator_path, os.path.getmtime(estimator_path))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """
+        Converts a fitted RandomForestRegressor (or a single tree regressor).
+        A TransformedTargetRegressor around one is converted too, its (affine,
+        e.g. StandardScaler) inverse transform is applied to the leaf values.
+        """
+        target_names = getattr(forest, 'target_names_', None)
+        feature_schema = getattr(forest, 'feature_schema_', None)
+        transformer = getattr(forest, 'transformer_', None)
+        if transformer is not None:
+            forest = forest.regressor_
+        estimators = getattr(forest, 'estimators_', [forest])
+        trees = [estimator.tree_ for estimator in estimators]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        n_nodes = int(sizes.sum())
+
+        feature = np.empty(n_nodes, dtype=np.int32)
+        threshold = np.empty(n_nodes, dtype=np.float64)
+        children = np.empty((n_nodes, 2), dtype=np.int32)
+        value = np.empty((n_nodes, trees[0].n_outputs), dtype=np.float64)
+
+        for tree, offset, size in zip(trees, offsets, sizes):
+            nodes = np.arange(offset, offset + size)
+            is_leaf = tree.children_left == -1
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+            children[nodes, 0] = np.where(is_leaf, nodes, tree.children_left + offset)
+            children[nodes, 1] = np.where(is_leaf, nodes, tree.children_right + offset)
+            value[nodes] = tree.value[:, :, 0]
+        if transformer is not None:
+            value = transformer.inverse_transform(value)
+
+        return cls(
+            feature, _round_down_float32(threshold), children.ravel(), value,
+            roots=offsets.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in=int(getattr(forest, 'n_features_in_', trees[0].n_features)),
+            target_names=target_names,
+            feature_schema=feature_schema,
+            estimator=forest,
+        )
+
+    def save(self, path):
+        """Writes one .npy file per node array plus meta.json into directory path."""
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAY_NAMES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        # meta last, its mtime marks a complete export
+        tmp_meta = os.path.join(path, _META_FILE + ".tmp")
+        with open(tmp_meta, "w") as f:
+            json.dump({
+                "max_depth": int(self.max_depth),
+                "n_features_in": int(self.n_features_in_),
+                "target_names": self.target_names_,
+                "feature_schema": self.feature_schema_,
+            }, f)
+        os.replace(tmp_meta, os.path.join(path, _META_FILE))
+
+    @classmethod
+    def load(cls, path, mmap=True, estimator_path=None):
+        """Loads an exported forest, memory mapped by default (no copy, pages shared between processes)."""
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in _ARRAY_NAMES
+        }
+        return cls(max_depth=meta["max_depth"], n_features_in=meta["n_features_in"],
+                   target_names=meta.get("target_names"), feature_schema=meta.get("feature_schema"),
+                   estimator_path=estimator_path, **arrays)
+
+    def _sklearn_estimator(self):
+        if self._estimator is None and self._estimator_path is not None:
+            path, mtime = self._estimator_path
+            self._estimator_path = None
+            try:
+                # a .joblib file replaced since the export is another model
+                if os.path.getmtime(path) == mtime:
+                    import joblib # only for large batches
+                    model = joblib.load(path)
+                    model = getattr(model, 'regressor_', model)
+                    if len(getattr(model, 'estimators_', [model])) == len(self.roots):
+                        self._estimator = model
+            except Exception as e:
+                print(f"WARN: {path} not usable for large batches, walking the flat forest: {e}")
+        return self._estimator
+
+    def _leaves(self, X):
+        """(rows, trees) leaf node index of every row in every tree, X float32."""
+        n, num_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+        nodes = np.tile(np.asarray(self.roots, dtype=np.int32), n)
+        row_offsets = np.repeat(np.arange(0, n * num_features, num_features, dtype=np.int32), n_trees)
+
+        # preallocated buffers, np.take(..., out=) avoids the fancy indexing overhead
+        index = np.empty_like(nodes)
+        x_values = np.empty(len(nodes), dtype=np.float32)
+        thresholds = np.empty(len(nodes), dtype=np.float32)
+        went_right = np.empty(len(nodes), dtype=bool)
+        for depth in range(self.max_depth):
+            if depth % 4 == 3 and not np.take(self._internal, nodes).any():
+                break # every row already sits on a leaf
+            np.take(self.feature, nodes, out=index)
+            index += row_offsets
+            np.take(flat_X, index, out=x_values)
+            np.take(self.threshold, nodes, out=thresholds)
+            np.greater(x_values, thresholds, out=went_right)
+            nodes <<= 1
+            nodes += went_right
+            np.take(self.children, nodes, out=nodes)
+        return nodes.reshape(n, n_trees)
+
+    def _batch_leaves(self, X):
+        """(rows, trees) leaf node index of every row, for any number of rows."""
+        estimator = self._sklearn_estimator() if len(X) >= SKLEARN_MIN_ROWS else None
+        if estimator is not None:
+            # per tree node ids, made global like the walk's
+            return np.asarray(estimator.apply(X)).reshape(len(X), -1) + self.roots
+        return np.concatenate([
+            self._leaves(X[start:start + PREDICT_CHUNK_ROWS]) for start in range(0, len(X), PREDICT_CHUNK_ROWS)
+        ]) if len(X) else np.empty((0, len(self.roots)), dtype=np.int32)
+
+    def _check_input(self, X):
+        # sklearn trees compare float32 features, cast the same way so splits agree
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, the forest expects {self.n_features_in_}")
+        return np.ascontiguousarray(X)
+
+    def predict_per_tree(self, X):
+        """(trees, rows[, outputs]) predictions of every single tree, e.g. for uncertainty."""
+        X = self._check_input(X)
+        per_tree = self.value[self._batch_leaves(X).T]
+        return per_tree[:, :, 0] if per_tree.shape[2] == 1 else per_tree
+
+    def predict(self, X):
+        """Mean over the trees, same shape as RandomForestRegressor.predict."""
+        X = self._check_input(X)
+        leaves = self._batch_leaves(X)
+        out = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            # chunked, value[leaves] is (rows, trees, outputs)
+            out[start:start + PREDICT_CHUNK_ROWS] = self.value[leaves[start:start + PREDICT_CHUNK_ROWS]].mean(axis=1)
+        return out[:, 0] if out.shape[1] == 1 else out
+
+def export_forest(forest, path):
+    """Exports a fitted sklearn forest to a flat, memory mappable directory."""
+    flat_forest = FlatForest.from_sklearn(forest)
+    flat_forest.save(path)
+    return flat_forest
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _publish_path(timing_path):
+    return os.path.join(os.path.dirname(os.path.abspath(timing_path)), PUBLISH_FILE)
+
+def publish_predictors(timing_path, power_path):
+    """
+    Records that the current timing and power model files belong together
+    (their signatures, under a new version number), atomically. Call it
+    once both are written: readers following the record never pair a new
+    timing model with an old power model.
+    """
+    previous = published_predictors(timing_path, power_path)
+    record = {
+        "version": previous["version"] + 1 if previous else 1,
+        "timing": [os.path.basename(timing_path), file_signature(timing_path)],
+        "power": [os.path.basename(power_path), file_signature(power_path)],
+    }
+    path = _publish_path(timing_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+    return record
+
+def published_predictors(timing_path, power_path):
+    """The publish record of this timing / power pair, None if they were never published."""
+    try:
+        with open(_publish_path(timing_path)) as f:
+            record = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if record["timing"][0] != os.path.basename(timing_path) or record["power"][0] != os.path.basename(power_path):
+        return None # another pair in the same directory
+    return record
+
+def load_predictor(model_path, mmap=True, feature_schema=None):
+    """
+    Loads a predictor as FlatForest: from its flat export if that is at least
+    as new as the .joblib file, else converts the .joblib model in memory.
+    Batches of SKLEARN_MIN_ROWS or more rows are predicted through the
+    .joblib model either way.
+    With feature_schema, raises ValueError if the model was trained on other
+    features (see hw_nas.features.check_feature_schema).
+    """
+    export_dir = flat_path(model_path)
+    meta_path = os.path.join(export_dir, _META_FILE)
+    if os.path.exists(meta_path) and (
+        not os.path.exists(model_path) or os.path.getmtime(meta_path) >= os.path.getmtime(model_path)
+    ):
+        # the .joblib model is only loaded if a batch is big enough for sklearn to win
+        predictor = FlatForest.load(export_dir, mmap=mmap, estimator_path=model_path)
+    else:
+        import joblib # only needed (with sklearn) when there is no usable export
+        predictor = FlatForest.from_sklearn(joblib.load(model_path))
+
+    if feature_schema is not None:
+        check_feature_schema(predictor, feature_schema, name=model_path)
+    return predictor
@@ -0,0 +1,287 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from hw_nas.predictor import featurize_batch
+from hw_nas.cost_model import cost_features_batch, COST_NAMES
+
+# extractors of the pipeline the current models are trained on
+DEFAULT_EXTRACTORS = ['structure']
+# models saved before feature schemas existed were trained on featurize() output
+LEGACY_SCHEMA_ID = "structure@1"
+FEATURE_CACHE_SIZE = 200000 # rows per extractor kept in memory
+
+class FeatureExtractor:
+    """
+    A named, versioned batch feature function: batch_fn(archs) returns an
+    (N, len(names)) array. Bump the version whenever the output changes,
+    models and cached rows of older versions are then no longer used.
+    """
+    def __init__(self, name, version, names, batch_fn):
+        self.name = name
+        self.version = version
+        self.names = list(names)
+        self.batch_fn = batch_fn
+
+    @property
+    def id(self):
+        return f"{self.name}@{self.version}"
+
+_REGISTRY = {}
+
+def register_extractor(name, version, names, batch_fn):
+    """Registers (or replaces) the extractor called name."""
+    extractor = FeatureExtractor(name, version, names, batch_fn)
+    _REGISTRY[name] = extractor
+    return extractor
+
+def get_extractor(name):
+    if name not in _REGISTRY:
+        raise KeyError(f"unknown feature extractor {name!r}, registered: {sorted(_REGISTRY)}")
+    return _REGISTRY[name]
+
+# version 2 added the HLS parallelism knobs (pipeline_ii, unroll), version 3 the datapath precision
+register_extractor('structure', 3, [
+    'depth', 'convs', 'max_conv_out_channels', 'relus', 'max_pools', 'avg_pools', 'linears',
+    'max_linear_out_features', 'padding_same', 'padding_total', 'stride_1', 'stride_2',
+    'conv_unroll_total', 'max_conv_pipeline_ii', 'linear_unroll_total', 'max_linear_pipeline_ii',
+    'bits_8_layers', 'bits_16_layers',
+], featurize_batch)
+register_extractor('cost', 1, [f"log_{name}" for name in COST_NAMES], cost_features_batch)
+
+def schema_id(extractor_ids):
+    """Schema id of a pipeline, e.g. 'structure@1+cost@1'."""
+    return "+".join(extractor_ids)
+
+DEFAULT_SCHEMA_ID = schema_id(get_extractor(name).id for name in DEFAULT_EXTRACTORS)
+# schema of featurize() output, i.e. the features the data collector stores
+FEATURIZE_SCHEMA_ID = get_extractor('structure').id
+
+# older extractor versions that are still computable, so models trained on them keep working
+_SUPERSEDED = {
+    # structure@1 is structure@2 without the knob columns
+    "structure@1": FeatureExtractor('structure', 1, get_extractor('structure').names[:12],
+                                    lambda archs: featurize_batch(archs)[:, :12]),
+    # structure@2 is structure@3 without the precision columns
+    "structure@2": FeatureExtractor('structure', 2, get_extractor('structure').names[:16],
+                                    lambda archs: featurize_batch(archs)[:, :16]),
+}
+
+class FeatureDiskCache:
+    """
+    SQLite file of computed feature matrices per extractor id. Every put_many
+    appends the keys (architecture bytes) and rows of a batch as one chunk of
+    blobs, the first lookup of an extractor reads all its chunks in one query
+    (merging them into one) and answers from one in-memory matrix after that.
+    Shared by all pipelines, rows of an extractor version are computed once
+    for the whole dataset.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # a cache, losing the last commits on power loss only means recomputing them
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS feature_chunks ("
+            "id INTEGER PRIMARY KEY, extractor TEXT NOT NULL, key_lengths BLOB NOT NULL, "
+            "keys BLOB NOT NULL, features BLOB NOT NULL)"
+        )
+        self.conn.commit()
+        # extractor id -> [{key: row number}, matrix, rows used], matrix grows by doubling
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _load(self, extractor_id):
+        loaded = self._loaded.get(extractor_id)
+        if loaded is not None:
+            return loaded
+        keys, matrices, chunk_ids = [], [], []
+        cursor = self.conn.execute(
+            "SELECT id, key_lengths, keys, features FROM feature_chunks WHERE extractor = ? ORDER BY id",
+            (extractor_id,)
+        )
+        for chunk_id, lengths_blob, keys_blob, features_blob in cursor:
+            chunk_ids.append(chunk_id)
+            ends = np.cumsum(np.frombuffer(lengths_blob, dtype=np.int32)).tolist()
+            keys += [keys_blob[start:end] for start, end in zip([0] + ends, ends)]
+            matrices.append(np.frombuffer(features_blob, dtype=np.float64).reshape(len(ends), -1))
+        index = {key: i for i, key in enumerate(keys)} # later chunks win for repeated keys
+        matrix = np.concatenate(matrices) if matrices else None
+        if len(chunk_ids) > 1:
+            # one blob per extractor again
+            matrix = matrix[list(index.values())]
+            index = {key: i for i, key in enumerate(index)}
+            with self.conn:
+                self.conn.execute(f"DELETE FROM feature_chunks WHERE id IN ({','.join('?' * len(chunk_ids))})",
+                                  chunk_ids)
+                self._insert(extractor_id, list(index), matrix)
+        loaded = self._loaded[extractor_id] = [index, matrix, len(index)]
+        return loaded
+
+    def _insert(self, extractor_id, keys, rows):
+        self.conn.execute(
+            "INSERT INTO feature_chunks (extractor, key_lengths, keys, features) VALUES (?, ?, ?, ?)",
+            (extractor_id, np.array([len(key) for key in keys], dtype=np.int32).tobytes(), b"".join(keys),
+             np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+        )
+
+    def get_many(self, extractor_id, keys):
+        """(positions in keys that are stored, their rows as one array)."""
+        with self._lock:
+            index, matrix, _ = self._load(extractor_id)
+            positions = [i for i, key in enumerate(keys) if key in index]
+            if not positions:
+                return positions, None
+            return positions, matrix[[index[keys[i]] for i in positions]]
+
+    def put_many(self, extractor_id, keys, rows):
+        if not keys:
+            return
+        rows = np.asarray(rows, dtype=np.float64).reshape(len(keys), -1)
+        with self._lock:
+            with self.conn:
+                self._insert(extractor_id, keys, rows)
+            loaded = self._loaded.get(extractor_id)
+            if loaded is None:
+                return
+            index, matrix, used = loaded
+            if matrix is None or used + len(rows) > len(matrix):
+                grown = np.empty((max(2 * used, used + len(rows)), rows.shape[1]), dtype=np.float64)
+                if used:
+                    grown[:used] = matrix[:used]
+                loaded[1] = matrix = grown
+            matrix[used:used + len(rows)] = rows
+            index.update(zip(keys, range(used, used + len(rows))))
+            loaded[2] = used + len(rows)
+
+    def close(self):
+        self.conn.close()
+
+class FeaturePipeline:
+    """
+    Concatenated output of the named extractors with a versioned schema
+    (schema_id). Rows are memoized per extractor version and canonical
+    architecture (its encoded bytes): a bounded in-memory LRU, backed by an
+    optional FeatureDiskCache.
+    """
+    def __init__(self, extractor_names=DEFAULT_EXTRACTORS, cache_size=FEATURE_CACHE_SIZE, disk_cache=None):
+        # registered names, or FeatureExtractor objects (e.g. superseded versions)
+        self.extractors = [get_extractor(name) if isinstance(name, str) else name for name in extractor_names]
+        self.cache_size = cache_size
+        self.disk_cache = FeatureDiskCache(disk_cache) if isinstance(disk_cache, str) else disk_cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memo = {extractor.id: OrderedDict() for extractor in self.extractors}
+        self._lock = threading.Lock()
+
+    @property
+    def schema_id(self):
+        return schema_id([extractor.id for extractor in self.extractors])
+
+    @property
+    def feature_names(self):
+        return [f"{extractor.name}.{name}" for extractor in self.extractors for name in extractor.names]
+
+    @property
+    def num_features(self):
+        return sum(len(extractor.names) for extractor in self.extractors)
+
+    def _extract(self, extractor, archs, keys):
+        memo = self._memo[extractor.id]
+        out = np.empty((len(archs), len(extractor.names)), dtype=np.float64)
+        missing = []
+        hit, hit_rows = [], []
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = memo.get(key)
+                if row is None:
+                    missing.append(i)
+                else:
+                    memo.move_to_end(key)
+                    hit.append(i)
+                    hit_rows.append(row)
+        # rows are copied in one go, not one numpy assignment per row
+        if hit:
+            out[hit] = np.stack(hit_rows)
+        self.hits += len(hit)
+
+        new_rows = {} # key -> row, added to the memo below
+        if missing and self.disk_cache is not None:
+            # the disk cache holds its rows in memory once loaded, they are not memoized twice
+            positions, rows = self.disk_cache.get_many(extractor.id, [keys[i] for i in missing])
+            if positions:
+                out[[missing[j] for j in positions]] = rows
+                self.disk_hits += len(positions)
+                stored = set(positions)
+                missing = [i for j, i in enumerate(missing) if j not in stored]
+
+        if missing:
+            # duplicates within the batch are computed once
+            unique = list({keys[i]: i for i in missing}.values())
+            rows = np.asarray(extractor.batch_fn([archs[i] for i in unique]), dtype=np.float64)
+            computed = {keys[i]: row for i, row in zip(unique, rows)}
+            out[missing] = np.stack([computed[keys[i]] for i in missing])
+            self.misses += len(unique)
+            if self.disk_cache is not None:
+                self.disk_cache.put_many(extractor.id, list(computed), rows)
+            new_rows.update(computed)
+
+        with self._lock:
+            for key, row in new_rows.items():
+                memo[key] = row
+                memo.move_to_end(key)
+            while len(memo) > self.cache_size:
+                memo.popitem(last=False)
+        return out
+
+    def transform(self, archs):
+        """(N, num_features) float64 feature matrix of the architectures."""
+        archs = list(archs)
+        keys = [arch.to_bytes() for arch in archs]
+        if not archs:
+            return np.empty((0, self.num_features), dtype=np.float64)
+        return np.hstack([self._extract(extractor, archs, keys) for extractor in self.extractors])
+
+    def transform_one(self, arch):
+        """Feature vector of one architecture."""
+        return self.transform([arch])[0]
+
+    def stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "memo_rows": sum(len(memo) for memo in self._memo.values())}
+
+def pipeline_for_schema(feature_schema, **kwargs):
+    """
+    FeaturePipeline producing the given schema id. Raises ValueError if an
+    extractor is unknown or registered with a different (not superseded) version.
+    """
+    extractors = []
+    for part in feature_schema.split("+"):
+        name, _, version = part.partition("@")
+        extractor = _REGISTRY.get(name)
+        if extractor is None or str(extractor.version) != version:
+            extractor = _SUPERSEDED.get(part)
+        if extractor is None:
+            raise ValueError(f"feature schema {feature_schema!r} needs extractor {part}, "
+                             f"registered: {[e.id for e in _REGISTRY.values()]}")
+        extractors.append(extractor)
+    return FeaturePipeline(extractors, **kwargs)
+
+def set_feature_schema(model, feature_schema):
+    """Records the schema id of the training features on a model (saved with it)."""
+    model.feature_schema_ = feature_schema
+    return model
+
+def model_feature_schema(model):
+    """Schema id a model was trained on, LEGACY_SCHEMA_ID for models saved before schemas."""
+    return getattr(model, 'feature_schema_', None) or LEGACY_SCHEMA_ID
+
+def check_feature_schema(model, feature_schema, name="model"):
+    """Raises ValueError if model was trained on other features than feature_schema."""
+    trained_on = model_feature_schema(model)
+    if trained_on != feature_schema:
+        raise ValueError(f"{name} was trained on feature schema {trained_on!r}, "
+                         f"the features here are {feature_schema!r}; retrain it or use its schema")
@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import torch
+
+# per channel normalization ((x / 255 - mean) / std), same as the torchvision loaders of architecture_trainer
+NORMALIZE_MEAN = (0.5, 0.5, 0.5)
+NORMALIZE_STD = (0.5, 0.5, 0.5)
+# decoded datasets: <cache_dir>/<split>_images.npy (N, C, H, W uint8) and <split>_labels.npy
+CIFAR10_CACHE_DIR = "data/cifar10_uint8"
+SYNTHETIC_CACHE_DIR = "data/synthetic_uint8"
+SPLITS = ("train", "test")
+# random crop padding of augment (pixels per side)
+CROP_PADDING = 4
+
+def _paths(cache_dir, split):
+    return os.path.join(cache_dir, f"{split}_images.npy"), os.path.join(cache_dir, f"{split}_labels.npy")
+
+def _is_prepared(cache_dir):
+    return all(os.path.exists(path) for split in SPLITS for path in _paths(cache_dir, split))
+
+def _write_split(cache_dir, split, images_nhwc, labels):
+    """Writes one split as a contiguous NCHW uint8 .npy (filled through a memmap) plus its labels."""
+    os.makedirs(cache_dir, exist_ok=True)
+    images_path, labels_path = _paths(cache_dir, split)
+    n, h, w, c = images_nhwc.shape
+    tmp_path = images_path + ".tmp.npy"
+    images = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint8, shape=(n, c, h, w))
+    images[:] = images_nhwc.transpose(0, 3, 1, 2)
+    images.flush()
+    del images
+    np.save(labels_path, np.asarray(labels, dtype=np.int64))
+    # images last, they mark a complete split
+    os.replace(tmp_path, images_path)
+
+def prepare_cifar10(cache_dir=CIFAR10_CACHE_DIR, root='./data'):
+    """
+    Decodes CIFAR-10 (downloaded to root by torchvision) once into the
+    uint8 cache_dir layout, later calls only check that it is there.
+    Returns cache_dir.
+    """
+    if not _is_prepared(cache_dir):
+        import torchvision # only needed for the one time download / decode
+        for split in SPLITS:
+            dataset = torchvision.datasets.CIFAR10(root=root, train=(split == "train"), download=True)
+            _write_split(cache_dir, split, dataset.data, dataset.targets)
+    return cache_dir
+
+def prepare_synthetic(cache_dir=SYNTHETIC_CACHE_DIR, num_train=50000, num_test=10000, num_classes=10, seed=0):
+    """
+    CIFAR-10 shaped stand-in for offline runs: every class is a fixed
+    random color pattern plus noise, so models can learn it. Written once
+    into the uint8 cache_dir layout. Returns cache_dir.
+    """
+    if not _is_prepared(cache_dir):
+        rng = np.random.default_rng(seed)
+        patterns = rng.uniform(40, 215, (num_classes, 32, 32, 3)).astype(np.float32)
+        for split, num_images in (("train", num_train), ("test", num_test)):
+            labels = rng.integers(0, num_classes, num_images)
+            images = np.empty((num_images, 32, 32, 3), dtype=np.uint8)
+            for start in range(0, num_images, 10000):
+                chunk = labels[start:start + 10000]
+                noise = rng.normal(0, 40, (len(chunk), 32, 32, 3)).astype(np.float32)
+                images[start:start + len(chunk)] = np.clip(patterns[chunk] + noise, 0, 255).astype(np.uint8)
+            _write_split(cache_dir, split, images, labels)
+    return cache_dir
+
+def load_split(cache_dir, split):
+    """
+    (images, labels) of a prepared split. images is a (N, C, H, W) uint8
+    memory map (copy on write, so torch can view it without a copy), pages
+    are read on demand and shared with every other process using the file.
+    """
+    images_path, labels_path = _paths(cache_dir, split)
+    return np.load(images_path, mmap_mode='c'), np.load(labels_path)
+
+def normalize(batch, mean=NORMALIZE_MEAN, std=NORMALIZE_STD):
+    """(B, C, H, W) uint8 tensor to normalized float32, one fused pass over the batch."""
+    scale = torch.tensor([1.0 / (255.0 * s) for s in std]).view(1, -1, 1, 1)
+    shift = torch.tensor([m / s for m, s in zip(mean, std)]).view(1, -1, 1, 1)
+    return torch.addcmul(-shift, batch.float(), scale)
+
+def augment(batch, generator=None):
+    """Random crop (CROP_PADDING zero padding) and horizontal flip of every image of a (B, C, H, W) batch."""
+    n, c, h, w = batch.shape
+    padded = torch.nn.functional.pad(batch, (CROP_PADDING,) * 4)
+    offsets = torch.randint(0, 2 * CROP_PADDING + 1, (2, n), generator=generator)
+    rows = (offsets[0].view(n, 1) + torch.arange(h)).view(n, 1, h, 1).expand(n, c, h, padded.shape[3])
+    cols = offsets[1].view(n, 1) + torch.arange(w)
+    flip = torch.rand(n, generator=generator) < 0.5
+    cols = torch.where(flip.view(n, 1), cols.flip(1), cols).view(n, 1, 1, w).expand(n, c, h, w)
+    # two gathers (rows, then flipped / shifted columns), cheaper than one 4d advanced index
+    return padded.gather(2, rows).gather(3, cols)
+
+class BatchLoader:
+    """
+    Iterates (inputs, labels) batches over uint8 images (numpy memmap /
+    array or torch tensor, N x C x H x W). Without shuffle a batch is a view
+    of the images (no copy), with shuffle one gather per batch. Batches are
+    normalized (and augmented) as whole tensors, there is no per sample
+    work. Drop in for the torch DataLoader loops of the trainers.
+    """
+    def __init__(self, images, labels, batch_size=64, shuffle=False, augment=False, seed=None,
+                 mean=NORMALIZE_MEAN, std=NORMALIZE_STD):
+        self.images = images if isinstance(images, torch.Tensor) else torch.from_numpy(images)
+        self.labels = labels if isinstance(labels, torch.Tensor) else torch.as_tensor(np.asarray(labels), dtype=torch.int64)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.augment = augment
+        self.mean = mean
+        self.std = std
+        self.generator = torch.Generator()
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+    def __len__(self):
+        return -(-len(self.images) // self.batch_size)
+
+    def __iter__(self):
+        n = len(self.images)
+        order = torch.randperm(n, generator=self.generator) if self.shuffle else None
+        for start in range(0, n, self.batch_size):
+            if order is None:
+                batch = self.images[start:start + self.batch_size]
+                labels = self.labels[start:start + self.batch_size]
+            else:
+                index = order[start:start + self.batch_size]
+                batch = self.images[index]
+                labels = self.labels[index]
+            if self.augment:
+                batch = augment(batch, self.generator)
+            yield normalize(batch, self.mean, self.std), labels
@@ -0,0 +1,137 @@
+import json
+import os
+import queue
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim as optim
+
+from hw_nas.pytorch_model import build_pytorch_model
+from hw_nas.image_data import BatchLoader
+
+# seconds a result may take before the workers are checked for crashes
+RESULT_POLL_SECONDS = 1.0
+
+def share_images(images, labels):
+    """
+    (N, C, H, W) uint8 images (e.g. from image_data.load_split) and their
+    labels as uint8 / int64 tensors in shared memory. Training workers
+    receive handles to them, not copies.
+    """
+    x = torch.from_numpy(np.ascontiguousarray(images)).share_memory_()
+    y = torch.as_tensor(np.asarray(labels), dtype=torch.int64).share_memory_()
+    return x, y
+
+def _accuracy(model, x, y, batch_size):
+    model.eval()
+    correct = 0
+    with torch.no_grad():
+        for inputs, labels in BatchLoader(x, y, batch_size):
+            correct += (model(inputs).argmax(1) == labels).sum().item()
+    return 100 * correct / len(x)
+
+def train_one(arch, train_data, test_data, epochs=1, batch_size=64, learning_rate=1e-3, seed=0):
+    """
+    Trains arch with Adam on the (x, y) tensors of train_data, returns its
+    result record: float and quantized (hardware datapath) test accuracy,
+    training time and last loss.
+    """
+    torch.manual_seed(seed)
+    train_loader = BatchLoader(*train_data, batch_size, shuffle=True, seed=seed)
+    start_time = time.time()
+
+    model = build_pytorch_model(arch)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = optim.Adam(model.parameters(), lr=learning_rate)
+    model.train()
+    loss = None
+    for _ in range(epochs):
+        for inputs, labels in train_loader:
+            optimizer.zero_grad()
+            loss = criterion(model(inputs), labels)
+            loss.backward()
+            optimizer.step()
+    train_seconds = time.time() - start_time
+
+    quantized = build_pytorch_model(arch, quantized=True)
+    quantized.load_state_dict(model.state_dict())
+    return {
+        "architecture": arch.to_list(),
+        "accuracy": _accuracy(model, *test_data, batch_size),
+        "quantized_accuracy": _accuracy(quantized, *test_data, batch_size),
+        "train_seconds": train_seconds,
+        "final_loss": None if loss is None else float(loss.item()),
+    }
+
+def _worker(worker_id, jobs, results, train_data, test_data, num_threads, options):
+    # its own share of the cores, workers do not oversubscribe each other
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        index, arch = job
+        try:
+            record = train_one(arch, train_data, test_data, seed=options["seed"] + index,
+                               **{key: value for key, value in options.items() if key != "seed"})
+        except Exception as e:
+            record = {"architecture": arch.to_list(), "error": f"{type(e).__name__}: {e}"}
+        record.update(index=index, worker=worker_id)
+        results.put(record)
+
+def train_architectures(archs, train_data, test_data, num_workers, results_path=None, threads_per_worker=None,
+                        epochs=1, batch_size=64, learning_rate=1e-3, seed=0):
+    """
+    Trains archs concurrently on the CPU in num_workers spawned processes,
+    each limited to threads_per_worker torch threads (default: an equal
+    share of the cores). train_data / test_data are (x, y) tensors from
+    share_images. Yields one record per architecture (see train_one, failed
+    ones have 'error' instead) in completion order, each appended to
+    results_path (JSON lines) as soon as it arrives.
+    Raises RuntimeError if workers die with results outstanding.
+    """
+    num_workers = max(1, min(num_workers, len(archs)))
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+    options = {"epochs": epochs, "batch_size": batch_size, "learning_rate": learning_rate, "seed": seed}
+
+    context = mp.get_context("spawn")
+    jobs = context.Queue()
+    results = context.Queue()
+    for index, arch in enumerate(archs):
+        jobs.put((index, arch))
+    for _ in range(num_workers):
+        jobs.put(None)
+    workers = [
+        context.Process(target=_worker, args=(worker_id, jobs, results, train_data, test_data,
+                                              threads_per_worker, options), daemon=True)
+        for worker_id in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    print(f"training {len(archs)} architectures on {num_workers} workers x {threads_per_worker} threads")
+
+    results_file = open(results_path, "a") if results_path is not None else None
+    try:
+        remaining = len(archs)
+        while remaining:
+            try:
+                record = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    raise RuntimeError(f"training workers exited with {remaining} results outstanding")
+                continue
+            remaining -= 1
+            if results_file is not None:
+                results_file.write(json.dumps(record) + "\n")
+                results_file.flush()
+            yield record
+    finally:
+        if results_file is not None:
+            results_file.close()
+        for worker in workers:
+            worker.join(timeout=RESULT_POLL_SECONDS)
+            if worker.is_alive():
+                worker.terminate()
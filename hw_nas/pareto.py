@@ -0,0 +1,188 @@
+import operator
+import os
+import numpy as np
+
+from hw_nas.search_space import Architecture, BLOCK_WIDTH, ARCH_DTYPE
+
+# (name, direction) of the objectives tracked by default
+DEFAULT_OBJECTIVES = (('accuracy', 'max'), ('wns', 'max'), ('power', 'min'))
+
+_COMPARISONS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+def _hypervolume_min(points, reference):
+    """Hypervolume dominated by points (minimization) up to reference."""
+    points = points[np.all(points < reference, axis=1)]
+    if len(points) == 0:
+        return 0.0
+
+    if points.shape[1] == 1:
+        return float(reference[0] - points[:, 0].min())
+
+    if points.shape[1] == 2:
+        # sweep along x, the covered height only grows
+        order = np.argsort(points[:, 0], kind='stable')
+        xs = points[order, 0]
+        ys = np.minimum.accumulate(points[order, 1])
+        widths = np.diff(np.append(xs, reference[0]))
+        return float(np.sum(widths * (reference[1] - ys)))
+
+    # slice along the last objective, each slab is a (d-1) dimensional problem
+    order = np.argsort(points[:, -1], kind='stable')
+    points = points[order]
+    z = np.append(points[:, -1], reference[-1])
+    volume = 0.0
+    for i in range(len(points)):
+        depth = z[i + 1] - z[i]
+        if depth > 0:
+            volume += _hypervolume_min(points[:i + 1, :-1], reference[:-1]) * depth
+    return volume
+
+class ParetoArchive:
+    """
+    Archive of (architecture, objectives) records with an incrementally
+    maintained non-dominated front. Inserts compare the new record against
+    the current front only (vectorized), nothing is re-sorted.
+    All records are kept, so constrained queries see every evaluated design.
+    """
+    def __init__(self, objectives=DEFAULT_OBJECTIVES, initial_capacity=1024):
+        self.names = [name for name, _ in objectives]
+        self.directions = [direction for _, direction in objectives]
+        for direction in self.directions:
+            if direction not in ('min', 'max'):
+                raise ValueError(f"Objective direction must be 'min' or 'max', got {direction!r}")
+        # internally everything is minimized
+        self._sign = np.array([1.0 if d == 'min' else -1.0 for d in self.directions])
+
+        self._values = np.empty((initial_capacity, len(self.names)), dtype=np.float64)
+        self._archs = []
+        self._front_idx = np.empty(0, dtype=np.int64)
+        self._front_values = np.empty((0, len(self.names)), dtype=np.float64)
+
+    def __len__(self):
+        return len(self._archs)
+
+    def _as_vector(self, objectives):
+        if isinstance(objectives, dict):
+            return np.array([objectives[name] for name in self.names], dtype=np.float64)
+        vector = np.asarray(objectives, dtype=np.float64)
+        if vector.shape != (len(self.names),):
+            raise ValueError(f"Expected {len(self.names)} objectives ({self.names}), got {vector.shape}")
+        return vector
+
+    def add(self, arch, objectives):
+        """
+        Adds one record (objectives as dict by name or sequence in objective
+        order). Returns True if it is on the front after insertion.
+        """
+        vector = self._as_vector(objectives)
+        index = len(self._archs)
+        if index == len(self._values):
+            grown = np.empty((2 * len(self._values), len(self.names)), dtype=np.float64)
+            grown[:index] = self._values[:index]
+            self._values = grown
+        self._values[index] = vector
+        self._archs.append(arch)
+
+        if np.isnan(vector).any():
+            return False # incomplete records are kept but never on the front
+
+        candidate = vector * self._sign
+        front = self._front_values
+        if len(front) and np.any(np.all(front <= candidate, axis=1)):
+            return False # (weakly) dominated by a front member
+
+        # drop the front members the new record dominates
+        keep = ~np.all(candidate <= front, axis=1)
+        self._front_idx = np.append(self._front_idx[keep], index)
+        self._front_values = np.vstack([front[keep], candidate])
+        return True
+
+    def add_many(self, archs, objective_rows):
+        """Adds many records, returns how many of them entered the front."""
+        return sum(self.add(arch, row) for arch, row in zip(archs, objective_rows))
+
+    def front(self):
+        """The non-dominated records as a list of (arch, {name: value})."""
+        return [(self._archs[i], dict(zip(self.names, self._values[i].tolist()))) for i in self._front_idx]
+
+    def front_values(self):
+        """(front_size, num_objectives) objective matrix of the front, original units."""
+        return self._values[self._front_idx].copy()
+
+    def hypervolume(self, reference):
+        """
+        Hypervolume of the front w.r.t. a reference point (dict or sequence,
+        original units; e.g. worst acceptable accuracy, WNS and power).
+        """
+        reference = self._as_vector(reference) * self._sign
+        return _hypervolume_min(self._front_values, reference)
+
+    def query(self, maximize=None, minimize=None, constraints=None):
+        """
+        Best record for one objective subject to constraints, e.g.
+        query(maximize='accuracy', constraints={'wns': ('>=', 0.0), 'power': ('<', 0.5)}).
+        Returns (arch, {name: value}) or None if nothing satisfies the constraints.
+        """
+        if (maximize is None) == (minimize is None):
+            raise ValueError("Pass exactly one of maximize or minimize")
+        target = self.names.index(maximize if maximize is not None else minimize)
+        constraints = constraints or {}
+
+        # optimizing an objective in its own direction with constraints that only
+        # cut away the bad side of objectives keeps the optimum on the front,
+        # anything else needs a scan over all records
+        aligned = (self.directions[target] == ('max' if maximize is not None else 'min')) and all(
+            (op in ('>', '>=')) == (self.directions[self.names.index(name)] == 'max')
+            for name, (op, _) in constraints.items()
+        )
+        candidates = self._front_idx if aligned else np.arange(len(self._archs))
+        values = self._values[candidates]
+
+        mask = ~np.isnan(values[:, target])
+        for name, (op, bound) in constraints.items():
+            mask &= _COMPARISONS[op](values[:, self.names.index(name)], bound)
+        if not mask.any():
+            return None
+
+        column = np.where(mask, values[:, target], np.nan)
+        best = np.nanargmax(column) if maximize is not None else np.nanargmin(column)
+        index = candidates[best]
+        return self._archs[index], dict(zip(self.names, self._values[index].tolist()))
+
+    def save(self, path):
+        """Writes the archive to a single .npz file (atomically)."""
+        n = len(self._archs)
+        lengths = np.array([len(arch) for arch in self._archs], dtype=np.int64)
+        blocks = np.concatenate([arch.array for arch in self._archs]) if n else np.empty((0, BLOCK_WIDTH), dtype=ARCH_DTYPE)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            names=np.array(self.names),
+            directions=np.array(self.directions),
+            values=self._values[:n],
+            front_idx=self._front_idx,
+            arch_lengths=lengths,
+            arch_blocks=blocks,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restores an archive written by save."""
+        data = np.load(path)
+        objectives = list(zip(data['names'].tolist(), data['directions'].tolist()))
+        values = data['values']
+        archive = cls(objectives, initial_capacity=max(len(values), 1024))
+        archive._values[:len(values)] = values
+
+        offsets = np.concatenate([[0], np.cumsum(data['arch_lengths'])])
+        blocks = data['arch_blocks']
+        archive._archs = [Architecture.from_array(blocks[offsets[i]:offsets[i + 1]]) for i in range(len(values))]
+        archive._front_idx = data['front_idx'].astype(np.int64)
+        archive._front_values = values[archive._front_idx] * archive._sign
+        return archive
@@ -1,6 +1,8 @@
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from .search_space import Architecture, get_random_architecture
+from .search_space import (
+    Architecture, get_random_architecture, OP_CODES, PARAM_KEYS, PADDING_SAME, PARAM_MISSING,
+    DEFAULT_PIPELINE_II, DEFAULT_UNROLL, DEFAULT_BITS,
+)
 
 # architecture to vector featurization translation
 def featurize(arch: Architecture):
@@ -18,6 +20,14 @@ def featurize(arch: Architecture):
     total_padding_num = 0
     total_stride_1 = 0
     total_stride_2 = 0
+    # HLS parallelism knobs
+    total_conv_unroll = 0
+    max_conv_pipeline_ii = 0
+    total_linear_unroll = 0
+    max_linear_pipeline_ii = 0
+    # datapath precision of conv / linear layers
+    total_bits_8 = 0
+    total_bits_16 = 0
     
     for block in arch.blocks:
         op_type = block.op_type
@@ -38,6 +48,9 @@ def featurize(arch: Architecture):
                 total_stride_1 += 1
             elif params.get('stride') == 2:
                 total_stride_2 += 1
+
+            total_conv_unroll += params.get('unroll', DEFAULT_UNROLL)
+            max_conv_pipeline_ii = max(max_conv_pipeline_ii, params.get('pipeline_ii', DEFAULT_PIPELINE_II))
                 
         elif op_type == 'relu':
             total_relu += 1
@@ -50,7 +63,13 @@ def featurize(arch: Architecture):
         elif op_type == 'linear':
             total_linear += 1
             max_linear_out_features = max(max_linear_out_features, params.get('out_features', 0))
+            total_linear_unroll += params.get('unroll', DEFAULT_UNROLL)
+            max_linear_pipeline_ii = max(max_linear_pipeline_ii, params.get('pipeline_ii', DEFAULT_PIPELINE_II))
 
+        if op_type in ('conv', 'linear'):
+            bits = params.get('bits', DEFAULT_BITS)
+            total_bits_8 += bits == 8
+            total_bits_16 += bits == 16
     
     # return final featurized vector
     return np.array([
@@ -65,5 +84,75 @@ def featurize(arch: Architecture):
         total_padding_same,
         total_padding_num,
         total_stride_1,
-        total_stride_2
-    ])
\ No newline at end of file
+        total_stride_2,
+        total_conv_unroll,
+        max_conv_pipeline_ii,
+        total_linear_unroll,
+        max_linear_pipeline_ii,
+        total_bits_8,
+        total_bits_16
+    ])
+
+NUM_FEATURES = 18
+
+_CONV, _RELU, _MAX_POOL, _AVG_POOL, _LINEAR = (
+    OP_CODES[op] for op in ('conv', 'relu', 'max_pool', 'global_avg_pool', 'linear')
+)
+_COL_OUT_CHANNELS, _COL_PADDING, _COL_STRIDE, _COL_OUT_FEATURES, _COL_PIPELINE_II, _COL_UNROLL, _COL_BITS = (
+    1 + PARAM_KEYS.index(key)
+    for key in ('out_channels', 'padding', 'stride', 'out_features', 'pipeline_ii', 'unroll', 'bits')
+)
+
+def _knob_column(rows, column, default):
+    # blocks without the knob use the generator default
+    values = rows[:, column]
+    return np.where(values == PARAM_MISSING, default, values)
+
+def featurize_batch(archs):
+    """
+    Featurizes many architectures at once into a preallocated (N, NUM_FEATURES)
+    matrix, row i is identical to featurize(archs[i]).
+    """
+    n = len(archs)
+    X = np.zeros((n, NUM_FEATURES), dtype=np.int64)
+    if n == 0:
+        return X
+
+    # all blocks of all architectures as one compact (num_blocks, BLOCK_WIDTH) matrix
+    lengths = np.fromiter((len(arch) for arch in archs), dtype=np.int64, count=n)
+    blocks = np.concatenate([arch.array for arch in archs])
+    arch_of_block = np.repeat(np.arange(n), lengths)
+
+    op_codes = blocks[:, 0]
+    conv = blocks[op_codes == _CONV]
+    conv_arch = arch_of_block[op_codes == _CONV]
+    linear_arch = arch_of_block[op_codes == _LINEAR]
+    padding = conv[:, _COL_PADDING]
+    stride = conv[:, _COL_STRIDE]
+
+    def count(arch_index):
+        return np.bincount(arch_index, minlength=n)
+
+    X[:, 0] = lengths
+    X[:, 1] = count(conv_arch)
+    np.maximum.at(X[:, 2], conv_arch, conv[:, _COL_OUT_CHANNELS])
+    X[:, 3] = count(arch_of_block[op_codes == _RELU])
+    X[:, 4] = count(arch_of_block[op_codes == _MAX_POOL])
+    X[:, 5] = count(arch_of_block[op_codes == _AVG_POOL])
+    X[:, 6] = count(linear_arch)
+    np.maximum.at(X[:, 7], linear_arch, blocks[op_codes == _LINEAR, _COL_OUT_FEATURES])
+    X[:, 8] = count(conv_arch[padding == PADDING_SAME])
+    X[:, 9] = np.bincount(conv_arch, weights=np.maximum(padding, 0), minlength=n).astype(np.int64)
+    X[:, 10] = count(conv_arch[stride == 1])
+    # all max_pool ops have stride 2
+    X[:, 11] = count(conv_arch[stride == 2]) + X[:, 4]
+    linear = blocks[op_codes == _LINEAR]
+    X[:, 12] = np.bincount(conv_arch, weights=_knob_column(conv, _COL_UNROLL, DEFAULT_UNROLL), minlength=n).astype(np.int64)
+    np.maximum.at(X[:, 13], conv_arch, _knob_column(conv, _COL_PIPELINE_II, DEFAULT_PIPELINE_II))
+    X[:, 14] = np.bincount(linear_arch, weights=_knob_column(linear, _COL_UNROLL, DEFAULT_UNROLL), minlength=n).astype(np.int64)
+    np.maximum.at(X[:, 15], linear_arch, _knob_column(linear, _COL_PIPELINE_II, DEFAULT_PIPELINE_II))
+    is_mac = (op_codes == _CONV) | (op_codes == _LINEAR)
+    bits = _knob_column(blocks[is_mac], _COL_BITS, DEFAULT_BITS)
+    X[:, 16] = count(arch_of_block[is_mac][bits == 8])
+    X[:, 17] = count(arch_of_block[is_mac][bits == 16])
+    return X
@@ -0,0 +1,306 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import numpy as np
+
+from hw_nas.search_space import Architecture
+from hw_nas.fast_forest import load_predictor, file_signature, published_predictors
+from hw_nas.features import model_feature_schema, pipeline_for_schema
+
+DEFAULT_SOCKET_PATH = "/tmp/hw_nas_predictor.sock"
+
+class ModelHolder:
+    """
+    Holds the timing and power models and swaps in new ones when the
+    trainer publishes a new pair (fast_forest.publish_predictors), or for
+    model files that were never published, when either .joblib file changes.
+    Readers get a consistent (timing, power, version, pipeline) tuple, the
+    swap is a single reference assignment. pipeline is the FeaturePipeline
+    of the models' feature schema (None without models).
+    """
+    def __init__(self, timing_path, power_path):
+        self.timing_path = timing_path
+        self.power_path = power_path
+        self._models = (None, None, 0, None)
+        self._signature = None
+        self.maybe_reload()
+
+    def _file_signature(self):
+        return file_signature(self.timing_path), file_signature(self.power_path)
+
+    def current(self):
+        return self._models
+
+    def maybe_reload(self):
+        """Loads both models if a new pair was published (or either unpublished file changed). Returns True on reload."""
+        published = published_predictors(self.timing_path, self.power_path)
+        files = self._file_signature()
+        if published is None:
+            signature = files
+        else:
+            signature = ("published", published["version"])
+            if files != (published["timing"][1], published["power"][1]):
+                # a newer pair is being written, wait for its record
+                return False
+        if signature == self._signature:
+            return False
+        try:
+            timing = load_predictor(self.timing_path) if signature[0] is not None else None
+            power = load_predictor(self.power_path) if signature[1] is not None else None
+            schemas = {model_feature_schema(model) for model in (timing, power) if model is not None}
+            if len(schemas) > 1:
+                raise ValueError(f"timing and power predictors use different feature schemas {sorted(schemas)}")
+            pipeline = pipeline_for_schema(schemas.pop()) if schemas else None
+            if self._file_signature() != files:
+                raise RuntimeError("model files changed while loading")
+        except Exception as e:
+            # e.g. a file still being written, keep serving the old models
+            print(f"WARN: Failed to (re)load predictors, keeping the current ones: {e}")
+            return False
+        self._signature = signature
+        self._models = (timing, power, self._models[2] + 1, pipeline)
+        print(f"Loaded predictors (version {self._models[2]})")
+        return True
+
+class _PendingRequest:
+    __slots__ = ('X', 'done', 'wns', 'power', 'version', 'error')
+
+    def __init__(self, X):
+        self.X = X
+        self.done = threading.Event()
+        self.wns = None
+        self.power = None
+        self.version = None
+        self.error = None
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests: the worker thread takes the
+    first waiting request, collects more for up to max_wait_s (or until
+    max_batch_rows rows) and runs both models once on the stacked rows.
+    """
+    def __init__(self, holder, max_batch_rows=4096, max_wait_s=0.002):
+        self.holder = holder
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_s = max_wait_s
+        self.num_batches = 0
+        self.num_requests = 0
+        self.num_rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def predict(self, X):
+        """Blocking predict of a (n, num_features) matrix, returns (wns, power, model_version)."""
+        request = _PendingRequest(X)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.wns, request.power, request.version
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            rows = len(first.X)
+            deadline = time.monotonic() + self.max_wait_s
+            stop = False
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                rows += len(request.X)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch):
+        timing, power, version, _ = self.holder.current()
+        try:
+            if timing is None or power is None:
+                raise RuntimeError("timing and power predictors are not both loaded")
+            X = np.vstack([request.X for request in batch])
+            wns = timing.predict(X)
+            power_values = power.predict(X)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = str(e)
+                batch[0].done.set()
+                return
+            # one bad request fails only itself
+            for request in batch:
+                self._run([request])
+            return
+
+        start = 0
+        for request in batch:
+            end = start + len(request.X)
+            request.wns = wns[start:end]
+            request.power = power_values[start:end]
+            request.version = version
+            request.done.set()
+            start = end
+
+        self.num_batches += 1
+        self.num_requests += len(batch)
+        self.num_rows += len(X)
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Newline delimited JSON, one request and one response per line."""
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.service.handle_request(json.loads(line))
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class PredictorService:
+    """
+    Local prediction server on a Unix socket. Loads the models once,
+    micro-batches concurrent requests and reloads the models when the
+    .joblib files change (checked every reload_interval_s).
+    """
+    def __init__(self, timing_path, power_path, socket_path=DEFAULT_SOCKET_PATH,
+                 max_batch_rows=4096, max_wait_s=0.002, reload_interval_s=2.0):
+        self.socket_path = socket_path
+        self.holder = ModelHolder(timing_path, power_path)
+        self.batcher = MicroBatcher(self.holder, max_batch_rows, max_wait_s)
+        self.reload_interval_s = reload_interval_s
+        self._stopped = threading.Event()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # stale socket of a previous run
+        self.server = _UnixServer(socket_path, _RequestHandler)
+        self.server.service = self
+        self._watcher = threading.Thread(target=self._watch_models, daemon=True)
+        self._watcher.start()
+
+    def _watch_models(self):
+        while not self._stopped.wait(self.reload_interval_s):
+            self.holder.maybe_reload()
+
+    def handle_request(self, request):
+        op = request.get("op", "predict")
+        if op == "ping":
+            return {"ok": True, "model_version": self.holder.current()[2]}
+        if op == "stats":
+            batcher = self.batcher
+            _, _, version, pipeline = self.holder.current()
+            return {
+                "model_version": version,
+                "feature_schema": pipeline.schema_id if pipeline is not None else None,
+                "batches": batcher.num_batches,
+                "requests": batcher.num_requests,
+                "rows": batcher.num_rows,
+            }
+        if op != "predict":
+            return {"error": f"unknown op {op!r}"}
+
+        pipeline = self.holder.current()[3]
+        if pipeline is None:
+            return {"error": "no predictors loaded"}
+        if "architectures" in request:
+            X = pipeline.transform([Architecture.from_list(arch) for arch in request["architectures"]])
+        else:
+            # clients sending raw features say which features they are
+            schema = request.get("feature_schema")
+            if schema is not None and schema != pipeline.schema_id:
+                return {"error": f"features have schema {schema!r}, the models expect {pipeline.schema_id!r}"}
+            X = np.asarray(request["features"], dtype=np.float64)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+            # checked before batching, a malformed request must not fail the ones coalesced with it
+            if X.ndim != 2 or X.shape[1] != pipeline.num_features:
+                return {"error": f"features have shape {X.shape}, the models expect (n, {pipeline.num_features})"}
+        wns, power, version = self.batcher.predict(X)
+        return {"wns": wns.tolist(), "power": power.tolist(), "model_version": version}
+
+    def serve_forever(self):
+        print(f"Predictor service listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def start(self):
+        """Serves from a background thread (e.g. for tests and benchmarks)."""
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+class PredictorClient:
+    """Client of PredictorService, one connection reused for all calls."""
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self._file = self.sock.makefile('rwb')
+
+    def _call(self, request):
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if "error" in response:
+            raise RuntimeError(f"predictor service: {response['error']}")
+        return response
+
+    def predict(self, features, feature_schema=None):
+        """
+        Predicts (wns, power) arrays for one feature vector or a feature matrix.
+        With feature_schema, the service refuses features of another schema.
+        """
+        features = np.asarray(features, dtype=np.float64)
+        request = {"features": features.tolist()}
+        if feature_schema is not None:
+            request["feature_schema"] = feature_schema
+        response = self._call(request)
+        return np.array(response["wns"]), np.array(response["power"])
+
+    def predict_architectures(self, archs):
+        """Featurizes server side, returns (wns, power) arrays."""
+        response = self._call({"architectures": [arch.to_list() for arch in archs]})
+        return np.array(response["wns"]), np.array(response["power"])
+
+    def stats(self):
+        return self._call({"op": "stats"})
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
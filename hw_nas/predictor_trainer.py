@@ -1,35 +1,58 @@
+import json
+import os
+import shutil
+import time
 import numpy as np
 import joblib
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.preprocessing import StandardScaler
 
 from hw_nas.search_space import get_random_architecture
-from hw_nas.predictor import featurize
+from hw_nas.fast_forest import export_forest, flat_path, publish_predictors
+from hw_nas.features import set_feature_schema, model_feature_schema, pipeline_for_schema, LEGACY_SCHEMA_ID, FEATURIZE_SCHEMA_ID
 
-def train_predictors(real_data_X, real_data_y_timing, real_data_y_power, timing_path, power_path):
-    """Trains and saves the timing and power predictors."""
+# incremental training
+TREES_PER_UPDATE = 20 # trees added per incremental update
+MAX_TREES = 300 # tree budget per forest, the oldest trees are dropped beyond it
+UPDATE_SAMPLE_SIZE = 2000 # rows the new trees are fitted on: all new rows plus a random sample of older ones
+FULL_REFIT_EVERY = 10 # every n-th update is a full refit (resets drift)
+MAX_MODEL_VERSIONS = 5 # versioned model files kept next to the manifest
+MANIFEST_FILE = "predictors_manifest.json"
+# targets of the multi-target predictor (SynthesisMetrics field names)
+MULTI_TARGETS = ['wns', 'power', 'latency_cycles', 'interval', 'lut', 'ff', 'dsp', 'bram_18k']
+
+def train_predictors(real_data_X, real_data_y_timing, real_data_y_power, timing_path, power_path,
+                     feature_schema=FEATURIZE_SCHEMA_ID):
+    """
+    Trains and saves the timing and power predictors.
+    feature_schema is the schema id of real_data_X (hw_nas.features), saved with the models.
+    """
     
     timing_predictor = None
     power_predictor = None
 
     # training with colected data
-    if not real_data_X:
+    if len(real_data_X) == 0:
         print("NO VALID DATA POINTS COLLECTED. SKIPPING PREDICTOR TRAINING.")
         return None, None
     
-    X_train = np.array(real_data_X)
+    X_train = np.asarray(real_data_X)
 
     # train timing predictor
-    if real_data_y_timing:
+    if len(real_data_y_timing) > 0:
         print("start predictor training for TIMING (WNS) with REAL data.")
         y_timing_train = np.array(real_data_y_timing)
         timing_predictor = RandomForestRegressor(random_state=42) # Added random_state
         timing_predictor.fit(X_train, y_timing_train)
+        set_feature_schema(timing_predictor, feature_schema)
         print("Timing predictor successfully trained.")
         
         # saving 
         try:
             joblib.dump(timing_predictor, timing_path)
-            print(f"Timing predictor saved to {timing_path}")
+            export_forest(timing_predictor, flat_path(timing_path))
+            print(f"Timing predictor saved to {timing_path} (flat export {flat_path(timing_path)})")
         except Exception as e:
             print(f"ERROR: Failed to save timing predictor: {e}")
 
@@ -37,25 +60,217 @@ def train_predictors(real_data_X, real_data_y_timing, real_data_y_power, timing_
         print("NO TIMING DATA POINTS. SKIPPING TIMING PREDICTOR TRAINING.")
 
     # train power predictor
-    if real_data_y_power:
+    if len(real_data_y_power) > 0:
         print("start predictor training for POWER with REAL data.")
         y_power_train = np.array(real_data_y_power)
         power_predictor = RandomForestRegressor(random_state=42) # Added random_state
         power_predictor.fit(X_train, y_power_train)
+        set_feature_schema(power_predictor, feature_schema)
         print("Power predictor successfully trained.")
         
         # saving
         try:
             joblib.dump(power_predictor, power_path)
-            print(f"Power predictor saved to {power_path}")
+            export_forest(power_predictor, flat_path(power_path))
+            print(f"Power predictor saved to {power_path} (flat export {flat_path(power_path)})")
         except Exception as e:
             print(f"ERROR: Failed to save power predictor: {e}")
         
     else:
         print("NO POWER DATA POINTS. SKIPPING POWER PREDICTOR TRAINING.")
-        
+
+    # the predictor service switches to the new pair only now, not in between the two files
+    try:
+        publish_predictors(timing_path, power_path)
+    except OSError as e:
+        print(f"ERROR: Failed to publish the predictors: {e}")
+    return timing_predictor, power_predictor
+
+def add_trees(forest, X, y, num_new, trees_per_update=TREES_PER_UPDATE, max_trees=MAX_TREES,
+              sample_size=UPDATE_SAMPLE_SIZE, seed=0):
+    """
+    Warm start update of a fitted forest: fits trees_per_update new trees on
+    the last num_new rows of (X, y) plus a random sample of the older rows
+    (sample_size rows in total), then drops the oldest trees beyond max_trees.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    new_rows = np.arange(max(n - num_new, 0), n)
+    old_rows = np.arange(0, max(n - num_new, 0))
+    num_old = min(len(old_rows), max(sample_size - len(new_rows), 0))
+    rows = np.concatenate([new_rows, rng.choice(old_rows, num_old, replace=False)])
+
+    # per update seed, the new trees must not repeat the bootstrap draws of dropped ones
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + trees_per_update, random_state=seed)
+    forest.fit(X[rows], y[rows])
+    if len(forest.estimators_) > max_trees:
+        forest.estimators_ = forest.estimators_[-max_trees:]
+    forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+    return forest
+
+def _load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def _write_versioned(manifest, manifest_path, timing_predictor, power_predictor, timing_path, power_path, entry):
+    """Stores this version's model files, prunes old versions and rewrites the manifest atomically."""
+    versions_dir = os.path.join(os.path.dirname(manifest_path), "versions")
+    os.makedirs(versions_dir, exist_ok=True)
+    version = entry["version"]
+    for predictor, path, key in ((timing_predictor, timing_path, "timing_file"), (power_predictor, power_path, "power_file")):
+        name, ext = os.path.splitext(os.path.basename(path))
+        version_path = os.path.join(versions_dir, f"{name}.v{version:04d}{ext}")
+        joblib.dump(predictor, version_path)
+        entry[key] = os.path.relpath(version_path, os.path.dirname(manifest_path))
+        # the unversioned path always holds the current model, copied instead of pickled twice
+        shutil.copyfile(version_path, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        export_forest(predictor, flat_path(path))
+
+    manifest["current_version"] = version
+    manifest["versions"].append(entry)
+    for old in manifest["versions"][:-MAX_MODEL_VERSIONS]:
+        for key in ("timing_file", "power_file"):
+            old_path = os.path.join(os.path.dirname(manifest_path), old[key])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+    manifest["versions"] = manifest["versions"][-MAX_MODEL_VERSIONS:]
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    publish_predictors(timing_path, power_path)
+
+def update_predictors(X, y_timing, y_power, timing_path, power_path, timing_predictor=None, power_predictor=None,
+                      feature_schema=FEATURIZE_SCHEMA_ID):
+    """
+    Incremental training: adds trees fitted on the rows that arrived since the
+    last version (see add_trees) instead of refitting both forests. Falls back
+    to a full refit for the first version, every FULL_REFIT_EVERY-th update
+    and when the feature count or feature schema changed. Every update is a new model version
+    recorded in predictors_manifest.json next to timing_path.
+    Pass the current predictors if they are in memory, saves loading them.
+    Returns (timing_predictor, power_predictor).
+    """
+    manifest_path = os.path.join(os.path.dirname(timing_path), MANIFEST_FILE)
+    manifest = _load_manifest(manifest_path) or {"current_version": 0, "versions": []}
+    last = manifest["versions"][-1] if manifest["versions"] else None
+    X = np.asarray(X, dtype=np.float64)
+    y_timing = np.asarray(y_timing, dtype=np.float64)
+    y_power = np.asarray(y_power, dtype=np.float64)
+
+    if len(X) == 0:
+        print("NO VALID DATA POINTS COLLECTED. SKIPPING PREDICTOR TRAINING.")
+        return None, None
+    num_new = len(X) - last["num_datapoints"] if last else len(X)
+    if last and num_new <= 0:
+        print(f"no new datapoints since version {last['version']}, keeping the current predictors.")
+        return (timing_predictor if timing_predictor is not None else joblib.load(timing_path),
+                power_predictor if power_predictor is not None else joblib.load(power_path))
+
+    start_time = time.time()
+    full_refit = (
+        last is None
+        or last["updates_since_full"] + 1 >= FULL_REFIT_EVERY
+        or last["num_features"] != X.shape[1]
+        or last.get("feature_schema", LEGACY_SCHEMA_ID) != feature_schema
+        or not (os.path.exists(timing_path) and os.path.exists(power_path))
+    )
+    version = manifest["current_version"] + 1
+    if full_refit:
+        print(f"full refit of both predictors on {len(X)} datapoints (version {version}).")
+        timing_predictor = RandomForestRegressor(random_state=42).fit(X, y_timing)
+        power_predictor = RandomForestRegressor(random_state=42).fit(X, y_power)
+    else:
+        print(f"incremental update with {num_new} new datapoints (version {version}).")
+        if timing_predictor is None:
+            timing_predictor = joblib.load(timing_path)
+        if power_predictor is None:
+            power_predictor = joblib.load(power_path)
+        timing_predictor = add_trees(timing_predictor, X, y_timing, num_new, seed=version)
+        power_predictor = add_trees(power_predictor, X, y_power, num_new, seed=version)
+    set_feature_schema(timing_predictor, feature_schema)
+    set_feature_schema(power_predictor, feature_schema)
+
+    entry = {
+        "version": version,
+        "created_at": time.time(),
+        "mode": "full" if full_refit else "incremental",
+        "num_datapoints": len(X),
+        "num_features": X.shape[1],
+        "feature_schema": feature_schema,
+        "num_trees": len(timing_predictor.estimators_),
+        "updates_since_full": 0 if full_refit else last["updates_since_full"] + 1,
+        "training_seconds": time.time() - start_time,
+    }
+    try:
+        _write_versioned(manifest, manifest_path, timing_predictor, power_predictor, timing_path, power_path, entry)
+        print(f"Predictors version {version} saved ({entry['num_trees']} trees, {entry['training_seconds']:.2f}s)")
+    except Exception as e:
+        print(f"ERROR: Failed to save predictors version {version}: {e}")
     return timing_predictor, power_predictor
 
+def _store_schema(pipeline):
+    # without a pipeline the features come as stored, i.e. featurize() output
+    return pipeline.schema_id if pipeline is not None else FEATURIZE_SCHEMA_ID
+
+def update_predictors_from_store(store, timing_path, power_path, pipeline=None):
+    """
+    update_predictors on all valid datapoints of a DatapointStore (rows in
+    insertion order), featurized by pipeline if given.
+    """
+    X, y_timing, y_power = store.load_training_data(pipeline=pipeline)
+    return update_predictors(X, y_timing, y_power, timing_path, power_path, feature_schema=_store_schema(pipeline))
+
+def train_multi_target_predictor(X, Y, target_names, path, feature_schema=FEATURIZE_SCHEMA_ID):
+    """
+    Trains one forest on all targets at once (one pass over the data, shared
+    splits). Targets are standardized for fitting so large counts (LUT, FF,
+    latency) do not drown out WNS and power; predict() returns original units.
+    The target names are kept on the model as target_names_, the feature
+    schema id as feature_schema_.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    if len(X) == 0:
+        print("NO DATAPOINTS WITH COMPLETE METRICS. SKIPPING MULTI-TARGET PREDICTOR TRAINING.")
+        return None
+
+    print(f"start multi-target predictor training ({', '.join(target_names)}) on {len(X)} datapoints.")
+    predictor = TransformedTargetRegressor(
+        regressor=RandomForestRegressor(random_state=42),
+        transformer=StandardScaler()
+    )
+    predictor.fit(X, Y)
+    predictor.target_names_ = list(target_names)
+    set_feature_schema(predictor, feature_schema)
+    print("Multi-target predictor successfully trained.")
+
+    try:
+        joblib.dump(predictor, path)
+        export_forest(predictor, flat_path(path))
+        print(f"Multi-target predictor saved to {path} (flat export {flat_path(path)})")
+    except Exception as e:
+        print(f"ERROR: Failed to save multi-target predictor: {e}")
+    return predictor
+
+def train_multi_target_from_store(store, path, target_names=MULTI_TARGETS, pipeline=None):
+    """train_multi_target_predictor on every stored datapoint that has all target metrics."""
+    X, Y = store.load_metric_targets(target_names, pipeline=pipeline)
+    return train_multi_target_predictor(X, Y, target_names, path, feature_schema=_store_schema(pipeline))
+
+def train_predictors_from_store(store, timing_path, power_path, pipeline=None):
+    """
+    Trains and saves both predictors on all valid datapoints of a
+    DatapointStore, featurized by pipeline (a FeaturePipeline) if given.
+    """
+    X, y_timing, y_power = store.load_training_data(pipeline=pipeline)
+    print(f"loaded {len(X)} datapoints from {store.path}")
+    return train_predictors(X, y_timing, y_power, timing_path, power_path, feature_schema=_store_schema(pipeline))
+
 
 def test_trained_predictors(timing_predictor, power_predictor):
     """Tests the predictors that were just trained in memory."""
@@ -68,7 +283,9 @@ def test_trained_predictors(timing_predictor, power_predictor):
     print("\n--- TESTING PREDICTORS ---")
     print("testing predictor(s) with new random architecture.")
     test_arch = get_random_architecture()
-    test_features = featurize(test_arch).reshape(1, -1)
+    # featurized the way the models were trained
+    schema = model_feature_schema(timing_predictor if timing_predictor is not None else power_predictor)
+    test_features = pipeline_for_schema(schema).transform_one(test_arch).reshape(1, -1)
 
     print(f"test architecture: {test_arch}")
     print(f"test features: {test_features}")
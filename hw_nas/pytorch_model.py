@@ -0,0 +1,102 @@
+import torch
+import torch.nn as nn
+
+from hw_nas.search_space import Architecture, DEFAULT_BITS
+
+# (weight, activation) fractional bits of the fixed point datapaths (must match datapath<BITS> in ops.h)
+FIXED_POINT_FORMATS = {8: (6, 4), 16: (12, 8)}
+
+def _quantize(x, frac, bits):
+    # integer valued float32, rounded half up and saturated like quantize() in ops.h
+    limit = 2 ** (bits - 1)
+    return torch.clamp(torch.floor(x * 2.0 ** frac + 0.5), -limit, limit - 1)
+
+class _FixedPointLayer:
+    """
+    Inference of a conv / linear layer the way the fixed point HLS kernels
+    compute it: quantized weights and inputs, exact integer sums (float64
+    holds them exactly) starting at the quantized bias, scaled back to float.
+    Parameters stay float, so trained float weights load unchanged.
+    """
+    def _fixed_point(self, x, op):
+        weight_frac, act_frac = FIXED_POINT_FORMATS[self.bits]
+        weight = _quantize(self.weight, weight_frac, self.bits)
+        x = _quantize(x, act_frac, self.bits)
+        bias = torch.floor(self.bias * 2.0 ** (weight_frac + act_frac) + 0.5)
+        acc = op(x.double(), weight.double(), bias.double())
+        return acc.float() * 2.0 ** -(weight_frac + act_frac)
+
+class FixedPointConv2d(_FixedPointLayer, nn.Conv2d):
+    def __init__(self, *args, bits, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bits = bits
+
+    def forward(self, x):
+        return self._fixed_point(x, self._conv_forward)
+
+class FixedPointLinear(_FixedPointLayer, nn.Linear):
+    def __init__(self, *args, bits, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bits = bits
+
+    def forward(self, x):
+        return self._fixed_point(x, nn.functional.linear)
+
+class TranslatedPytorchModel(nn.Module):
+    """
+    Builds a PyTorch model from a valid Architecture object.
+    With quantized conv / linear blocks of less than 32 bits compute like
+    their fixed point HLS kernels (inference only, the rounding has no
+    gradient), same parameters as the float model.
+    """
+    def __init__(self, arch: Architecture, quantized=False):
+        super().__init__()
+        self.layers = nn.ModuleList()
+        self.arch = arch
+
+        for block in arch.blocks:
+            op_type = block.op_type
+            params = block.params
+            bits = params.get('bits', DEFAULT_BITS)
+            fixed_point = quantized and bits in FIXED_POINT_FORMATS
+
+            if op_type == 'conv':
+                conv_kwargs = dict(
+                    in_channels=params['in_channels'],
+                    out_channels=params['out_channels'],
+                    kernel_size=params['kernel_size'],
+                    padding=params['padding'],
+                    stride=params['stride']
+                )
+                self.layers.append(FixedPointConv2d(**conv_kwargs, bits=bits) if fixed_point else nn.Conv2d(**conv_kwargs))
+            elif op_type == 'relu':
+                self.layers.append(nn.ReLU())
+            elif op_type == 'max_pool':
+                self.layers.append(nn.MaxPool2d(
+                    kernel_size=params['kernel_size'],
+                    stride=params['stride']
+                ))
+            elif op_type == 'global_avg_pool':
+                self.layers.append(nn.AdaptiveAvgPool2d((1, 1)))
+            elif op_type == 'flatten':
+                self.layers.append(nn.Flatten())
+            elif op_type == 'linear':
+                linear_kwargs = dict(
+                    in_features=params['in_features'],
+                    out_features=params['out_features']
+                )
+                self.layers.append(FixedPointLinear(**linear_kwargs, bits=bits) if fixed_point else nn.Linear(**linear_kwargs))
+                
+    def forward(self, x):
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+def build_pytorch_model(arch: Architecture, quantized=False):
+    """
+    Public helper function to create a PyTorch model from an Architecture.
+    quantized builds the bit accurate reference of the generated design
+    (load the state_dict of the trained float model into it).
+    """
+    return TranslatedPytorchModel(arch, quantized)
+
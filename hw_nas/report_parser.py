@@ -0,0 +1,275 @@
+import glob
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, asdict, fields
+from typing import Optional
+
+# normalized record written next to the reports (and kept by the synthesis cache)
+METRICS_FILE = "metrics.json"
+# where v++ puts the csynth reports, relative to the build dir (first match wins)
+CSYNTH_REPORT_DIRS = ["top_function/hls/syn/report", "top_function/syn/report", "."]
+
+@dataclass
+class SynthesisMetrics:
+    """
+    Everything we read from one synthesis run. Fields are None when the
+    report is missing or the tool reported no value (e.g. 'undef' latency).
+    """
+    # Vivado, post route (results.txt / timing_report.txt / power_report.txt)
+    wns: Optional[float] = None # ns
+    whs: Optional[float] = None # ns
+    tns: Optional[float] = None # ns
+    power: Optional[float] = None # W, total on-chip
+    # HLS estimates (csynth.xml / csynth.rpt)
+    estimated_clock_ns: Optional[float] = None
+    latency_cycles: Optional[int] = None # worst case
+    interval: Optional[int] = None # initiation interval (cycles), max
+    lut: Optional[int] = None
+    ff: Optional[int] = None
+    dsp: Optional[int] = None
+    bram_18k: Optional[int] = None
+    uram: Optional[int] = None
+    # Vivado, post route utilization (utilization_report.txt)
+    impl_lut: Optional[int] = None
+    impl_ff: Optional[int] = None
+    impl_dsp: Optional[int] = None
+    impl_bram_tiles: Optional[float] = None
+    # Vivado, post synthesis (synth_results.txt / synth_utilization_report.txt of synth.tcl)
+    synth_wns: Optional[float] = None # ns, no routing delays yet
+    synth_lut: Optional[int] = None
+    synth_ff: Optional[int] = None
+    synth_dsp: Optional[int] = None
+    synth_bram_tiles: Optional[float] = None
+    # staged flow bookkeeping (data_collector.run_staged_flow), not report values
+    stage: Optional[str] = None # last stage that finished: 'hls', 'synth' or 'impl'
+    outcome: Optional[str] = None # 'complete', 'stopped', 'rejected' or 'failed'
+    rejection: Optional[str] = None # which limits the design broke
+    stage_seconds: Optional[dict] = None # wall time of every stage that ran
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict, unknown keys are ignored (older/newer records)."""
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    def update(self, **values):
+        """Sets the given fields, None values never overwrite a known one."""
+        for key, value in values.items():
+            if value is not None:
+                setattr(self, key, value)
+        return self
+
+    def values(self, names):
+        """Values of the given fields as floats, NaN where missing."""
+        return [float('nan') if getattr(self, name) is None else float(getattr(self, name)) for name in names]
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+FLOW_FIELDS = ('stage', 'outcome', 'rejection', 'stage_seconds')
+# the numeric report values
+METRIC_NAMES = [field.name for field in fields(SynthesisMetrics) if field.name not in FLOW_FIELDS]
+
+def _number(text, cast=float):
+    """Parses a report cell, None for empty cells and 'N/A', 'undef', '-' etc."""
+    if text is None:
+        return None
+    text = text.strip()
+    match = re.match(r'^[-+]?\d+(\.\d*)?([eE][-+]?\d+)?', text)
+    if not match:
+        return None
+    value = float(match.group(0))
+    return int(value) if cast is int else value
+
+def _read(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', errors='replace') as f:
+        return f.read()
+
+def parse_results_file(path):
+    """results.txt of build.tcl: {'wns', 'whs', 'power'} (values may be None)."""
+    content = _read(path)
+    result = {}
+    if content is None:
+        return result
+    for key, name in (('WNS', 'wns'), ('WHS', 'whs'), ('Power', 'power')):
+        match = re.search(rf'^{key}:\s*(\S+)', content, re.MULTILINE)
+        if match:
+            result[name] = _number(match.group(1))
+    return result
+
+def parse_timing_report(path):
+    """Design Timing Summary of report_timing_summary: {'wns', 'tns', 'whs'}."""
+    content = _read(path)
+    if content is None:
+        return {}
+    lines = content.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith('WNS(ns)'):
+            headers = re.split(r'\s{2,}', line.strip())
+            # the values follow the '-------' underline
+            for values_line in lines[i + 1:i + 4]:
+                values = values_line.split()
+                if not values or set(values[0]) == {'-'}:
+                    continue
+                row = dict(zip(headers, values))
+                return {
+                    'wns': _number(row.get('WNS(ns)')),
+                    'tns': _number(row.get('TNS(ns)')),
+                    'whs': _number(row.get('WHS(ns)')),
+                }
+            break
+
+    # the stub and older flows only write "WNS(ns) <value>" lines
+    result = {}
+    for key, name in (('WNS', 'wns'), ('TNS', 'tns'), ('WHS', 'whs')):
+        match = re.search(rf'^\s*{key}\(ns\)\s+([-+\d.eE]+)\s*$', content, re.MULTILINE)
+        if match:
+            result[name] = _number(match.group(1))
+    return result
+
+def parse_power_report(path):
+    """report_power output: {'power'} (total on-chip, W)."""
+    content = _read(path)
+    if content is None:
+        return {}
+    match = re.search(r'\|\s*Total On-Chip Power \(W\)\s*\|\s*([\d.]+)', content, re.IGNORECASE)
+    return {'power': _number(match.group(1))} if match else {}
+
+def _table_row(content, label_pattern):
+    """Cells of the first '| label | ... |' table row whose label matches."""
+    for line in content.splitlines():
+        if not line.lstrip().startswith('|'):
+            continue
+        cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+        if cells and re.fullmatch(label_pattern, cells[0]):
+            return cells
+    return None
+
+def parse_utilization_report(path, prefix='impl_'):
+    """
+    report_utilization output: LUT/FF/DSP/BRAM usage, keys prefixed with
+    prefix ('impl_' post route, 'synth_' post synthesis).
+    """
+    content = _read(path)
+    if content is None:
+        return {}
+    result = {}
+    for name, label in (
+        ('lut', r'(CLB|Slice) LUTs\*?'),
+        ('ff', r'(CLB|Slice) Registers'),
+        ('bram_tiles', r'Block RAM Tile'),
+        ('dsp', r'DSPs'),
+    ):
+        cells = _table_row(content, label)
+        if cells and len(cells) > 1:
+            result[prefix + name] = _number(cells[1], float if name == 'bram_tiles' else int)
+    return result
+
+def parse_csynth_xml(path):
+    """csynth.xml of Vitis HLS: clock estimate, latency, II and resource estimates."""
+    if not os.path.exists(path):
+        return {}
+    root = ET.parse(path).getroot()
+
+    def text(xpath):
+        node = root.find(xpath)
+        return node.text if node is not None else None
+
+    return {
+        'estimated_clock_ns': _number(text('PerformanceEstimates/SummaryOfTimingAnalysis/EstimatedClockPeriod')),
+        'latency_cycles': _number(text('PerformanceEstimates/SummaryOfOverallLatency/Worst-caseLatency'), int),
+        'interval': _number(text('PerformanceEstimates/SummaryOfOverallLatency/Interval-max'), int),
+        'lut': _number(text('AreaEstimates/Resources/LUT'), int),
+        'ff': _number(text('AreaEstimates/Resources/FF'), int),
+        'dsp': _number(text('AreaEstimates/Resources/DSP'), int),
+        'bram_18k': _number(text('AreaEstimates/Resources/BRAM_18K'), int),
+        'uram': _number(text('AreaEstimates/Resources/URAM'), int),
+    }
+
+def parse_csynth_rpt(path):
+    """Text csynth.rpt, same fields as parse_csynth_xml (used when there is no xml)."""
+    content = _read(path)
+    if content is None:
+        return {}
+    result = {}
+
+    cells = _table_row(content, r'ap_clk')
+    if cells and len(cells) > 2:
+        result['estimated_clock_ns'] = _number(cells[2])
+
+    # latency summary: first row with numbers (or '?') below the '(cycles)' header
+    lines = content.splitlines()
+    for i, line in enumerate(lines):
+        if 'Latency (cycles)' in line:
+            for row in lines[i + 1:i + 6]:
+                cells = [cell.strip() for cell in row.strip().strip('|').split('|')]
+                if row.lstrip().startswith('|') and cells and re.fullmatch(r'\d+|\?', cells[0]):
+                    result['latency_cycles'] = _number(cells[1], int)
+                    result['interval'] = _number(cells[5], int) if len(cells) > 5 else None
+                    break
+            break
+
+    header = _table_row(content, r'Name')
+    total = _table_row(content, r'Total')
+    if header and total:
+        columns = dict(zip(header, total))
+        for name, column in (('bram_18k', 'BRAM_18K'), ('dsp', 'DSP'), ('ff', 'FF'), ('lut', 'LUT'), ('uram', 'URAM')):
+            result[name] = _number(columns.get(column), int)
+    return result
+
+def find_csynth_report(build_dir, extension):
+    """Path of the top level csynth.<extension> below build_dir, or None."""
+    for report_dir in CSYNTH_REPORT_DIRS:
+        path = os.path.join(build_dir, report_dir, f"csynth.{extension}")
+        if os.path.exists(path):
+            return path
+    matches = glob.glob(os.path.join(build_dir, "**", f"csynth.{extension}"), recursive=True)
+    return min(matches, key=len) if matches else None
+
+def parse_build_dir(build_dir):
+    """
+    Collects every metric from the reports of one build dir into a
+    SynthesisMetrics. results.txt wins over timing_report.txt for WNS/WHS
+    (both come from the same run), csynth.xml over csynth.rpt.
+    """
+    metrics = SynthesisMetrics()
+    metrics.update(**parse_timing_report(os.path.join(build_dir, "timing_report.txt")))
+    metrics.update(**parse_power_report(os.path.join(build_dir, "power_report.txt")))
+    metrics.update(**parse_results_file(os.path.join(build_dir, "results.txt")))
+    metrics.update(**parse_utilization_report(os.path.join(build_dir, "utilization_report.txt")))
+    synth_results = parse_results_file(os.path.join(build_dir, "synth_results.txt"))
+    metrics.update(synth_wns=synth_results.get('wns'))
+    metrics.update(**parse_utilization_report(os.path.join(build_dir, "synth_utilization_report.txt"), prefix='synth_'))
+
+    xml_path = find_csynth_report(build_dir, "xml")
+    if xml_path is not None:
+        try:
+            metrics.update(**parse_csynth_xml(xml_path))
+        except ET.ParseError as e:
+            print(f"WARN: Could not parse {xml_path}: {e}")
+            xml_path = None
+    if xml_path is None:
+        rpt_path = find_csynth_report(build_dir, "rpt")
+        if rpt_path is not None:
+            metrics.update(**parse_csynth_rpt(rpt_path))
+    return metrics
+
+def read_metrics(build_dir):
+    """metrics.json of a build dir if present (e.g. restored from the cache), else parses the reports."""
+    path = os.path.join(build_dir, METRICS_FILE)
+    if os.path.exists(path):
+        return SynthesisMetrics.load(path)
+    return parse_build_dir(build_dir)
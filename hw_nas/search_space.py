@@ -1,7 +1,6 @@
 import random
-import torch
-import torch.nn as nn
 import math
+import numpy as np
 
 # generic ops list
 OPS = [
@@ -12,25 +11,181 @@ OPS = [
     'linear',
 ]
 
+# every op a block can hold, the index is the integer op code
+BLOCK_OPS = OPS + ['flatten']
+OP_CODES = {op: code for code, op in enumerate(BLOCK_OPS)}
+
+# fixed width block encoding: [op code, value of each PARAM_KEYS entry]
+PARAM_KEYS = ['in_channels', 'out_channels', 'kernel_size', 'padding', 'stride', 'in_features', 'out_features',
+              'pipeline_ii', 'unroll', 'bits']
+BLOCK_WIDTH = 1 + len(PARAM_KEYS)
+ARCH_DTYPE = np.int32
+PARAM_MISSING = -1 # param not set for this block
+PADDING_SAME = -2 # padding == 'same'
+
+# search space choices, shared by get_random_architecture and the search mutations
+KERNEL_SIZES = [3, 5]
+CHANNEL_MULTIPLIERS = [1, 2, 4]
+MAX_CHANNELS = 128
+STRIDES = [1, 2]
+MIN_DOWNSAMPLE_SIZE = 4 # no stride 2 conv or pooling at or below this spatial size
+LINEAR_FEATURES = [128, 256, 512]
+OUTPUT_FEATURES = 128
+# HLS parallelism knobs of conv and linear blocks (template parameters of the hls_vivado/src/ops.h kernels):
+# initiation interval of the pipelined MAC loop, output channels / features computed in parallel
+PIPELINE_IIS = [1, 2, 4]
+UNROLL_FACTORS = [1, 2, 4, 8]
+# datapath precision of conv and linear blocks: 8 / 16 bit fixed point MACs, 32 is float
+BIT_WIDTHS = [8, 16, 32]
+# knob values of blocks that do not set them (e.g. architectures sampled before the knobs existed)
+DEFAULT_PIPELINE_II = 1
+DEFAULT_UNROLL = 1
+DEFAULT_BITS = 32
+
+_PARAM_COLUMNS = {key: column for column, key in enumerate(PARAM_KEYS, 1)}
+
+def _encode_params(op_type, params):
+    """Encodes one block into its fixed width integer row."""
+    code = OP_CODES.get(op_type)
+    if code is None:
+        raise ValueError(f"Unknown op type: {op_type}")
+
+    row = [code] + [PARAM_MISSING] * len(PARAM_KEYS)
+    for key, value in params.items():
+        column = _PARAM_COLUMNS.get(key)
+        if column is None:
+            raise ValueError(f"Unsupported param {key} for {op_type}")
+        if value == 'same' and key == 'padding':
+            value = PADDING_SAME
+        elif not isinstance(value, (int, np.integer)) or value < 0:
+            raise ValueError(f"Param {key} of {op_type} must be a non-negative int, got {value!r}")
+        row[column] = int(value)
+    return tuple(row)
+
+def _decode_params(row):
+    """Inverse of _encode_params, returns the params dict of a row."""
+    params = {}
+    for key, value in zip(PARAM_KEYS, row[1:]):
+        if value == PARAM_MISSING:
+            continue
+        params[key] = 'same' if value == PADDING_SAME else int(value)
+    return params
+
 class NetworkBlock:
+    """
+    One layer of an Architecture, stored as a fixed width row of ints.
+    params is decoded on first access and should be treated as read only.
+    """
+    __slots__ = ('row', '_params')
+
     def __init__(self, op_type, params):
-        self.op_type = op_type # e.g. 'conv', 'relu', 'linear'
-        self.params = params # e.g. {'in_channels': 3, 'out_channels': 32, 'kernel_size': 3, 'padding': 1}
+        self.row = _encode_params(op_type, params) # e.g. (0, 3, 32, 3, -2, 1, -1, -1, 1, 4, 8) for a conv
+        self._params = dict(params)
+
+    @classmethod
+    def from_row(cls, row):
+        block = cls.__new__(cls)
+        block.row = tuple(int(v) for v in row)
+        block._params = None
+        return block
+
+    @property
+    def op_code(self):
+        return self.row[0]
+
+    @property
+    def op_type(self):
+        return BLOCK_OPS[self.row[0]] # e.g. 'conv', 'relu', 'linear'
+
+    @property
+    def params(self):
+        if self._params is None:
+            self._params = _decode_params(self.row) # e.g. {'in_channels': 3, 'out_channels': 32, 'kernel_size': 3, 'padding': 1}
+        return self._params
+
+    def __eq__(self, other):
+        return isinstance(other, NetworkBlock) and self.row == other.row
+
+    def __hash__(self):
+        return hash(self.row)
     
     def __repr__(self):
         return f"Block({self.op_type}, {self.params})"
 
 class Architecture:
+    """
+    Sequence of blocks backed by one read only (num_blocks, BLOCK_WIDTH)
+    int32 array. Hashable and comparable by value, pickles as raw bytes.
+    """
+    __slots__ = ('array', '_blocks', '_hash')
+
     def __init__(self, blocks):
-        self.blocks = blocks
+        blocks = list(blocks)
+        array = np.array([block.row for block in blocks], dtype=ARCH_DTYPE).reshape(-1, BLOCK_WIDTH)
+        array.flags.writeable = False
+        self.array = array
+        self._blocks = blocks
+        self._hash = None
+
+    @classmethod
+    def from_array(cls, array):
+        """Wraps an encoded (num_blocks, BLOCK_WIDTH) array, without copying when possible."""
+        array = np.ascontiguousarray(array, dtype=ARCH_DTYPE).reshape(-1, BLOCK_WIDTH)
+        if array.flags.writeable:
+            array = array.view()
+            array.flags.writeable = False
+        arch = cls.__new__(cls)
+        arch.array = array
+        arch._blocks = None
+        arch._hash = None
+        return arch
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Zero copy view on bytes produced by to_bytes (or any buffer)."""
+        return cls.from_array(np.frombuffer(data, dtype=ARCH_DTYPE))
+
+    def to_bytes(self):
+        return self.array.tobytes()
+
+    @classmethod
+    def from_list(cls, blocks):
+        """Builds an Architecture from the dict based [[op_type, params], ...] form."""
+        return cls([NetworkBlock(op_type, params) for op_type, params in blocks])
+
+    def to_list(self):
+        """Dict based [[op_type, params], ...] form, e.g. for JSON."""
+        return [[block.op_type, dict(block.params)] for block in self.blocks]
+
+    @property
+    def blocks(self):
+        if self._blocks is None:
+            self._blocks = [NetworkBlock.from_row(row) for row in self.array.tolist()]
+        return self._blocks
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __eq__(self, other):
+        return isinstance(other, Architecture) and self.array.shape == other.array.shape \
+            and self.to_bytes() == other.to_bytes()
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.to_bytes())
+        return self._hash
+
+    def __reduce__(self):
+        return (Architecture.from_bytes, (self.to_bytes(),))
     
     def __repr__(self):
         return " -> ".join([str(b) for b in self.blocks])
 
-def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
+def get_random_architecture(max_depth=8, input_channels=3, input_size=32, rng=random):
     """
     Generates a random valid architecture using a
     stage based process (Stem -> Head -> Classifier).
+    rng is the random source (module random or a seeded random.Random).
     """
     blocks = []
     
@@ -40,24 +195,24 @@ def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
     current_features = 0 # For linear layers
 
     # 1. Phase, convolutional stem with activations and pooling
-    num_conv_layers = random.randint(2, max_depth - 3)
+    num_conv_layers = rng.randint(2, max_depth - 3)
     
     for _ in range(num_conv_layers):
         possible_ops = ['conv', 'conv', 'relu', 'max_pool'] # bias towards conv
-        op = random.choice(possible_ops)
+        op = rng.choice(possible_ops)
         
         # --- Add conv block ---
         if op == 'conv':
-            kernel_size = random.choice([3, 5])
+            kernel_size = rng.choice(KERNEL_SIZES)
             # ensure channels generally increase or stay the same
-            out_channels = random.choice([current_channels, current_channels * 2, current_channels * 4])
+            out_channels = current_channels * rng.choice(CHANNEL_MULTIPLIERS)
             # cap the number of channels
-            out_channels = min(out_channels, 128) 
+            out_channels = min(out_channels, MAX_CHANNELS) 
             
-            stride = random.choice([1, 2])
+            stride = rng.choice(STRIDES)
             
             # dont stride for small images
-            if current_size <= 4 and stride == 2:
+            if current_size <= MIN_DOWNSAMPLE_SIZE and stride == 2:
                 stride = 1
                 
             if stride == 1:
@@ -72,7 +227,10 @@ def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
                 'out_channels': out_channels,
                 'kernel_size': kernel_size,
                 'padding': padding,
-                'stride': stride
+                'stride': stride,
+                'pipeline_ii': rng.choice(PIPELINE_IIS),
+                'unroll': rng.choice(UNROLL_FACTORS),
+                'bits': rng.choice(BIT_WIDTHS)
             }
             blocks.append(NetworkBlock(op, params))
             
@@ -93,7 +251,7 @@ def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
         # add Max Pool
         elif op == 'max_pool':
             # dont pool for small images
-            if current_size <= 4:
+            if current_size <= MIN_DOWNSAMPLE_SIZE:
                 continue
                 
             kernel_size = 2
@@ -119,21 +277,24 @@ def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
     current_features = in_features
 
     # 3. Phase, fully connected layers
-    num_linear_layers = random.randint(1, 2)
+    num_linear_layers = rng.randint(1, 2)
     
     for i in range(num_linear_layers):
         # add ReLU before the linear layer (as an activation) but not before the very first linear layer
         if i > 0:
             blocks.append(NetworkBlock('relu', {}))
             
-        out_features = random.choice([128, 256, 512])
+        out_features = rng.choice(LINEAR_FEATURES)
         # ensure last layer is smaller
         if i == num_linear_layers - 1:
-             out_features = 128
+             out_features = OUTPUT_FEATURES
              
         params = {
             'in_features': current_features,
-            'out_features': out_features
+            'out_features': out_features,
+            'pipeline_ii': rng.choice(PIPELINE_IIS),
+            'unroll': rng.choice(UNROLL_FACTORS),
+            'bits': rng.choice(BIT_WIDTHS)
         }
         blocks.append(NetworkBlock('linear', params))
         
@@ -143,53 +304,10 @@ def get_random_architecture(max_depth=8, input_channels=3, input_size=32):
     return Architecture(blocks)
 
 
-
-class TranslatedPytorchModel(nn.Module):
-    """
-    Builds a PyTorch model from a valid Architecture object.
-    """
-    def __init__(self, arch: Architecture):
-        super().__init__()
-        self.layers = nn.ModuleList()
-        self.arch = arch
-
-        for block in arch.blocks:
-            op_type = block.op_type
-            params = block.params
-            
-            if op_type == 'conv':
-                self.layers.append(nn.Conv2d(
-                    in_channels=params['in_channels'],
-                    out_channels=params['out_channels'],
-                    kernel_size=params['kernel_size'],
-                    padding=params['padding'],
-                    stride=params['stride']
-                ))
-            elif op_type == 'relu':
-                self.layers.append(nn.ReLU())
-            elif op_type == 'max_pool':
-                self.layers.append(nn.MaxPool2d(
-                    kernel_size=params['kernel_size'],
-                    stride=params['stride']
-                ))
-            elif op_type == 'global_avg_pool':
-                self.layers.append(nn.AdaptiveAvgPool2d((1, 1)))
-            elif op_type == 'flatten':
-                self.layers.append(nn.Flatten())
-            elif op_type == 'linear':
-                self.layers.append(nn.Linear(
-                    in_features=params['in_features'],
-                    out_features=params['out_features']
-                ))
-                
-    def forward(self, x):
-        for layer in self.layers:
-            x = layer(x)
-        return x
-
-def build_pytorch_model(arch: Architecture):
-    """
-    Public helper function to create a PyTorch model from an Architecture.
-    """
-    return TranslatedPytorchModel(arch)
-
+def __getattr__(name):
+    # the torch model builder lives in hw_nas.pytorch_model, imported on first
+    # use so sampling and featurization never pay for importing torch
+    if name in ('TranslatedPytorchModel', 'build_pytorch_model'):
+        from hw_nas import pytorch_model
+        return getattr(pytorch_model, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
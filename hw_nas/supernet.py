@@ -0,0 +1,188 @@
+import itertools
+import random
+import time
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from hw_nas.search_space import (
+    get_random_architecture, KERNEL_SIZES, MAX_CHANNELS, LINEAR_FEATURES, OUTPUT_FEATURES,
+)
+from hw_nas.pytorch_model import build_pytorch_model
+
+MAX_KERNEL_SIZE = max(KERNEL_SIZES)
+MAX_HIDDEN_FEATURES = max(LINEAR_FEATURES)
+MAX_HIDDEN_LINEARS = 1 # get_random_architecture draws 1 or 2 linear blocks, the last one is the classifier
+# training batches whose conv output statistics are folded into the weights of a sub-network
+CALIBRATION_BATCHES = 8
+BN_EPS = 1e-5
+
+class Supernet(nn.Module):
+    """
+    Weight sharing one-shot model over the search space. The n-th conv
+    block of every architecture uses slot n, a MAX_CHANNELS x MAX_CHANNELS
+    x MAX_KERNEL_SIZE^2 weight: a conv with in / out channels and kernel k
+    is the [:out, :in] slice with the centered k x k window. Hidden linear
+    and classifier blocks slice their slot the same way, relu / pooling
+    have no weights. Covers architectures with up to max_depth - 3 convs
+    (the stem of get_random_architecture(max_depth)).
+
+    Slices are scaled by sqrt(slot fan in / block fan in), so every choice
+    starts at the init scale of its own shape, and conv outputs are batch
+    normalized (the paths differ too much in scale to share weights
+    without). Sub-networks fold the normalization into their conv weights,
+    see subnet_state_dict.
+    """
+    def __init__(self, max_depth=8, input_channels=3):
+        super().__init__()
+        self.max_depth = max_depth
+        self.input_channels = input_channels
+        self.conv_weights = nn.ParameterList(
+            nn.Parameter(torch.empty(MAX_CHANNELS, MAX_CHANNELS, MAX_KERNEL_SIZE, MAX_KERNEL_SIZE))
+            for _ in range(max_depth - 3)
+        )
+        for weight in self.conv_weights:
+            nn.init.kaiming_uniform_(weight, a=5 ** 0.5) # nn.Conv2d init
+        self.hidden = nn.ModuleList(nn.Linear(MAX_CHANNELS, MAX_HIDDEN_FEATURES) for _ in range(MAX_HIDDEN_LINEARS))
+        self.classifier = nn.Linear(max(MAX_CHANNELS, MAX_HIDDEN_FEATURES), OUTPUT_FEATURES)
+
+    def _slices(self, arch):
+        """{block index: (weight, bias)} of the conv / linear blocks of arch (convs have no bias). Raises ValueError if arch is not covered."""
+        convs = [i for i, block in enumerate(arch.blocks) if block.op_type == 'conv']
+        linears = [i for i, block in enumerate(arch.blocks) if block.op_type == 'linear']
+        if len(convs) > len(self.conv_weights):
+            raise ValueError(f"{len(convs)} conv blocks, the supernet covers at most {len(self.conv_weights)}")
+        if not linears or len(linears) - 1 > len(self.hidden):
+            raise ValueError(f"{len(linears)} linear blocks, the supernet covers 1 to {len(self.hidden) + 1}")
+
+        slices = {}
+        for slot, i in enumerate(convs):
+            params = arch.blocks[i].params
+            in_channels, out_channels, k = params['in_channels'], params['out_channels'], params['kernel_size']
+            if k not in KERNEL_SIZES or max(in_channels, out_channels) > MAX_CHANNELS:
+                raise ValueError(f"conv block {i} ({params}) is outside the supernet choices")
+            start = (MAX_KERNEL_SIZE - k) // 2
+            weight = self.conv_weights[slot][:out_channels, :in_channels, start:start + k, start:start + k]
+            scale = (MAX_CHANNELS * MAX_KERNEL_SIZE ** 2 / (in_channels * k * k)) ** 0.5
+            slices[i] = (weight * scale, None)
+        for slot, i in enumerate(linears):
+            params = arch.blocks[i].params
+            layer = self.classifier if i == linears[-1] else self.hidden[slot]
+            in_features, out_features = params['in_features'], params['out_features']
+            if in_features > layer.in_features or out_features > layer.out_features:
+                raise ValueError(f"linear block {i} ({params}) is outside the supernet choices")
+            scale = (layer.in_features / in_features) ** 0.5
+            slices[i] = (layer.weight[:out_features, :in_features] * scale, layer.bias[:out_features])
+        return slices
+
+    def forward(self, x, arch, statistics=None):
+        """
+        Forward pass of the sub-network of arch on the shared weights, conv
+        outputs normalized with the statistics of the batch. statistics
+        (a dict) accumulates those per conv block: (count, sum, sum of squares).
+        """
+        slices = self._slices(arch)
+        for i, block in enumerate(arch.blocks):
+            params = block.params
+            if block.op_type == 'conv':
+                x = F.conv2d(x, slices[i][0], stride=params['stride'], padding=params['padding'])
+                if statistics is not None:
+                    count, total, squares = statistics.get(i, (0, 0.0, 0.0))
+                    statistics[i] = (count + x.numel() // x.shape[1], total + x.sum((0, 2, 3)),
+                                     squares + (x * x).sum((0, 2, 3)))
+                x = F.batch_norm(x, None, None, training=True, eps=BN_EPS)
+            elif block.op_type == 'relu':
+                x = F.relu(x)
+            elif block.op_type == 'max_pool':
+                x = F.max_pool2d(x, params['kernel_size'], params['stride'])
+            elif block.op_type == 'global_avg_pool':
+                x = F.adaptive_avg_pool2d(x, 1)
+            elif block.op_type == 'flatten':
+                x = x.flatten(1)
+            elif block.op_type == 'linear':
+                x = F.linear(x, *slices[i])
+        return x
+
+    def subnet_state_dict(self, arch, calibration):
+        """
+        Inherited weights of arch, keyed like the state_dict of
+        build_pytorch_model(arch). The conv normalization is folded into the
+        conv weights / biases, with the statistics of the calibration input
+        batches (a few training batches, the same for every architecture).
+        """
+        statistics = {}
+        state = {}
+        with torch.no_grad():
+            for inputs in calibration:
+                self(inputs, arch, statistics)
+            for i, (weight, bias) in self._slices(arch).items():
+                if bias is None:
+                    count, total, squares = statistics[i]
+                    mean = total / count
+                    inv_std = (squares / count - mean * mean + BN_EPS).rsqrt()
+                    weight = weight * inv_std.view(-1, 1, 1, 1)
+                    bias = -mean * inv_std
+                state[f"layers.{i}.weight"] = weight.detach().clone()
+                state[f"layers.{i}.bias"] = bias.detach().clone()
+        return state
+
+    def build_subnet(self, arch, calibration, quantized=False):
+        """Standalone TranslatedPytorchModel of arch with the inherited weights (e.g. to fine tune or export)."""
+        model = build_pytorch_model(arch, quantized)
+        model.load_state_dict(self.subnet_state_dict(arch, calibration))
+        return model
+
+def calibration_batches(loader, num_batches=CALIBRATION_BATCHES):
+    """The first num_batches input batches of loader, to calibrate every sub-network on the same data."""
+    return [inputs for inputs, _ in itertools.islice(loader, num_batches)]
+
+def train_supernet(supernet, train_loader, epochs=1, learning_rate=1e-3, input_size=32, seed=0):
+    """
+    Trains supernet with Adam, every batch on the path of a freshly sampled
+    get_random_architecture (only that sub-network gets gradients).
+    Returns the mean loss of the last epoch.
+    """
+    rng = random.Random(seed)
+    torch.manual_seed(seed)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(supernet.parameters(), lr=learning_rate)
+    supernet.train()
+    mean_loss = None
+    for epoch in range(epochs):
+        start_time = time.time()
+        total_loss = 0.0
+        num_batches = 0
+        for inputs, labels in train_loader:
+            arch = get_random_architecture(supernet.max_depth, supernet.input_channels, input_size, rng=rng)
+            optimizer.zero_grad()
+            loss = criterion(supernet(inputs, arch), labels)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+            num_batches += 1
+        mean_loss = total_loss / max(1, num_batches)
+        print(f"supernet epoch {epoch + 1}/{epochs}: mean loss {mean_loss:.3f} ({time.time() - start_time:.1f}s)")
+    return mean_loss
+
+def evaluate_architectures(supernet, archs, test_loader, calibration, quantized=False):
+    """
+    Test accuracy (%) of every architecture with its inherited weights
+    (build_subnet on the calibration batches), one validation pass each
+    and no training. None for architectures the supernet does not cover.
+    """
+    accuracies = []
+    for arch in archs:
+        try:
+            model = supernet.build_subnet(arch, calibration, quantized).eval()
+        except ValueError as e:
+            print(f"WARN: {e}")
+            accuracies.append(None)
+            continue
+        correct = 0
+        total = 0
+        with torch.no_grad():
+            for inputs, labels in test_loader:
+                correct += (model(inputs).argmax(1) == labels).sum().item()
+                total += len(labels)
+        accuracies.append(100 * correct / total)
+    return accuracies
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+# report files kept per cache entry (relative to the build dir)
+CACHED_REPORT_FILES = ["results.txt", "timing_report.txt", "power_report.txt", "utilization_report.txt", "metrics.json"]
+META_FILE = "meta.json"
+# staged flow outcomes without WNS / power, they depend on the flow settings
+PARTIAL_OUTCOMES = ("rejected", "stopped")
+
+def architecture_key_string(arch):
+    """Canonical string form of an Architecture (stable param order)."""
+    return json.dumps(
+        [[block.op_type, block.params] for block in arch.blocks],
+        sort_keys=True, separators=(',', ':')
+    )
+
+def compute_cache_key(arch, input_files):
+    """
+    Content hash of an architecture plus every file that influences the
+    synthesis result (generated design, ops, HLS config, Vivado script).
+    """
+    h = hashlib.sha256()
+    h.update(architecture_key_string(arch).encode())
+    for path in input_files:
+        # name + content, so renaming or swapping inputs changes the key
+        h.update(b"\0" + os.path.basename(path).encode() + b"\0")
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+class SynthesisCache:
+    """
+    On-disk, content-addressed cache of synthesis results.
+    Each entry is a directory <cache_dir>/<key[:2]>/<key>/ holding the report
+    files and a meta.json with WNS, power and the outcome. Designs the staged
+    flow rejected or stopped early are cached too, together with the flow
+    settings (stop stage, limits) that decided it. Least recently used
+    entries are evicted once the total size grows beyond max_bytes.
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock() # parallel collection shares one cache
+        self._index = {} # key -> [size_bytes, last_access]
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _load_index(self):
+        """Rebuilds the in-memory size/access index from the cache dir."""
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                meta_path = os.path.join(entry_dir, META_FILE)
+                if not os.path.exists(meta_path):
+                    continue # partial entry, ignored
+                size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+                self._index[key] = [size, os.path.getmtime(meta_path)]
+
+    def lookup(self, key, restore_dir=None, flow=None):
+        """
+        Returns (wns, power, outcome) for a cached key, or None on a miss.
+        A rejected / stopped entry is only a hit for the same flow settings
+        it was stored with (another stop stage or limits may end differently).
+        On a hit the cached report files are copied into restore_dir.
+        """
+        with self._lock:
+            entry_dir = self._entry_dir(key)
+            meta_path = os.path.join(entry_dir, META_FILE)
+            if key not in self._index or not os.path.exists(meta_path):
+                self._index.pop(key, None)
+                self.misses += 1
+                return None
+
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            # entries from before outcomes were stored are all complete runs
+            outcome = meta.get("outcome", "complete")
+            if outcome in PARTIAL_OUTCOMES and meta.get("flow") != flow:
+                self.misses += 1
+                return None
+
+            if restore_dir is not None:
+                os.makedirs(restore_dir, exist_ok=True)
+                for name in meta["files"]:
+                    shutil.copy2(os.path.join(entry_dir, name), os.path.join(restore_dir, name))
+
+            # mark as recently used
+            now = time.time()
+            os.utime(meta_path, (now, now))
+            self._index[key][1] = now
+            self.hits += 1
+            return meta["wns"], meta["power"], outcome
+
+    def store(self, key, build_dir, wns, power, outcome="complete", flow=None):
+        """
+        Stores the results and report files (metrics.json included) of a
+        finished synthesis run. flow identifies the settings a rejected /
+        stopped outcome depends on, see lookup.
+        """
+        with self._lock:
+            entry_dir = self._entry_dir(key)
+            tmp_dir = f"{entry_dir}.tmp{os.getpid()}_{threading.get_ident()}"
+            os.makedirs(tmp_dir, exist_ok=True)
+
+            files = []
+            for name in CACHED_REPORT_FILES:
+                src = os.path.join(build_dir, name)
+                if os.path.exists(src):
+                    shutil.copy2(src, os.path.join(tmp_dir, name))
+                    files.append(name)
+
+            meta = {"wns": wns, "power": power, "outcome": outcome, "files": files, "created": time.time()}
+            if outcome in PARTIAL_OUTCOMES:
+                meta["flow"] = flow
+            with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+                json.dump(meta, f)
+
+            # swap in the complete entry so readers never see a partial one
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.rename(tmp_dir, entry_dir)
+
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            self._index[key] = [size, time.time()]
+            self._evict()
+
+    def _evict(self):
+        """Drops least recently used entries until the cache fits max_bytes."""
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del self._index[key]
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Returns hit/miss counters and the current cache size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "size_bytes": sum(size for size, _ in self._index.values()),
+            }
@@ -2,7 +2,10 @@
 import os
 
 def read_vivado_results(results_file_path='./build/results.txt'):
-    """reads WNS, WHS, and power from the Vivado generated results.txt file."""
+    """
+    reads WNS, WHS, and power from the Vivado generated results.txt file.
+    (hw_nas.report_parser reads every metric of a build, incl. WHS, latency and resources)
+    """
     wns = None
     whs = None # currently unused
     power = None
@@ -0,0 +1,103 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Tuple
+import numpy as np
+
+# every tensor starts on a 64 byte boundary (one 512 bit AXI beat), so the
+# m_axi bursts of a layer never straddle the previous tensor
+WEIGHT_ALIGNMENT = 16 # float32 values
+# layers with at most this many parameter bytes (weights + bias) become on chip
+# constant arrays in generated designs, bigger ones are read over m_axi
+EMBED_WEIGHTS_MAX_BYTES = 16 * 1024
+BLOB_FILE = "weights.bin"
+TABLE_FILE = "weights.json"
+
+@dataclass
+class WeightEntry:
+    """One tensor of the blob, offset and size in float32 values."""
+    name: str # state_dict key, e.g. 'layers.0.weight'
+    offset: int
+    size: int
+    shape: Tuple[int, ...]
+
+class WeightBlob:
+    """
+    All parameters of a model packed into one float32 array, every tensor
+    aligned to alignment values (zero padding in between), with an offset
+    table by state_dict key. data is what generated designs read through
+    their weights_gmem port.
+    """
+    def __init__(self, data, entries: List[WeightEntry], alignment=WEIGHT_ALIGNMENT):
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.entries = list(entries)
+        self.alignment = alignment
+        self._by_name = {entry.name: entry for entry in self.entries}
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def entry(self, name):
+        if name not in self._by_name:
+            raise KeyError(f"no tensor {name!r} in the weight blob")
+        return self._by_name[name]
+
+    def tensor(self, name):
+        """Values of one tensor (a view on data) in its original shape."""
+        entry = self.entry(name)
+        return self.data[entry.offset:entry.offset + entry.size].reshape(entry.shape)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def save(self, path):
+        """Writes the blob (raw little endian float32) and its offset table into directory path."""
+        os.makedirs(path, exist_ok=True)
+        self.data.astype('<f4').tofile(os.path.join(path, BLOB_FILE))
+        # table last, it marks a complete export
+        tmp_table = os.path.join(path, TABLE_FILE + ".tmp")
+        with open(tmp_table, "w") as f:
+            json.dump({
+                "alignment": self.alignment,
+                "num_values": int(self.data.size),
+                "entries": [
+                    {"name": e.name, "offset": e.offset, "size": e.size, "shape": list(e.shape)}
+                    for e in self.entries
+                ],
+            }, f, indent=2)
+        os.replace(tmp_table, os.path.join(path, TABLE_FILE))
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, TABLE_FILE)) as f:
+            table = json.load(f)
+        data = np.fromfile(os.path.join(path, BLOB_FILE), dtype='<f4')
+        if data.size != table["num_values"]:
+            raise ValueError(f"{path}: blob holds {data.size} values, the offset table expects {table['num_values']}")
+        entries = [WeightEntry(e["name"], e["offset"], e["size"], tuple(e["shape"])) for e in table["entries"]]
+        return cls(data, entries, table["alignment"])
+
+def _to_numpy(value):
+    # torch tensors without importing torch
+    if hasattr(value, 'detach'):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=np.float32)
+
+def pack_state_dict(state_dict, alignment=WEIGHT_ALIGNMENT):
+    """
+    Packs the state_dict of a (trained) TranslatedPytorchModel into a
+    WeightBlob, tensors in state_dict order.
+    """
+    tensors = [(name, _to_numpy(value)) for name, value in state_dict.items()]
+    entries = []
+    offset = 0
+    for name, tensor in tensors:
+        offset = -(-offset // alignment) * alignment
+        entries.append(WeightEntry(name, offset, int(tensor.size), tuple(tensor.shape)))
+        offset += tensor.size
+
+    data = np.zeros(offset, dtype=np.float32)
+    for entry, (_, tensor) in zip(entries, tensors):
+        data[entry.offset:entry.offset + entry.size] = tensor.ravel()
+    return WeightBlob(data, entries, alignment)
@@ -0,0 +1,122 @@
+import copy
+import numpy as np
+import torch
+import torch.nn as nn
+
+from hw_nas.pytorch_model import build_pytorch_model
+
+# training free accuracy proxies, higher is better for all of them
+PROXIES = ("synflow", "naswot", "grad_norm", "params")
+
+def param_count(model):
+    return sum(p.numel() for p in model.parameters())
+
+def synflow(model, input_shape):
+    """
+    SynFlow: sum of |theta * dR/dtheta| with R the summed output of the
+    model with |theta| for a single all ones input (data independent). On
+    a float64 copy, model is not changed.
+    """
+    model = copy.deepcopy(model).double().eval()
+    with torch.no_grad():
+        for p in model.parameters():
+            p.abs_()
+    model.zero_grad()
+    model(torch.ones(1, *input_shape, dtype=torch.float64)).sum().backward()
+    return sum((p * p.grad).abs().sum().item() for p in model.parameters() if p.grad is not None)
+
+def naswot(model, inputs):
+    """
+    NASWOT: log determinant of the kernel counting agreeing ReLU on / off
+    codes between every pair of inputs (how well the untrained network
+    separates them). -inf if any two inputs share a code, e.g. for
+    networks without activations.
+    """
+    codes = []
+    hooks = [
+        layer.register_forward_hook(lambda module, args, output: codes.append((output > 0).flatten(1)))
+        for layer in model.modules() if isinstance(layer, nn.ReLU)
+    ]
+    try:
+        with torch.no_grad():
+            model.eval()(inputs)
+    finally:
+        for hook in hooks:
+            hook.remove()
+    if not codes:
+        return float("-inf")
+    c = torch.cat(codes, 1).double()
+    kernel = c @ c.t() + (1 - c) @ (1 - c).t()
+    sign, logdet = torch.linalg.slogdet(kernel)
+    return logdet.item() if sign > 0 else float("-inf")
+
+def grad_norm(model, inputs, labels):
+    """Sum of the L2 norms of the cross entropy gradients of every parameter for one minibatch."""
+    model.train()
+    model.zero_grad()
+    nn.functional.cross_entropy(model(inputs), labels).backward()
+    norm = sum(p.grad.norm().item() for p in model.parameters() if p.grad is not None)
+    model.zero_grad()
+    return norm
+
+def score_architecture(arch, inputs, labels, proxies=PROXIES, seed=0):
+    """
+    Proxy scores ({name: value}) of the freshly initialized (seeded) float
+    model of arch for one normalized minibatch (inputs (B, C, H, W), labels).
+    """
+    unknown = set(proxies) - set(PROXIES)
+    if unknown:
+        raise ValueError(f"unknown zero cost proxies {sorted(unknown)}, known are {PROXIES}")
+    torch.manual_seed(seed)
+    model = build_pytorch_model(arch)
+    scores = {}
+    for name in proxies:
+        if name == "synflow":
+            scores[name] = synflow(model, inputs.shape[1:])
+        elif name == "naswot":
+            scores[name] = naswot(model, inputs)
+        elif name == "grad_norm":
+            scores[name] = grad_norm(model, inputs, labels)
+        else:
+            scores[name] = float(param_count(model))
+    return scores
+
+def score_architectures(archs, inputs, labels, proxies=PROXIES, seed=0):
+    """
+    Scores every architecture on the same minibatch (and init seed).
+    Returns {proxy: float64 array over archs}, NaN where a model failed.
+    """
+    scores = {name: np.full(len(archs), np.nan) for name in proxies}
+    for i, arch in enumerate(archs):
+        try:
+            arch_scores = score_architecture(arch, inputs, labels, proxies, seed)
+        except RuntimeError as e:
+            print(f"WARN: zero cost scoring of architecture {i} failed: {e}")
+            continue
+        for name, value in arch_scores.items():
+            scores[name][i] = value
+    return scores
+
+def _ranks(x):
+    # 0 based ranks, ties get their average rank
+    ranks = np.empty(len(x))
+    ranks[np.argsort(x, kind="stable")] = np.arange(len(x))
+    _, groups = np.unique(x, return_inverse=True)
+    return (np.bincount(groups, ranks) / np.bincount(groups))[groups]
+
+def spearman(x, y):
+    """Spearman rank correlation of x and y, pairs with a NaN are left out. NaN if either is constant."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < 2:
+        return float("nan")
+    rx = _ranks(x[valid])
+    ry = _ranks(y[valid])
+    if rx.std() == 0 or ry.std() == 0:
+        return float("nan")
+    return float(np.corrcoef(rx, ry)[0, 1])
+
+def rank_correlations(scores, accuracies):
+    """{proxy: Spearman correlation with accuracies} for the output of score_architectures."""
+    return {name: spearman(values, accuracies) for name, values in scores.items()}
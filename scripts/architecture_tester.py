@@ -1,13 +1,16 @@
 import sys
 import os
+import shutil
 import torch
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(PROJECT_ROOT)
 
-from hw_nas.search_space import get_random_architecture, build_pytorch_model
+from hw_nas.search_space import get_random_architecture
+from hw_nas.pytorch_model import build_pytorch_model
 from hw_nas.predictor import featurize
 from hw_nas.cpp_generator import generate_cpp_from_architecture
+from hw_nas.csim import validate_design, CXX
 
 
 # config for minimal test
@@ -15,6 +18,7 @@ INPUT_CHANNELS = 3
 INPUT_SIZE = 32
 BATCH_SIZE = 1 
 CPP_OUTPUT_FILE = "./scripts/test_generated_design.cpp"
+CSIM_DIR = "./scripts/test_csim" # g++ build of the generated design
 
 def main():
     print("----------------------------")
@@ -65,6 +69,19 @@ def main():
     except Exception as e:
         print(f"   ... C++ Generator FAILED: {e}\n")
 
+    # 5. test the generated design in C simulation (g++ vs torch)
+    print("5. Testing C simulation...")
+    if shutil.which(CXX) is None:
+        print(f"   ... SKIPPED: {CXX} not found\n")
+    else:
+        report = validate_design(arch, CSIM_DIR, input_channels=INPUT_CHANNELS, input_size=INPUT_SIZE)
+        if report.ok:
+            print(f"   ... C simulation SUCCESS. {report.num_outputs} outputs match the torch model "
+                  f"(max abs error {report.max_abs_error:.1e}), {report.csim_seconds * 1e3:.2f} ms per run "
+                  f"(torch: {report.torch_seconds * 1e3:.2f} ms)\n")
+        else:
+            print(f"   ... C simulation FAILED ({report.status}): {report.message}\n")
+
     print("--------------------------")
     print("--- MINIMAL TEST DONE ---")
     print("--------------------------")
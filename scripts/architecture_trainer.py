@@ -1,29 +1,39 @@
 import sys
 import os
+import json
 import time
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import torchvision
-import torchvision.transforms as transforms
-import joblib
 import numpy as np
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(PROJECT_ROOT)
 
-from hw_nas.search_space import get_random_architecture, build_pytorch_model
-from hw_nas.predictor import featurize
+from hw_nas.search_space import get_random_architecture, Architecture
+from hw_nas.pytorch_model import build_pytorch_model
+from hw_nas.fast_forest import load_predictor
+from hw_nas.features import model_feature_schema, pipeline_for_schema
+from hw_nas.pareto import ParetoArchive
+from hw_nas.weight_export import pack_state_dict
+from hw_nas.cpp_generator import generate_cpp_from_architecture
+from hw_nas.multi_trainer import share_images, train_architectures
+from hw_nas.image_data import prepare_cifar10, prepare_synthetic, load_split, BatchLoader
+from hw_nas.zero_cost import score_architectures
 
 
 # config paths
 TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib"
 POWER_PREDICTOR_PATH = "data/saved_models/power_predictor.joblib"
+PARETO_ARCHIVE_PATH = "data/pareto_archive.npz" # accuracy / WNS / power of every evaluated architecture
+EXPORT_DIR = "data/exported_design" # trained weight blob + offset table and the design reading them
 
 # test dataset (CIFAR-10) params
 INPUT_CHANNELS = 3
 INPUT_SIZE = 32
 NUM_CLASSES = 10 # CIFAR-10 has 10 classes
+SYNTHETIC_DATA = False # CIFAR-10 shaped synthetic stand-in instead (offline runs)
+AUGMENT = False # random crop + horizontal flip of the training batches
 
 # minimal Training Hyperparameters for demo
 BATCH_SIZE = 64
@@ -31,27 +41,37 @@ LEARNING_RATE = 0.001
 NUM_EPOCHS = 1 # ninimal epochs for demo
 DEVICE = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
 
+# multi architecture mode (CPU): trains many architectures concurrently in worker processes
+NUM_ARCHITECTURES = 1 # > 1 samples and trains that many random architectures
+ARCHITECTURES_FILE = None # JSON list of architectures to train instead ([[op_type, params], ...] each)
+NUM_TRAINING_WORKERS = max(1, (os.cpu_count() or 1) // 4) # processes, the cores are split evenly between them
+TRAINING_RESULTS_PATH = "data/training_results.jsonl" # one JSON record per trained architecture
+ZERO_COST_PROXY = "synflow" # training free pre-filter (see hw_nas/zero_cost.py and scripts/benchmark_zero_cost.py)
+ZERO_COST_KEEP_FRACTION = 1.0 # < 1 trains only the best scored fraction of the architectures
+
 # --- helper functions ---
+def _dataset_dir():
+    # decoded once into uint8 .npy files, later runs memory map them
+    if SYNTHETIC_DATA:
+        print("Preparing synthetic CIFAR-10 shaped dataset...")
+        return prepare_synthetic()
+    print(f"Loading CIFAR-10 dataset (to ./data)...")
+    return prepare_cifar10(root='./data')
+
 def load_data():
     """Loads CIFAR-10 dataset."""
-    print(f"Loading CIFAR-10 dataset (to ./data)...")
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))
-    ])
-    
-    train_set = torchvision.datasets.CIFAR10(root='./data', train=True,
-                                             download=True, transform=transform)
-    train_loader = torch.utils.data.DataLoader(train_set, batch_size=BATCH_SIZE,
-                                               shuffle=True, num_workers=2)
-    
-    test_set = torchvision.datasets.CIFAR10(root='./data', train=False,
-                                            download=True, transform=transform)
-    test_loader = torch.utils.data.DataLoader(test_set, batch_size=BATCH_SIZE,
-                                              shuffle=False, num_workers=2)
+    cache_dir = _dataset_dir()
+    train_loader = BatchLoader(*load_split(cache_dir, "train"), batch_size=BATCH_SIZE,
+                               shuffle=True, augment=AUGMENT)
+    test_loader = BatchLoader(*load_split(cache_dir, "test"), batch_size=BATCH_SIZE)
     print("Dataset loaded.")
     return train_loader, test_loader
 
+def load_raw_data():
+    """CIFAR-10 train / test images (N, 3, 32, 32 uint8 memory maps) and labels, without transforms."""
+    cache_dir = _dataset_dir()
+    return load_split(cache_dir, "train"), load_split(cache_dir, "test")
+
 def load_hardware_predictors(timing_path, power_path):
     """Loads the pre-trained hardware cost predictors."""
     timing_predictor = None
@@ -59,13 +79,13 @@ def load_hardware_predictors(timing_path, power_path):
     
     try:
         if os.path.exists(timing_path):
-            timing_predictor = joblib.load(timing_path)
+            timing_predictor = load_predictor(timing_path)
             print(f"Loaded timing predictor from {timing_path}")
         else:
             print(f"WARN: Timing predictor not found at {timing_path}")
             
         if os.path.exists(power_path):
-            power_predictor = joblib.load(power_path)
+            power_predictor = load_predictor(power_path)
             print(f"Loaded power predictor from {power_path}")
         else:
             print(f"WARN: Power predictor not found at {power_path}")
@@ -133,8 +153,73 @@ def evaluate_speed(model, num_runs=100):
     print(f"Avg. Latency: {avg_latency:.4f} ms")
     return avg_latency
 
+def predict_hardware(archs, timing_predictor, power_predictor):
+    """Predicted (wns, power) arrays of archs, NaN without a predictor."""
+    wns = np.full(len(archs), np.nan)
+    power = np.full(len(archs), np.nan)
+    predictor = timing_predictor if timing_predictor is not None else power_predictor
+    if predictor is None or not archs:
+        return wns, power
+    X = pipeline_for_schema(model_feature_schema(predictor)).transform(archs)
+    if timing_predictor is not None:
+        wns = timing_predictor.predict(X)
+    if power_predictor is not None:
+        power = power_predictor.predict(X)
+    return wns, power
+
 # --- main execution ---
 
+def main_multi():
+    """Trains NUM_ARCHITECTURES (or ARCHITECTURES_FILE) architectures concurrently on the CPU."""
+    print("==============================================")
+    print("--- HW-NAS Multi Architecture Trainer ---")
+    print("==============================================")
+
+    if ARCHITECTURES_FILE is not None:
+        with open(ARCHITECTURES_FILE) as f:
+            archs = [Architecture.from_list(blocks) for blocks in json.load(f)]
+    else:
+        archs = [get_random_architecture(input_channels=INPUT_CHANNELS, input_size=INPUT_SIZE)
+                 for _ in range(NUM_ARCHITECTURES)]
+
+    (train_images, train_labels), (test_images, test_labels) = load_raw_data()
+    if ZERO_COST_KEEP_FRACTION < 1.0:
+        # rank on one minibatch without training, keep the best
+        inputs, labels = next(iter(BatchLoader(train_images, train_labels, BATCH_SIZE, shuffle=True, seed=0)))
+        scores = score_architectures(archs, inputs, labels, proxies=(ZERO_COST_PROXY,))[ZERO_COST_PROXY]
+        num_kept = max(1, int(len(archs) * ZERO_COST_KEEP_FRACTION))
+        archs = [archs[i] for i in np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind="stable")[:num_kept]]
+        print(f"zero cost pre-filter ({ZERO_COST_PROXY}): training the best {num_kept} architectures")
+    # one copy of the dataset in shared memory for all workers
+    train_data = share_images(train_images, train_labels)
+    test_data = share_images(test_images, test_labels)
+
+    start_time = time.time()
+    records = []
+    for record in train_architectures(archs, train_data, test_data, NUM_TRAINING_WORKERS, TRAINING_RESULTS_PATH,
+                                      epochs=NUM_EPOCHS, batch_size=BATCH_SIZE, learning_rate=LEARNING_RATE):
+        records.append(record)
+        if "error" in record:
+            print(f"ERROR: architecture {record['index']} failed: {record['error']}")
+        else:
+            print(f"[{len(records)}/{len(archs)}] architecture {record['index']}: "
+                  f"accuracy {record['accuracy']:.2f} % float, {record['quantized_accuracy']:.2f} % quantized, "
+                  f"trained in {record['train_seconds']:.1f}s (worker {record['worker']})")
+    elapsed = time.time() - start_time
+    print(f"trained {len(records)} architectures in {elapsed:.1f}s ({len(records) / elapsed * 3600:.1f} models/hour), "
+          f"results in {TRAINING_RESULTS_PATH}")
+
+    # hardware predictions and the Pareto archive, as for a single architecture
+    trained = [record for record in records if "error" not in record]
+    trained_archs = [archs[record["index"]] for record in trained]
+    timing_predictor, power_predictor = load_hardware_predictors(TIMING_PREDICTOR_PATH, POWER_PREDICTOR_PATH)
+    wns, power = predict_hardware(trained_archs, timing_predictor, power_predictor)
+    archive = ParetoArchive.load(PARETO_ARCHIVE_PATH) if os.path.exists(PARETO_ARCHIVE_PATH) else ParetoArchive()
+    for arch, record, arch_wns, arch_power in zip(trained_archs, trained, wns, power):
+        archive.add(arch, {'accuracy': record['quantized_accuracy'], 'wns': arch_wns, 'power': arch_power})
+    archive.save(PARETO_ARCHIVE_PATH)
+    print(f"Pareto archive: {len(archive)} records, {len(archive.front())} on the front")
+
 def main():
     print("==============================================")
     print("--- HW-NAS Single Architecture Evaluator ---")
@@ -169,16 +254,23 @@ def main():
     # 5. evaluate Metrics
     print("\n--- 4. Evaluating Metrics ---")
     
-    # Metric A: Accuracy
-    accuracy = evaluate_accuracy(model, test_loader)
+    # Metric A: Accuracy, of the float model and of the fixed point datapaths the hardware implements
+    float_accuracy = evaluate_accuracy(model, test_loader)
+    quantized_model = build_pytorch_model(arch, quantized=True).to(DEVICE)
+    quantized_model.load_state_dict(model.state_dict())
+    print("Quantized (hardware datapath) model:")
+    accuracy = evaluate_accuracy(quantized_model, test_loader)
     
     # Metric B: Speed (Latency)
     latency_ms = evaluate_speed(model)
     
     # Metric C: Predicted Hardware Cost
     print("Evaluating predicted hardware cost...")
-    features = featurize(arch)
-    features_2d = features.reshape(1, -1)
+    predictor = timing_predictor if timing_predictor is not None else power_predictor
+    features_2d = None
+    if predictor is not None:
+        # featurized the way the predictors were trained
+        features_2d = pipeline_for_schema(model_feature_schema(predictor)).transform_one(arch).reshape(1, -1)
     
     predicted_wns = None
     predicted_power = None
@@ -201,13 +293,34 @@ def main():
     print("==============================================")
     print(f"Architecture: {arch}")
     print("---")
-    print(f"  Accuracy (Test Set): {accuracy:.2f} %")
+    print(f"  Accuracy (Test Set): {float_accuracy:.2f} % float, {accuracy:.2f} % quantized")
     print(f"  Speed (Avg. Latency):  {latency_ms:.4f} ms")
     print("---")
     print(f"  Predicted WNS (Timing): {predicted_wns if predicted_wns is not None else 'N/A'} ns")
     print(f"  Predicted Power:        {predicted_power if predicted_power is not None else 'N/A'} W")
     print("==============================================")
 
+    # 7. record in the Pareto archive (missing predictions are kept as NaN, off the front)
+    archive = ParetoArchive.load(PARETO_ARCHIVE_PATH) if os.path.exists(PARETO_ARCHIVE_PATH) else ParetoArchive()
+    on_front = archive.add(arch, {
+        'accuracy': accuracy,
+        'wns': predicted_wns if predicted_wns is not None else np.nan,
+        'power': predicted_power if predicted_power is not None else np.nan,
+    })
+    archive.save(PARETO_ARCHIVE_PATH)
+    print(f"Pareto archive: {len(archive)} records, {len(archive.front())} on the front "
+          f"({'NEW FRONT MEMBER' if on_front else 'dominated'})")
+
+    # 8. export the trained weights and the design that runs them
+    blob = pack_state_dict(model.state_dict())
+    blob.save(EXPORT_DIR)
+    generate_cpp_from_architecture(arch, os.path.join(EXPORT_DIR, "generated_design.cpp"),
+                                   INPUT_CHANNELS, INPUT_SIZE, fuse_relu=True, weight_blob=blob)
+    print(f"Exported {blob.nbytes / 1024:.0f} KiB of weights ({len(blob.entries)} tensors) to {EXPORT_DIR}")
+
 
 if __name__ == "__main__":
-    main()
+    if ARCHITECTURES_FILE is not None or NUM_ARCHITECTURES > 1:
+        main_multi()
+    else:
+        main()
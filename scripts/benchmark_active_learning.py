@@ -0,0 +1,86 @@
+import sys
+import os
+import random
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.predictor import featurize_batch
+from hw_nas.data_collector import collect_datapoints_parallel
+from hw_nas.active_learning import run_active_learning
+
+# benchmark config, the stub script stands in for HLS + Vivado
+NUM_WORKERS = 8
+NUM_HOLDOUT = 300
+NUM_INITIAL = 20
+BATCH_SIZE = 10
+NUM_ROUNDS = 20
+POOL_SIZE = 3000
+SEEDS = list(range(10)) # the forests and the sampling are random, one run proves nothing
+
+CONFIG = {
+    "VIVADO_SCRIPT": os.path.join(PROJECT_ROOT, "hls_vivado/stub_synthesis.sh"),
+    "HLS_CONFIG_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/hls_config.cfg"),
+    "OPS_HEADER_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/src/ops.h"),
+}
+
+def main():
+    os.environ["STUB_SYNTH_SECONDS"] = "0"
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        config = dict(CONFIG, JOBS_DIR=jobs_dir)
+
+        def synthesize(archs):
+            # input order, the forests see the rows in the same order every run
+            return [
+                (arch, features, wns, power)
+                for _, arch, features, wns, power, _, _ in sorted(
+                    collect_datapoints_parallel(archs, NUM_WORKERS, config), key=lambda result: result[0])
+                if wns is not None and power is not None
+            ]
+
+        # fixed holdout set, drawn with its own seed
+        rng = random.Random(1234)
+        holdout_archs = list({get_random_architecture(rng=rng) for _ in range(NUM_HOLDOUT)})
+        holdout_results = synthesize(holdout_archs)
+        holdout = (
+            featurize_batch([arch for arch, _, _, _ in holdout_results]).astype(np.float64),
+            np.array([wns for _, _, wns, _ in holdout_results]),
+            np.array([power for _, _, _, power in holdout_results]),
+        )
+
+        random_histories, active_histories = [], []
+        for seed in SEEDS:
+            print(f"\n=== RANDOM SAMPLING (seed {seed}) ===")
+            _, _, random_history = run_active_learning(
+                synthesize, NUM_INITIAL, NUM_ROUNDS, BATCH_SIZE, POOL_SIZE, seed=seed, holdout=holdout,
+                strategy="random")
+            # no early stop, the curves are compared at every budget
+            print(f"\n=== ACTIVE LEARNING (seed {seed}) ===")
+            _, _, active_history = run_active_learning(
+                synthesize, NUM_INITIAL, NUM_ROUNDS, BATCH_SIZE, POOL_SIZE, seed=seed, holdout=holdout)
+            random_histories.append(random_history)
+            active_histories.append(active_history)
+
+    print("\n--- ACTIVE LEARNING BENCHMARK (stub synthesizer) ---")
+    num_reached = 0
+    for seed, random_history, active_history in zip(SEEDS, random_histories, active_histories):
+        # target: what uniform sampling reaches with the full budget
+        budget, *target = random_history[-1]
+        reached = [n for n, mae_timing, mae_power in active_history if mae_timing <= target[0] and mae_power <= target[1]]
+        num_reached += bool(reached)
+        result = f"reached after {reached[0]} runs" if reached else f"not reached within {active_history[-1][0]} runs"
+        print(f"seed {seed}: random sampling MAE after {budget} runs WNS {target[0]:.4f} ns, power {target[1]:.4f} W, "
+              f"active learning {result}")
+    print(f"active learning reached the random sampling error in {num_reached} of {len(SEEDS)} seeds")
+    random_curve = np.mean([np.array(history)[:, 1:] for history in random_histories], axis=0)
+    active_curve = np.mean([np.array(history)[:, 1:] for history in active_histories], axis=0)
+    print(f"mean holdout MAE over {len(SEEDS)} seeds (WNS ns / power W):")
+    for (n, _, _), random_mae, active_mae in zip(random_histories[0], random_curve, active_curve):
+        print(f"{n:4d} runs: random {random_mae[0]:.4f} / {random_mae[1]:.4f}, "
+              f"active {active_mae[0]:.4f} / {active_mae[1]:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+import random
+import shutil
+import tempfile
+from collections import Counter
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture, Architecture, NetworkBlock
+from hw_nas.csim import validate_designs, CXX
+
+# benchmark config
+NUM_ARCHITECTURES = 16
+NUM_WORKERS = [1, os.cpu_count() or 1]
+CODEGEN_OPTIONS = {"fuse_relu": True}
+
+def _broken_architecture():
+    # linear layer whose in_features do not match the flattened activations (no valid design)
+    return Architecture([
+        NetworkBlock('global_avg_pool', {}),
+        NetworkBlock('flatten', {'in_features': 3}),
+        NetworkBlock('linear', {'in_features': 5, 'out_features': 10}),
+    ])
+
+def main():
+    if shutil.which(CXX) is None:
+        print(f"ERROR: {CXX} not found, cannot compile the designs.")
+        sys.exit(1)
+
+    rng = random.Random(0)
+    archs = [get_random_architecture(rng=rng) for _ in range(NUM_ARCHITECTURES)] + [_broken_architecture()]
+    print(f"--- C SIMULATION BENCHMARK ({len(archs)} designs, one of them broken) ---")
+
+    for num_workers in sorted(set(NUM_WORKERS)):
+        with tempfile.TemporaryDirectory() as work_dir:
+            start_time = time.time()
+            reports = validate_designs(archs, work_dir, num_workers, **CODEGEN_OPTIONS)
+            elapsed = time.time() - start_time
+        print(f"workers={num_workers:2d}: {elapsed:6.2f}s ({len(archs) / elapsed:.1f} designs/s), "
+              f"outcomes {dict(Counter(report.status for report in reports))}")
+
+    valid = [report for report in reports if report.ok]
+    for report in reports:
+        if not report.ok:
+            print(f"rejected ({report.status}): {report.arch} - {report.message.strip().splitlines()[0]}")
+    compile_seconds = sum(report.compile_seconds for report in valid) / len(valid)
+    csim_seconds = sum(report.csim_seconds for report in valid) / len(valid)
+    torch_seconds = sum(report.torch_seconds for report in valid) / len(valid)
+    print(f"mean compile time {compile_seconds:.2f}s, run {csim_seconds * 1e3:.2f} ms (torch {torch_seconds * 1e3:.2f} ms)")
+
+    if len(valid) != NUM_ARCHITECTURES or reports[-1].ok:
+        print("ERROR: C simulation results differ from the expected outcomes")
+        sys.exit(1)
+    print("SUCCESS: valid designs agree with the torch model, the broken one was rejected.")
+
+if __name__ == "__main__":
+    main()
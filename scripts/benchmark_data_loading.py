@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.image_data import prepare_synthetic, load_split, normalize, BatchLoader, NORMALIZE_MEAN, NORMALIZE_STD
+
+# benchmark config (synthetic CIFAR-10 shaped data, no download)
+NUM_TRAIN = 20000
+NUM_TEST = 1000
+BATCH_SIZE = 64
+NUM_LOADER_WORKERS = 2 # DataLoader workers of the per sample loader, as in architecture_trainer before
+NUM_EPOCHS = 2 # the first one reads the memory map from disk
+
+class _PerSampleDataset(torch.utils.data.Dataset):
+    """What torchvision.datasets.CIFAR10 does per item: PIL image from the HWC array, then the transform."""
+    def __init__(self, images_nhwc, labels, transform):
+        self.images = images_nhwc
+        self.labels = labels
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.images)
+
+    def __getitem__(self, index):
+        return self.transform(Image.fromarray(self.images[index])), int(self.labels[index])
+
+def _samples_per_second(loader):
+    start_time = time.time()
+    seen = 0
+    for _ in range(NUM_EPOCHS):
+        for inputs, labels in loader:
+            seen += len(labels)
+    return seen / (time.time() - start_time), seen
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        start_time = time.time()
+        cache_dir = prepare_synthetic(os.path.join(work_dir, "data"), NUM_TRAIN, NUM_TEST)
+        print(f"--- DATA LOADING BENCHMARK ({NUM_TRAIN} images, batch {BATCH_SIZE}, {NUM_EPOCHS} epochs) ---")
+        print(f"decoded once into uint8 arrays in {time.time() - start_time:.2f}s")
+        images, labels = load_split(cache_dir, "train")
+
+        # the two paths must produce the same inputs
+        transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize(NORMALIZE_MEAN, NORMALIZE_STD)])
+        per_sample = _PerSampleDataset(np.ascontiguousarray(images.transpose(0, 2, 3, 1)), labels, transform)
+        expected = torch.stack([per_sample[i][0] for i in range(BATCH_SIZE)])
+        got = normalize(torch.from_numpy(images[:BATCH_SIZE]))
+        max_error = float((got - expected).abs().max())
+        if max_error > 1e-6:
+            print(f"ERROR: batched normalization differs from ToTensor + Normalize by {max_error:.2e}")
+            sys.exit(1)
+
+        loaders = {
+            "per sample DataLoader": torch.utils.data.DataLoader(per_sample, batch_size=BATCH_SIZE, shuffle=True,
+                                                                 num_workers=NUM_LOADER_WORKERS),
+            "BatchLoader": BatchLoader(images, labels, BATCH_SIZE, shuffle=True, seed=0),
+            "BatchLoader (sequential)": BatchLoader(images, labels, BATCH_SIZE),
+            "BatchLoader (augment)": BatchLoader(images, labels, BATCH_SIZE, shuffle=True, augment=True, seed=0),
+        }
+        baseline = None
+        for name, loader in loaders.items():
+            rate, seen = _samples_per_second(loader)
+            baseline = baseline or rate
+            print(f"{name:26s}: {rate:10.0f} samples/s, speedup {rate / baseline:6.2f}x")
+            if seen != NUM_EPOCHS * NUM_TRAIN:
+                print(f"ERROR: {name} yielded {seen} samples, expected {NUM_EPOCHS * NUM_TRAIN}")
+                sys.exit(1)
+        del images, labels, per_sample, loaders
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.predictor import featurize_batch
+from hw_nas.fast_forest import FlatForest, export_forest
+
+# benchmark config
+TRAINING_ROWS = 2000 # forest fitted like train_predictors, on a synthetic WNS-like target
+SINGLE_ROW_CALLS = 200
+BATCH_SIZES = [1, 64, 1024, 16384]
+
+def best_time(fn, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    random.seed(0)
+    X = featurize_batch([get_random_architecture() for _ in range(max(BATCH_SIZES))]).astype(np.float64)
+    X_train = X[:TRAINING_ROWS]
+    noise = np.random.default_rng(0).normal(0, 0.1, TRAINING_ROWS)
+    y_train = 4 - 0.6 * np.log1p(X_train[:, 2] * X_train[:, 1] + X_train[:, 7] / 8) + noise
+    forest = RandomForestRegressor(random_state=42).fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start_time = time.perf_counter()
+        export_forest(forest, tmp_dir)
+        export_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        flat_forest = FlatForest.load(tmp_dir)
+        load_time = time.perf_counter() - start_time
+
+        # from_sklearn keeps the forest, large batches go to its apply()
+        routed_forest = FlatForest.from_sklearn(forest)
+        max_error = max(float(np.max(np.abs(f.predict(X) - forest.predict(X)))) for f in (flat_forest, routed_forest))
+        print("--- FLAT FOREST BENCHMARK ---")
+        print(f"{flat_forest.n_trees} trees, {len(flat_forest.feature)} nodes, max depth {flat_forest.max_depth}")
+        print(f"export {export_time * 1e3:.1f} ms, mmap load {load_time * 1e3:.2f} ms, max |error| vs sklearn {max_error:.2e}")
+
+        rows = [X[i:i + 1] for i in range(SINGLE_ROW_CALLS)]
+        sklearn_single = best_time(lambda: [forest.predict(row) for row in rows], repeats=2) / SINGLE_ROW_CALLS
+        flat_single = best_time(lambda: [flat_forest.predict(row) for row in rows], repeats=2) / SINGLE_ROW_CALLS
+        print(f"single row latency: sklearn {sklearn_single * 1e6:,.0f} us, flat {flat_single * 1e6:,.0f} us "
+              f"({sklearn_single / flat_single:.1f}x)")
+
+        for batch_size in BATCH_SIZES:
+            batch = X[:batch_size]
+            sklearn_time = best_time(lambda: forest.predict(batch))
+            flat_time = best_time(lambda: flat_forest.predict(batch))
+            routed_time = best_time(lambda: routed_forest.predict(batch))
+            print(f"batch {batch_size:6d}: sklearn {batch_size / sklearn_time:12,.0f} rows/s, "
+                  f"flat walk {batch_size / flat_time:12,.0f} rows/s ({sklearn_time / flat_time:.1f}x), "
+                  f"flat routed {batch_size / routed_time:12,.0f} rows/s ({sklearn_time / routed_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.features import FeaturePipeline
+
+# benchmark config
+NUM_ARCHITECTURES = 50000
+EXTRACTORS = ['structure', 'cost']
+
+def _timed(pipeline, archs):
+    start_time = time.time()
+    X = pipeline.transform(archs)
+    return X, time.time() - start_time
+
+def main():
+    random.seed(0)
+    archs = [get_random_architecture() for _ in range(NUM_ARCHITECTURES)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, "features.sqlite")
+        pipeline = FeaturePipeline(EXTRACTORS, disk_cache=cache_path)
+        print(f"--- FEATURE PIPELINE BENCHMARK ({NUM_ARCHITECTURES} architectures, schema {pipeline.schema_id}) ---")
+
+        X_cold, cold = _timed(pipeline, archs)
+        X_memo, memo = _timed(pipeline, archs)
+        # new process / new pipeline: only the disk cache is warm
+        X_disk, disk = _timed(FeaturePipeline(EXTRACTORS, disk_cache=cache_path), archs)
+        X_plain, plain = _timed(FeaturePipeline(EXTRACTORS, cache_size=0), archs)
+
+        if not (np.array_equal(X_cold, X_memo) and np.array_equal(X_cold, X_disk) and np.array_equal(X_cold, X_plain)):
+            print("ERROR: cached features differ from computed ones")
+            sys.exit(1)
+
+        print(f"no cache:          {plain:.3f}s ({NUM_ARCHITECTURES / plain:,.0f} archs/s)")
+        print(f"cold (fills both): {cold:.3f}s ({NUM_ARCHITECTURES / cold:,.0f} archs/s)")
+        print(f"memo (LRU) hit:    {memo:.3f}s ({NUM_ARCHITECTURES / memo:,.0f} archs/s)")
+        print(f"disk cache hit:    {disk:.3f}s ({NUM_ARCHITECTURES / disk:,.0f} archs/s)")
+        print(f"stats: {pipeline.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import time
+import random
+import numpy as np
+import joblib
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.predictor import featurize, featurize_batch
+from hw_nas.features import pipeline_for_schema, model_feature_schema
+
+# benchmark config
+NUM_ARCHITECTURES = 100000
+NUM_SCORED = 1000 # architectures scored one row at a time vs. as one batch
+TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib"
+
+def main():
+    random.seed(0)
+    print(f"generating {NUM_ARCHITECTURES} random architectures...")
+    archs = [get_random_architecture() for _ in range(NUM_ARCHITECTURES)]
+
+    # per architecture featurize + stacking, what callers do today
+    start_time = time.time()
+    X_loop = np.vstack([featurize(arch) for arch in archs])
+    loop_time = time.time() - start_time
+
+    start_time = time.time()
+    X_batch = featurize_batch(archs)
+    batch_time = time.time() - start_time
+
+    if not np.array_equal(X_loop, X_batch):
+        mismatches = np.flatnonzero((X_loop != X_batch).any(axis=1))
+        print(f"ERROR: featurize_batch differs from featurize for {len(mismatches)} architectures")
+        sys.exit(1)
+
+    print(f"--- FEATURIZATION BENCHMARK ({NUM_ARCHITECTURES} architectures) ---")
+    print(f"featurize loop:  {loop_time:.3f}s ({NUM_ARCHITECTURES / loop_time:,.0f} archs/s)")
+    print(f"featurize_batch: {batch_time:.3f}s ({NUM_ARCHITECTURES / batch_time:,.0f} archs/s)")
+    print(f"speedup: {loop_time / batch_time:.1f}x, outputs identical")
+
+    # end to end scoring with the saved timing predictor
+    predictor_path = os.path.join(PROJECT_ROOT, TIMING_PREDICTOR_PATH)
+    if not os.path.exists(predictor_path):
+        print(f"WARN: {predictor_path} not found, skipping scoring benchmark")
+        return
+    predictor = joblib.load(predictor_path)
+    scored = archs[:NUM_SCORED]
+    # featurized like the predictor was trained, without memo so both paths compute every row
+    pipeline = pipeline_for_schema(model_feature_schema(predictor), cache_size=0)
+
+    start_time = time.time()
+    y_rows = [predictor.predict(pipeline.transform_one(arch).reshape(1, -1))[0] for arch in scored]
+    rows_time = time.time() - start_time
+
+    start_time = time.time()
+    y_batch = predictor.predict(pipeline.transform(scored))
+    batch_time = time.time() - start_time
+
+    print(f"--- SCORING BENCHMARK ({NUM_SCORED} architectures, timing predictor) ---")
+    print(f"row by row: {rows_time:.3f}s ({NUM_SCORED / rows_time:,.0f} archs/s)")
+    print(f"batched:    {batch_time:.3f}s ({NUM_SCORED / batch_time:,.0f} archs/s)")
+    print(f"speedup: {rows_time / batch_time:.1f}x, max abs diff {np.max(np.abs(np.array(y_rows) - y_batch)):.2e}")
+
+if __name__ == "__main__":
+    main()
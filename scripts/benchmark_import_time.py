@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# modules that must stay light: (module, heavy packages it must not pull in)
+LIGHT_MODULES = [
+    ("hw_nas.search_space", ["torch", "torchvision", "sklearn"]),
+    ("hw_nas.predictor", ["torch", "torchvision", "sklearn"]),
+    ("hw_nas.cost_model", ["torch", "torchvision", "sklearn"]),
+    ("hw_nas.features", ["torch", "torchvision", "sklearn"]),
+    ("hw_nas.csim", ["torch", "torchvision", "sklearn"]),
+    ("hw_nas.evolution", ["torch", "torchvision"]),
+    ("hw_nas.pareto", ["torch", "torchvision"]),
+    ("hw_nas.datapoint_store", ["torch", "torchvision"]),
+    ("hw_nas.predictor_service", ["torch", "torchvision"]),
+]
+# module that is allowed to be heavy, printed for comparison
+REFERENCE_MODULE = "hw_nas.pytorch_model"
+MAX_IMPORT_SECONDS = 1.0 # per light module, fresh interpreter
+REPEATS = 3
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(m for m in sys.modules if "." not in m)}}))
+"""
+
+def measure(module):
+    """Imports module in a fresh interpreter, returns (best seconds, top level packages loaded)."""
+    best = None
+    loaded = []
+    for _ in range(REPEATS):
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        data = json.loads(result.stdout.strip().splitlines()[-1])
+        loaded = data["modules"]
+        best = data["seconds"] if best is None else min(best, data["seconds"])
+    return best, loaded
+
+def main():
+    print("--- IMPORT TIME BENCHMARK ---")
+    failures = []
+    for module, forbidden in LIGHT_MODULES:
+        seconds, loaded = measure(module)
+        heavy = [package for package in forbidden if package in loaded]
+        status = "ok"
+        if heavy:
+            status = f"pulls in {', '.join(heavy)}"
+            failures.append(f"{module} {status}")
+        elif seconds > MAX_IMPORT_SECONDS:
+            status = f"slower than {MAX_IMPORT_SECONDS}s"
+            failures.append(f"{module} {status}")
+        print(f"{module:28s} {seconds:7.3f}s  {status}")
+
+    seconds, _ = measure(REFERENCE_MODULE)
+    print(f"{REFERENCE_MODULE:28s} {seconds:7.3f}s  (reference, imports torch)")
+
+    if failures:
+        for failure in failures:
+            print(f"ERROR: {failure}")
+        sys.exit(1)
+    print("SUCCESS: core modules import without torch.")
+
+if __name__ == "__main__":
+    main()
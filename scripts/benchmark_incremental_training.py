@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import contextlib
+import io
+import json
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.predictor import featurize_batch
+from hw_nas.data_collector import collect_datapoints_parallel
+from hw_nas.predictor_trainer import update_predictors, MANIFEST_FILE
+
+# benchmark config, the stub script stands in for HLS + Vivado
+NUM_WORKERS = 8
+NUM_INITIAL = 1000 # datapoints before the first model
+NUM_UPDATES = 15
+NEW_PER_UPDATE = 200 # datapoints arriving between two updates
+HOLDOUT_SIZE = 500 # rolling holdout: the next datapoints to arrive
+
+CONFIG = {
+    "VIVADO_SCRIPT": os.path.join(PROJECT_ROOT, "hls_vivado/stub_synthesis.sh"),
+    "HLS_CONFIG_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/hls_config.cfg"),
+    "OPS_HEADER_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/src/ops.h"),
+}
+
+def main():
+    os.environ["STUB_SYNTH_SECONDS"] = "0"
+    total = NUM_INITIAL + NUM_UPDATES * NEW_PER_UPDATE + HOLDOUT_SIZE
+    rng = random.Random(0)
+    archs = [get_random_architecture(rng=rng) for _ in range(total)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"synthesizing {total} stub datapoints...")
+        results = {}
+        with contextlib.redirect_stdout(io.StringIO()): # per job progress output
+            for _, arch, _, wns, power, _, _ in collect_datapoints_parallel(archs, NUM_WORKERS, dict(CONFIG, JOBS_DIR=os.path.join(tmp_dir, "jobs"))):
+                if wns is not None and power is not None:
+                    results[arch] = (wns, power)
+        valid = [arch for arch in archs if arch in results] # arrival order
+        X = featurize_batch(valid).astype(np.float64)
+        y_timing = np.array([results[arch][0] for arch in valid])
+        y_power = np.array([results[arch][1] for arch in valid])
+
+        timing_path = os.path.join(tmp_dir, "models", "timing_predictor.joblib")
+        power_path = os.path.join(tmp_dir, "models", "power_predictor.joblib")
+        os.makedirs(os.path.dirname(timing_path))
+
+        print("\n--- ROLLING HOLDOUT: INCREMENTAL vs FULL REFIT ---")
+        print(f"{'rows':>6} {'mode':>12} {'inc s':>7} {'fit s':>7} {'full s':>7} {'inc MAE wns/power':>20} {'full MAE wns/power':>20}")
+        total_incremental = 0.0
+        total_full = 0.0
+        timing, power = None, None
+        for step in range(NUM_UPDATES + 1):
+            n = NUM_INITIAL + step * NEW_PER_UPDATE
+            holdout = slice(n, n + HOLDOUT_SIZE)
+
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                timing, power = update_predictors(X[:n], y_timing[:n], y_power[:n], timing_path, power_path, timing, power)
+            incremental_time = time.time() - start_time # incl. saving the versions
+            with open(os.path.join(os.path.dirname(timing_path), MANIFEST_FILE)) as f:
+                version = json.load(f)["versions"][-1]
+
+            start_time = time.time()
+            full_timing = RandomForestRegressor(random_state=42).fit(X[:n], y_timing[:n])
+            full_power = RandomForestRegressor(random_state=42).fit(X[:n], y_power[:n])
+            full_time = time.time() - start_time
+
+            if step > 0: # the first version is a full refit in both cases
+                total_incremental += incremental_time
+                total_full += full_time
+            mae = lambda model, y: np.mean(np.abs(model.predict(X[holdout]) - y[holdout]))
+            print(f"{n:6d} {version['mode']:>12} {incremental_time:7.2f} {version['training_seconds']:7.2f} {full_time:7.2f} "
+                  f"{mae(timing, y_timing):9.4f}/{mae(power, y_power):.4f} "
+                  f"{mae(full_timing, y_timing):9.4f}/{mae(full_power, y_power):.4f}")
+
+        print(f"\ntraining time over {NUM_UPDATES} updates: incremental {total_incremental:.2f}s, "
+              f"full refit {total_full:.2f}s ({total_incremental / total_full:.0%})")
+
+if __name__ == "__main__":
+    main()
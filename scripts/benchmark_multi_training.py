@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.multi_trainer import share_images, train_architectures
+
+# benchmark config (synthetic CIFAR-10 shaped data, no download)
+NUM_ARCHITECTURES = 8
+NUM_TRAIN = 2048
+NUM_TEST = 512
+BATCH_SIZE = 64
+NUM_CPUS = os.cpu_count() or 1
+WORKER_COUNTS = sorted({1, max(1, NUM_CPUS // 4), max(1, NUM_CPUS // 2), NUM_CPUS})
+
+def _synthetic_data(num_images, rng):
+    return rng.integers(0, 256, (num_images, 3, 32, 32), dtype=np.uint8), rng.integers(0, 10, num_images)
+
+def main():
+    rng = np.random.default_rng(0)
+    train_data = share_images(*_synthetic_data(NUM_TRAIN, rng))
+    test_data = share_images(*_synthetic_data(NUM_TEST, rng))
+    arch_rng = random.Random(0)
+    archs = [get_random_architecture(rng=arch_rng) for _ in range(NUM_ARCHITECTURES)]
+
+    print(f"--- MULTI ARCHITECTURE TRAINING BENCHMARK ({NUM_ARCHITECTURES} architectures, "
+          f"{NUM_TRAIN} images, {NUM_CPUS} cores) ---")
+    baseline = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        for num_workers in WORKER_COUNTS:
+            results_path = os.path.join(work_dir, f"results_{num_workers}.jsonl")
+            start_time = time.time()
+            records = list(train_architectures(archs, train_data, test_data, num_workers, results_path,
+                                               batch_size=BATCH_SIZE))
+            elapsed = time.time() - start_time
+            with open(results_path) as f:
+                streamed = sum(1 for _ in f)
+            failed = sum(1 for record in records if "error" in record)
+            models_per_hour = len(records) / elapsed * 3600
+            baseline = baseline or models_per_hour
+            print(f"workers={num_workers:3d}: {elapsed:7.2f}s, {models_per_hour:8.0f} models/hour, "
+                  f"speedup {models_per_hour / baseline:.2f}x, {streamed} records streamed, {failed} failed")
+            if failed or streamed != NUM_ARCHITECTURES:
+                print("ERROR: not every architecture was trained and recorded")
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
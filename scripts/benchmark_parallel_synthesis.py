@@ -0,0 +1,47 @@
+import sys
+import os
+import time
+import random
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.data_collector import collect_datapoints_parallel
+
+# benchmark config, the stub script stands in for HLS + Vivado
+NUM_JOBS = 16
+WORKER_COUNTS = [1, 2, 4, 8]
+STUB_SYNTH_SECONDS = "1"
+
+CONFIG = {
+    "VIVADO_SCRIPT": os.path.join(PROJECT_ROOT, "hls_vivado/stub_synthesis.sh"),
+    "HLS_CONFIG_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/hls_config.cfg"),
+    "OPS_HEADER_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/src/ops.h"),
+}
+
+def main():
+    os.environ["STUB_SYNTH_SECONDS"] = STUB_SYNTH_SECONDS
+    random.seed(0)
+    architectures = [get_random_architecture() for _ in range(NUM_JOBS)]
+
+    print(f"--- PARALLEL SYNTHESIS BENCHMARK ({NUM_JOBS} stub jobs, {STUB_SYNTH_SECONDS}s each) ---")
+    baseline = None
+    for num_workers in WORKER_COUNTS:
+        with tempfile.TemporaryDirectory() as jobs_dir:
+            config = dict(CONFIG, JOBS_DIR=jobs_dir)
+
+            start_time = time.time()
+            results = list(collect_datapoints_parallel(architectures, num_workers, config))
+            elapsed = time.time() - start_time
+
+        valid = sum(1 for _, _, _, wns, power, _, _ in results if wns is not None and power is not None)
+        throughput = len(results) / elapsed * 60
+        if baseline is None:
+            baseline = throughput
+        print(f"workers={num_workers:2d}: {elapsed:6.2f}s, {throughput:7.1f} jobs/min, "
+              f"speedup {throughput / baseline:.2f}x, valid {valid}/{len(results)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.pareto import ParetoArchive
+
+# benchmark config
+NUM_RECORDS = 300000
+NUM_DISTINCT_ARCHS = 1000 # records reuse a pool of architectures
+NUM_QUERIES = 1000
+HV_REFERENCE = {'accuracy': 0.0, 'wns': -5.0, 'power': 2.0}
+
+def synthetic_objectives(rng, n):
+    """Correlated accuracy / WNS / power, bigger models: more accurate, slower, hungrier."""
+    size = rng.random(n)
+    accuracy = 40 + 40 * size + rng.normal(0, 5, n)
+    wns = 4 - 6 * size + rng.normal(0, 1, n)
+    power = 0.2 + 1.0 * size + rng.normal(0, 0.1, n)
+    return np.column_stack([accuracy, wns, power])
+
+def main():
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    archs = [get_random_architecture() for _ in range(NUM_DISTINCT_ARCHS)]
+    values = synthetic_objectives(rng, NUM_RECORDS)
+
+    archive = ParetoArchive()
+    start_time = time.time()
+    for i in range(NUM_RECORDS):
+        archive.add(archs[i % NUM_DISTINCT_ARCHS], values[i])
+    insert_time = time.time() - start_time
+
+    print(f"--- PARETO ARCHIVE BENCHMARK ({NUM_RECORDS} records) ---")
+    print(f"inserts: {insert_time:.2f}s ({NUM_RECORDS / insert_time:,.0f}/s), front size {len(archive.front_values())}")
+
+    # brute force check of the front on a prefix
+    check = ParetoArchive()
+    prefix = values[:5000]
+    for i, row in enumerate(prefix):
+        check.add(archs[i % NUM_DISTINCT_ARCHS], row)
+    signed = prefix * np.array([-1.0, -1.0, 1.0])
+    dominated = np.array([
+        np.any(np.all(signed <= p, axis=1) & np.any(signed < p, axis=1)) for p in signed
+    ])
+    assert set(map(tuple, check.front_values())) == set(map(tuple, prefix[~dominated])), "front mismatch"
+    print("front matches brute force on a 5000 record prefix")
+
+    # queries against brute force on the same prefix, including targets against their objective's direction
+    names = check.names
+    queries = [
+        ('max', 'accuracy', {'wns': ('>=', 0.0), 'power': ('<', 0.8)}),
+        ('min', 'power', {'accuracy': ('>', 60.0)}),
+        ('max', 'power', {}),
+        ('min', 'accuracy', {}),
+        ('max', 'power', {'wns': ('>=', 0.0)}),
+        ('min', 'wns', {'power': ('<', 0.5)}),
+    ]
+    for direction, target, constraints in queries:
+        mask = np.ones(len(prefix), dtype=bool)
+        for name, (op, bound) in constraints.items():
+            mask &= {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}[op](
+                prefix[:, names.index(name)], bound)
+        column = np.where(mask, prefix[:, names.index(target)], np.nan)
+        expected = np.nanmax(column) if direction == 'max' else np.nanmin(column)
+        kwargs = {'maximize': target} if direction == 'max' else {'minimize': target}
+        _, got = check.query(constraints=constraints, **kwargs)
+        assert got[target] == expected, f"query {direction} {target} {constraints}: {got[target]} != {expected}"
+    print(f"{len(queries)} constrained queries match brute force on the prefix")
+
+    start_time = time.time()
+    for power_limit in np.linspace(0.3, 1.2, NUM_QUERIES):
+        archive.query(maximize='accuracy', constraints={'wns': ('>=', 0.0), 'power': ('<', power_limit)})
+    query_time = time.time() - start_time
+    print(f"queries (best accuracy, WNS >= 0, power < X): {query_time / NUM_QUERIES * 1e6:.1f} us each")
+
+    start_time = time.time()
+    hv = archive.hypervolume(HV_REFERENCE)
+    print(f"hypervolume {hv:.2f} in {time.time() - start_time:.3f}s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "archive.npz")
+        start_time = time.time()
+        archive.save(path)
+        loaded = ParetoArchive.load(path)
+        print(f"save + load: {time.time() - start_time:.2f}s, {len(loaded)} records, "
+              f"hypervolume after load {loaded.hypervolume(HV_REFERENCE):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import threading
+import shutil
+import joblib
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.features import pipeline_for_schema, model_feature_schema
+from hw_nas.predictor_service import PredictorService, PredictorClient, ModelHolder
+from hw_nas.fast_forest import publish_predictors
+
+# benchmark config
+TIMING_PREDICTOR_PATH = os.path.join(PROJECT_ROOT, "data/saved_models/timing_predictor.joblib")
+POWER_PREDICTOR_PATH = os.path.join(PROJECT_ROOT, "data/saved_models/power_predictor.joblib")
+NUM_CLIENTS = 16
+REQUESTS_PER_CLIENT = 100
+
+def check_reload(tmp_dir):
+    """
+    A retrain writes timing first and power second: the holder must keep
+    the old pair until both are published. Returns a list of errors.
+    """
+    errors = []
+    timing_path = os.path.join(tmp_dir, "timing_predictor.joblib")
+    power_path = os.path.join(tmp_dir, "power_predictor.joblib")
+    shutil.copyfile(TIMING_PREDICTOR_PATH, timing_path)
+    shutil.copyfile(POWER_PREDICTOR_PATH, power_path)
+    publish_predictors(timing_path, power_path)
+    holder = ModelHolder(timing_path, power_path)
+
+    time.sleep(0.01) # a new mtime
+    shutil.copyfile(TIMING_PREDICTOR_PATH, timing_path) # new timing model, power not written yet
+    if holder.maybe_reload():
+        errors.append("reloaded a new timing model with the old power model")
+    shutil.copyfile(POWER_PREDICTOR_PATH, power_path)
+    if holder.maybe_reload():
+        errors.append("reloaded before the pair was published")
+    publish_predictors(timing_path, power_path)
+    if not holder.maybe_reload():
+        errors.append("published pair was not loaded")
+    if holder.maybe_reload():
+        errors.append("reloaded without a new publish")
+    return errors
+
+def main():
+    random.seed(0)
+    archs = [get_random_architecture() for _ in range(REQUESTS_PER_CLIENT)]
+
+    # today: load both forests and predict one row at a time
+    start_time = time.time()
+    timing_predictor = joblib.load(TIMING_PREDICTOR_PATH)
+    power_predictor = joblib.load(POWER_PREDICTOR_PATH)
+    load_time = time.time() - start_time
+    pipeline = pipeline_for_schema(model_feature_schema(timing_predictor))
+    rows = [pipeline.transform_one(arch).reshape(1, -1) for arch in archs]
+    start_time = time.time()
+    expected = [(timing_predictor.predict(row)[0], power_predictor.predict(row)[0]) for row in rows]
+    direct_time = time.time() - start_time
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = PredictorService(TIMING_PREDICTOR_PATH, POWER_PREDICTOR_PATH,
+                                   socket_path=os.path.join(tmp_dir, "predictor.sock"))
+        service.start()
+
+        errors = []
+        def client_loop():
+            with PredictorClient(service.socket_path) as client:
+                for row, (wns_ref, power_ref) in zip(rows, expected):
+                    wns, power = client.predict(row)
+                    if abs(wns[0] - wns_ref) > 1e-9 or abs(power[0] - power_ref) > 1e-9:
+                        errors.append(row)
+
+        threads = [threading.Thread(target=client_loop) for _ in range(NUM_CLIENTS)]
+        start_time = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        service_time = time.time() - start_time
+
+        with PredictorClient(service.socket_path) as client:
+            stats = client.stats()
+            # a request of the wrong width is refused on its own
+            try:
+                client.predict(np.hstack([rows[0], [[0.0]]]))
+                errors.append("request with an extra feature was accepted")
+            except RuntimeError:
+                pass
+
+        # malformed rows reaching the batcher fail only their own request, not the ones batched with them
+        results = {}
+        def submit(name, X):
+            try:
+                results[name] = service.batcher.predict(X)[0]
+            except RuntimeError:
+                results[name] = None
+        submitters = [threading.Thread(target=submit, args=(i, row)) for i, row in enumerate(rows[:8])]
+        submitters.append(threading.Thread(target=submit, args=("bad", np.hstack([rows[0], [[0.0]]]))))
+        for thread in submitters:
+            thread.start()
+        for thread in submitters:
+            thread.join()
+        if results.pop("bad") is not None:
+            errors.append("malformed batcher request succeeded")
+        errors += [f"valid request {i} failed next to a malformed one" for i, wns in results.items()
+                   if wns is None or abs(wns[0] - expected[i][0]) > 1e-9]
+        service.close()
+        errors += check_reload(tmp_dir)
+
+    total = NUM_CLIENTS * REQUESTS_PER_CLIENT
+    print("--- PREDICTOR SERVICE BENCHMARK ---")
+    print(f"joblib.load of both forests: {load_time:.3f}s (paid once by the service)")
+    print(f"direct, single process, row by row: {len(rows) / direct_time:,.0f} predictions/s")
+    print(f"service, {NUM_CLIENTS} concurrent clients: {total / service_time:,.0f} predictions/s, "
+          f"avg batch {stats['rows'] / max(stats['batches'], 1):.1f} rows, mismatches {len(errors)}")
+    if errors:
+        for error in errors[:20]:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
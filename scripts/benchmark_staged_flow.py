@@ -0,0 +1,110 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import contextlib
+import io
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.data_collector import collect_datapoints_parallel, StageReport, DEFAULT_HLS_LIMITS, DEFAULT_SYNTH_LIMITS
+from hw_nas.synthesis_cache import SynthesisCache
+
+# benchmark config, the stub script stands in for HLS + Vivado (and for each stage)
+NUM_JOBS = 32
+NUM_WORKERS = 4
+STUB_SYNTH_SECONDS = "1"
+STUB_SCRIPT = os.path.join(PROJECT_ROOT, "hls_vivado/stub_synthesis.sh")
+
+CONFIG = {
+    "VIVADO_SCRIPT": STUB_SCRIPT,
+    "HLS_CONFIG_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/hls_config.cfg"),
+    "OPS_HEADER_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/src/ops.h"),
+    "BUILD_TCL_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/build.tcl"), # synthesis cache key inputs
+    "SYNTH_TCL_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/synth.tcl"),
+    "IMPL_TCL_FILE": os.path.join(PROJECT_ROOT, "hls_vivado/impl.tcl"),
+}
+RUNS = [
+    ("one-shot", {}),
+    ("staged", {"STAGE_SCRIPT": STUB_SCRIPT}),
+    ("staged, stop after synth", {"STAGE_SCRIPT": STUB_SCRIPT, "STOP_AFTER": "synth"}),
+    ("staged, stop after hls", {"STAGE_SCRIPT": STUB_SCRIPT, "STOP_AFTER": "hls"}),
+]
+
+def _outcomes(results):
+    """{outcome: count} of collect_datapoints_parallel results, by architecture index."""
+    return {index: metrics.outcome if metrics is not None and metrics.outcome else (
+        "complete" if wns is not None and power is not None else "failed")
+        for index, _, _, wns, power, _, metrics in results}
+
+def check_cache(architectures):
+    """
+    Early rejected / stopped designs are served from the synthesis cache
+    on a second pass, but not to a flow with other stop / limit settings.
+    Returns a list of errors.
+    """
+    errors = []
+    staged = {"STAGE_SCRIPT": STUB_SCRIPT, "STOP_AFTER": "synth"}
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache = SynthesisCache(os.path.join(work_dir, "cache"))
+        passes = []
+        for overrides in (staged, staged, dict(staged, STOP_AFTER="impl")):
+            config = dict(CONFIG, JOBS_DIR=os.path.join(work_dir, "jobs"), **overrides)
+            hits = cache.hits
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                outcomes = _outcomes(collect_datapoints_parallel(architectures, NUM_WORKERS, config, cache))
+            passes.append((outcomes, cache.hits - hits, time.time() - start_time))
+
+    (first, _, first_seconds), (second, second_hits, second_seconds), (full, full_hits, _) = passes
+    print(f"\nsynthesis cache, stop after synth: first pass {first_seconds:.2f}s, "
+          f"second pass {second_seconds:.2f}s with {second_hits}/{len(architectures)} hits")
+    if second != first:
+        errors.append("cached outcomes differ from the synthesized ones")
+    if second_hits != len(architectures):
+        errors.append(f"second pass: {second_hits} of {len(architectures)} designs served from the cache")
+    # the early outcomes belong to the flow settings they were reached with
+    if full_hits or any(outcome == "stopped" for outcome in full.values()):
+        errors.append(f"full flow reused {full_hits} early outcomes of the stop after synth flow")
+    return errors
+
+def main():
+    os.environ["STUB_SYNTH_SECONDS"] = STUB_SYNTH_SECONDS
+    random.seed(0)
+    architectures = [get_random_architecture() for _ in range(NUM_JOBS)]
+
+    print(f"--- STAGED FLOW BENCHMARK ({NUM_JOBS} stub designs, {NUM_WORKERS} workers, {STUB_SYNTH_SECONDS}s per full run) ---")
+    print(f"HLS limits: {DEFAULT_HLS_LIMITS}")
+    print(f"synthesis limits: {DEFAULT_SYNTH_LIMITS}")
+    baseline = None
+    for name, overrides in RUNS:
+        report = StageReport()
+        with tempfile.TemporaryDirectory() as jobs_dir:
+            config = dict(CONFIG, JOBS_DIR=jobs_dir, **overrides)
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()): # per job logging
+                results = list(collect_datapoints_parallel(architectures, NUM_WORKERS, config))
+            elapsed = time.time() - start_time
+
+        outcomes = {}
+        for outcome in _outcomes(results).values():
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        for _, _, _, _, _, _, metrics in results:
+            report.add(metrics)
+        if baseline is None:
+            baseline = elapsed
+        print(f"\n{name}: {elapsed:6.2f}s ({elapsed / baseline:.0%} of one-shot), outcomes {outcomes}")
+        if overrides:
+            report.print_report()
+
+    errors = check_cache(architectures)
+    for error in errors:
+        print(f"ERROR: {error}")
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.image_data import prepare_synthetic, load_split, BatchLoader
+from hw_nas.multi_trainer import train_one
+from hw_nas.supernet import Supernet, train_supernet, evaluate_architectures, calibration_batches
+from hw_nas.zero_cost import spearman
+
+# benchmark config (synthetic CIFAR-10 shaped data, no download)
+NUM_ARCHITECTURES = 16 # evaluated with inherited weights and trained from scratch
+NUM_TRAIN = 8192
+NUM_TEST = 1024
+BATCH_SIZE = 64
+SUPERNET_EPOCHS = 6
+SCRATCH_EPOCHS = 1 # the per candidate training the supernet replaces
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache_dir = prepare_synthetic(os.path.join(work_dir, "data"), NUM_TRAIN, NUM_TEST)
+        train_images, train_labels = load_split(cache_dir, "train")
+        test_images, test_labels = load_split(cache_dir, "test")
+        train_loader = BatchLoader(train_images, train_labels, BATCH_SIZE, shuffle=True, seed=0)
+        test_loader = BatchLoader(test_images, test_labels, BATCH_SIZE)
+
+        rng = random.Random(1)
+        archs = [get_random_architecture(rng=rng) for _ in range(NUM_ARCHITECTURES)]
+        print(f"--- SUPERNET BENCHMARK ({NUM_ARCHITECTURES} architectures, {NUM_TRAIN} images) ---")
+
+        torch.manual_seed(0)
+        supernet = Supernet()
+        start_time = time.time()
+        train_supernet(supernet, train_loader, epochs=SUPERNET_EPOCHS)
+        supernet_seconds = time.time() - start_time
+        print(f"supernet ({sum(p.numel() for p in supernet.parameters())} parameters) trained once "
+              f"in {supernet_seconds:.1f}s")
+
+        start_time = time.time()
+        calibration = calibration_batches(train_loader)
+        one_shot = evaluate_architectures(supernet, archs, test_loader, calibration)
+        one_shot_seconds = (time.time() - start_time) / NUM_ARCHITECTURES
+
+        train_data = (torch.from_numpy(train_images), torch.from_numpy(train_labels))
+        test_data = (torch.from_numpy(test_images), torch.from_numpy(test_labels))
+        start_time = time.time()
+        scratch = [train_one(arch, train_data, test_data, epochs=SCRATCH_EPOCHS, batch_size=BATCH_SIZE)["accuracy"]
+                   for arch in archs]
+        scratch_seconds = (time.time() - start_time) / NUM_ARCHITECTURES
+        del train_images, test_images, train_data, test_data, train_loader, test_loader, calibration
+
+    if any(accuracy is None for accuracy in one_shot):
+        print("ERROR: the supernet does not cover every sampled architecture")
+        sys.exit(1)
+    for i, (inherited, trained) in enumerate(zip(one_shot, scratch)):
+        print(f"architecture {i:2d}: inherited weights {inherited:6.2f} %, trained from scratch {trained:6.2f} %")
+    print(f"per candidate: {one_shot_seconds:.3f}s one validation pass (plus calibration) "
+          f"vs {scratch_seconds:.2f}s training ({scratch_seconds / one_shot_seconds:.0f}x faster, "
+          f"supernet amortized after {supernet_seconds / (scratch_seconds - one_shot_seconds):.0f} candidates)")
+    rho = spearman(one_shot, scratch)
+    print(f"Spearman rank correlation of inherited and scratch accuracy: {rho:+.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.image_data import prepare_synthetic, load_split, BatchLoader
+from hw_nas.multi_trainer import share_images, train_architectures
+from hw_nas.zero_cost import score_architectures, rank_correlations, PROXIES
+
+# benchmark config (synthetic CIFAR-10 shaped data, no download)
+NUM_ARCHITECTURES = 200 # scored
+NUM_TRAINED = 24 # of them also short trained for the rank correlation
+NUM_TRAIN = 8192
+NUM_TEST = 1024
+PROXY_BATCH_SIZE = 64
+TRAIN_EPOCHS = 3
+NUM_TRAINING_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
+def main():
+    arch_rng = random.Random(0)
+    archs = [get_random_architecture(rng=arch_rng) for _ in range(NUM_ARCHITECTURES)]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache_dir = prepare_synthetic(os.path.join(work_dir, "data"), NUM_TRAIN, NUM_TEST)
+        train_images, train_labels = load_split(cache_dir, "train")
+        test_images, test_labels = load_split(cache_dir, "test")
+        inputs, labels = next(iter(BatchLoader(train_images, train_labels, PROXY_BATCH_SIZE, shuffle=True, seed=0)))
+
+        print(f"--- ZERO COST PROXY BENCHMARK ({NUM_ARCHITECTURES} architectures, {NUM_TRAINED} short trained) ---")
+        start_time = time.time()
+        scores = score_architectures(archs, inputs, labels)
+        elapsed = time.time() - start_time
+        print(f"scored {NUM_ARCHITECTURES} architectures ({', '.join(PROXIES)}) in {elapsed:.2f}s "
+              f"({NUM_ARCHITECTURES / elapsed:.1f} architectures/s)")
+
+        sample = sorted(random.Random(1).sample(range(NUM_ARCHITECTURES), NUM_TRAINED))
+        train_data = share_images(train_images, train_labels)
+        test_data = share_images(test_images, test_labels)
+        start_time = time.time()
+        records = list(train_architectures([archs[i] for i in sample], train_data, test_data, NUM_TRAINING_WORKERS,
+                                           epochs=TRAIN_EPOCHS))
+        elapsed = time.time() - start_time
+        print(f"short trained {NUM_TRAINED} architectures in {elapsed:.1f}s ({elapsed / NUM_TRAINED:.2f}s each)")
+
+    accuracy = np.full(NUM_TRAINED, np.nan)
+    for record in records:
+        if "error" in record:
+            print(f"WARN: architecture {sample[record['index']]} failed to train: {record['error']}")
+        else:
+            accuracy[record["index"]] = record["accuracy"]
+    sample_scores = {name: values[sample] for name, values in scores.items()}
+    print(f"accuracy of the trained sample: {np.nanmin(accuracy):.1f} - {np.nanmax(accuracy):.1f} %")
+    for name, rho in rank_correlations(sample_scores, accuracy).items():
+        print(f"{name:10s}: Spearman rank correlation with accuracy {rho:+.3f}")
+    if np.isnan(accuracy).all():
+        print("ERROR: no architecture of the sample was trained")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
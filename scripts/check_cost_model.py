@@ -0,0 +1,82 @@
+import sys
+import os
+import time
+import random
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.pytorch_model import build_pytorch_model
+from hw_nas.cost_model import analyze, analyze_batch, COST_NAMES
+
+# check config
+NUM_TORCH_CHECKS = 200 # architectures compared against the torch model
+NUM_BATCH_CHECKS = 20000 # architectures compared between analyze and analyze_batch
+NUM_BENCHMARK = 1000000 # batch size of the throughput measurement
+INPUT_CHANNELS = 3
+INPUT_SIZE = 32
+
+def torch_shapes(arch):
+    """(input shape, output shape) of every layer of the torch model, without the batch dim."""
+    model = build_pytorch_model(arch).eval()
+    shapes = []
+    hooks = [
+        layer.register_forward_hook(lambda _, inputs, output: shapes.append((tuple(inputs[0].shape[1:]), tuple(output.shape[1:]))))
+        for layer in model.layers
+    ]
+    with torch.no_grad():
+        model(torch.zeros(1, INPUT_CHANNELS, INPUT_SIZE, INPUT_SIZE))
+    for hook in hooks:
+        hook.remove()
+    return shapes, sum(p.numel() for p in model.parameters())
+
+def main():
+    rng = random.Random(0)
+    errors = []
+
+    print("--- COST MODEL CHECK ---")
+    for i in range(NUM_TORCH_CHECKS):
+        arch = get_random_architecture(rng=rng)
+        cost = analyze(arch, INPUT_CHANNELS, INPUT_SIZE)
+        shapes, num_params = torch_shapes(arch)
+        ours = [(layer.input_shape, layer.output_shape) for layer in cost.layers]
+        if ours != shapes:
+            errors.append(f"shapes of {arch}: {ours} vs torch {shapes}")
+        if cost.params != num_params:
+            errors.append(f"params of {arch}: {cost.params} vs torch {num_params}")
+    print(f"torch: {NUM_TORCH_CHECKS} architectures compared (layer shapes, parameter count)")
+
+    archs = [get_random_architecture(rng=rng) for _ in range(NUM_BATCH_CHECKS)]
+    totals = analyze_batch(archs, INPUT_CHANNELS, INPUT_SIZE)
+    for i, arch in enumerate(archs):
+        cost = analyze(arch, INPUT_CHANNELS, INPUT_SIZE)
+        for name in COST_NAMES:
+            if getattr(cost, name) != totals[name][i]:
+                errors.append(f"{name} of {arch}: analyze {getattr(cost, name)}, analyze_batch {totals[name][i]}")
+    print(f"batch: {NUM_BATCH_CHECKS} architectures compared (analyze vs analyze_batch)")
+
+    # throughput, the distinct samples repeated up to NUM_BENCHMARK
+    start_time = time.time()
+    for arch in archs[:2000]:
+        analyze(arch, INPUT_CHANNELS, INPUT_SIZE)
+    per_arch = (time.time() - start_time) / 2000
+    big_batch = archs * (NUM_BENCHMARK // len(archs))
+    start_time = time.time()
+    totals = analyze_batch(big_batch, INPUT_CHANNELS, INPUT_SIZE)
+    elapsed = time.time() - start_time
+    print(f"analyze:       {1 / per_arch:12,.0f} architectures/s")
+    print(f"analyze_batch: {len(big_batch) / elapsed:12,.0f} architectures/s ({len(big_batch):,} in {elapsed:.2f}s)")
+    print(f"MACs: median {np.median(totals['macs']):,.0f}, max {totals['macs'].max():,}; "
+          f"peak activations: median {np.median(totals['peak_activation_bytes']) / 1024:.0f} KiB")
+
+    if errors:
+        for error in errors[:20]:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+    print("SUCCESS: cost model agrees with the torch model.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import random
+import shutil
+import tempfile
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture, PIPELINE_IIS, UNROLL_FACTORS, BIT_WIDTHS
+from hw_nas.pytorch_model import build_pytorch_model
+from hw_nas.csim import simulate, model_weights, tolerance, CXX
+
+# check config
+NUM_ARCHITECTURES = 12
+INPUT_CHANNELS = 3
+INPUT_SIZE = 32
+# code generation modes, every architecture is checked in each
+CODEGEN_MODES = {
+    "sequential": {},
+    "fused": {"fuse_relu": True},
+    "dataflow": {"fuse_relu": True, "dataflow": True},
+}
+
+def main():
+    if shutil.which(CXX) is None:
+        print(f"ERROR: {CXX} not found, cannot compile the kernels.")
+        sys.exit(1)
+
+    rng = random.Random(0)
+    torch.manual_seed(0)
+    errors = []
+    knobs_seen = set()
+    bits_seen = set()
+    exact_outputs = 0
+    num_outputs = 0
+
+    print(f"--- HLS KERNEL CHECK ({NUM_ARCHITECTURES} architectures x {len(CODEGEN_MODES)} modes, {CXX} vs torch) ---")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for i in range(NUM_ARCHITECTURES):
+            arch = get_random_architecture(input_channels=INPUT_CHANNELS, input_size=INPUT_SIZE, rng=rng)
+            # bit accurate reference of the fixed point layers
+            model = build_pytorch_model(arch, quantized=True).eval()
+            x = torch.randn(1, INPUT_CHANNELS, INPUT_SIZE, INPUT_SIZE)
+            with torch.no_grad():
+                expected = model(x)[0].numpy()
+            bits = [block.params['bits'] for block in arch.blocks if 'bits' in block.params]
+            rtol, atol = tolerance(arch)
+            knobs_seen.update((block.op_type, block.params['pipeline_ii'], block.params['unroll'])
+                              for block in arch.blocks if 'unroll' in block.params)
+            bits_seen.update(bits)
+
+            results = []
+            for mode, options in CODEGEN_MODES.items():
+                try:
+                    got = simulate(arch, x.numpy(), model_weights(model), work_dir, len(expected),
+                                   INPUT_CHANNELS, INPUT_SIZE, **options)[0]
+                except RuntimeError as e:
+                    errors.append(f"architecture {i} ({mode}): {e}")
+                    results.append(f"{mode} FAILED")
+                    continue
+                max_error = float(np.max(np.abs(got - expected)))
+                exact_outputs += int(np.sum(got == expected))
+                num_outputs += len(expected)
+                if not np.allclose(got, expected, rtol=rtol, atol=atol):
+                    errors.append(f"architecture {i} ({mode}, {arch}): max abs error {max_error:.2e}")
+                    results.append(f"{mode} MISMATCH {max_error:.1e}")
+                else:
+                    results.append(f"{mode} {max_error:.1e}")
+            print(f"architecture {i}: {len(arch)} blocks, bits {bits}, max abs error: {', '.join(results)}")
+
+    num_knobs = len(PIPELINE_IIS) * len(UNROLL_FACTORS)
+    for op_type in ('conv', 'linear'):
+        seen = sum(1 for knob in knobs_seen if knob[0] == op_type)
+        print(f"{op_type}: {seen}/{num_knobs} (pipeline_ii, unroll) combinations covered")
+    print(f"bit widths covered: {sorted(bits_seen)} of {BIT_WIDTHS}")
+    print(f"bit exact outputs: {exact_outputs}/{num_outputs}")
+
+    if errors:
+        for error in errors[:20]:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+    print("SUCCESS: HLS kernels agree with the torch model.")
+
+if __name__ == "__main__":
+    main()
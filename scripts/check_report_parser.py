@@ -0,0 +1,50 @@
+import sys
+import os
+import json
+import math
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.report_parser import (
+    parse_build_dir, parse_csynth_xml, parse_csynth_rpt, find_csynth_report, METRIC_NAMES
+)
+
+# fixture reports of a real HLS + Vivado run, no tools needed
+FIXTURE_DIR = os.path.join(PROJECT_ROOT, "hls_vivado/report_fixtures")
+EXPECTED_FILE = os.path.join(FIXTURE_DIR, "expected.json")
+
+def _same(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def main():
+    """Parses the fixture reports and compares every metric with expected.json."""
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f)
+
+    errors = []
+    metrics = parse_build_dir(FIXTURE_DIR).to_dict()
+    for name in METRIC_NAMES:
+        if not _same(metrics[name], expected.get(name)):
+            errors.append(f"{name}: parsed {metrics[name]}, expected {expected.get(name)}")
+
+    # the text report must agree with the xml one
+    from_xml = parse_csynth_xml(find_csynth_report(FIXTURE_DIR, "xml"))
+    from_rpt = parse_csynth_rpt(find_csynth_report(FIXTURE_DIR, "rpt"))
+    for name, value in from_xml.items():
+        if not _same(value, from_rpt.get(name)):
+            errors.append(f"csynth.rpt {name}: {from_rpt.get(name)}, csynth.xml says {value}")
+
+    print("--- REPORT PARSER CHECK ---")
+    for name in METRIC_NAMES:
+        print(f"{name:20s} {metrics[name]}")
+    if errors:
+        for error in errors:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+    print("SUCCESS: all fixture metrics parsed as expected.")
+
+if __name__ == "__main__":
+    main()
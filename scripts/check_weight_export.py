@@ -0,0 +1,95 @@
+import sys
+import os
+import random
+import shutil
+import tempfile
+import numpy as np
+import torch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.search_space import get_random_architecture
+from hw_nas.pytorch_model import build_pytorch_model
+from hw_nas.weight_export import pack_state_dict, WeightBlob, WEIGHT_ALIGNMENT, EMBED_WEIGHTS_MAX_BYTES
+from hw_nas.csim import simulate, tolerance, CXX
+
+# check config
+NUM_ARCHITECTURES = 8
+NUM_INPUTS = 2
+INPUT_CHANNELS = 3
+INPUT_SIZE = 32
+# embed_max_bytes of the generated designs: all weights over m_axi, the default split, all on chip
+EMBED_LIMITS = {"gmem": 0, "default": EMBED_WEIGHTS_MAX_BYTES, "on_chip": float("inf")}
+# the default split again as a dataflow design (weights_gmem behind the load_weights process)
+DATAFLOW_PLACEMENT = "default"
+
+def main():
+    if shutil.which(CXX) is None:
+        print(f"ERROR: {CXX} not found, cannot compile the designs.")
+        sys.exit(1)
+
+    rng = random.Random(0)
+    torch.manual_seed(0)
+    errors = []
+
+    print(f"--- WEIGHT EXPORT CHECK ({NUM_ARCHITECTURES} architectures x {len(EMBED_LIMITS)} weight placements + dataflow) ---")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for i in range(NUM_ARCHITECTURES):
+            arch = get_random_architecture(input_channels=INPUT_CHANNELS, input_size=INPUT_SIZE, rng=rng)
+            model = build_pytorch_model(arch, quantized=True).eval()
+            # stand in for training: parameters away from their init distribution
+            with torch.no_grad():
+                for p in model.parameters():
+                    p.add_(0.05 * torch.randn_like(p))
+            x = torch.randn(NUM_INPUTS, INPUT_CHANNELS, INPUT_SIZE, INPUT_SIZE)
+            with torch.no_grad():
+                expected = model(x).numpy()
+
+            blob = pack_state_dict(model.state_dict())
+            blob_dir = os.path.join(work_dir, f"blob_{i}")
+            blob.save(blob_dir)
+            loaded = WeightBlob.load(blob_dir)
+            if not np.array_equal(loaded.data, blob.data) or loaded.entries != blob.entries:
+                errors.append(f"architecture {i}: blob changed in the save / load round trip")
+            if any(entry.offset % WEIGHT_ALIGNMENT for entry in blob.entries):
+                errors.append(f"architecture {i}: unaligned tensor in the blob")
+
+            rtol, atol = tolerance(arch)
+            results = []
+            runs = [(placement, embed_max_bytes, False) for placement, embed_max_bytes in EMBED_LIMITS.items()]
+            runs.append((f"{DATAFLOW_PLACEMENT} dataflow", EMBED_LIMITS[DATAFLOW_PLACEMENT], True))
+            for placement, embed_max_bytes, dataflow in runs:
+                try:
+                    got = simulate(arch, x.numpy(), loaded.data, work_dir, expected.shape[1], INPUT_CHANNELS,
+                                   INPUT_SIZE, fuse_relu=True, dataflow=dataflow, weight_blob=loaded,
+                                   embed_max_bytes=embed_max_bytes)
+                except RuntimeError as e:
+                    errors.append(f"architecture {i} ({placement}): {e}")
+                    results.append(f"{placement} FAILED")
+                    continue
+                max_error = float(np.max(np.abs(got - expected)))
+                if not np.allclose(got, expected, rtol=rtol, atol=atol):
+                    errors.append(f"architecture {i} ({placement}, {arch}): max abs error {max_error:.2e}")
+                    results.append(f"{placement} MISMATCH {max_error:.1e}")
+                else:
+                    results.append(f"{placement} {max_error:.1e}")
+            print(f"architecture {i}: blob {blob.nbytes / 1024:.0f} KiB, {len(blob.entries)} tensors, "
+                  f"max abs error: {', '.join(results)}")
+
+        # a blob of another architecture must not be accepted
+        other = pack_state_dict(build_pytorch_model(get_random_architecture(rng=rng)).state_dict())
+        try:
+            simulate(arch, x.numpy(), other.data, work_dir, expected.shape[1], weight_blob=other)
+            errors.append("blob of another architecture was accepted")
+        except ValueError as e:
+            print(f"foreign blob rejected: {e}")
+
+    if errors:
+        for error in errors[:20]:
+            print(f"ERROR: {error}")
+        sys.exit(1)
+    print("SUCCESS: designs with exported weights reproduce the torch model.")
+
+if __name__ == "__main__":
+    main()
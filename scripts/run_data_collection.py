@@ -10,63 +10,163 @@ sys.path.append(PROJECT_ROOT)
 from hw_nas.search_space import get_random_architecture
 from hw_nas.predictor import featurize
 from hw_nas.cpp_generator import generate_cpp_from_architecture
-from hw_nas.data_collector import collect_single_datapoint
-from hw_nas.predictor_trainer import train_predictors, test_trained_predictors
+from hw_nas.data_collector import (
+    collect_single_datapoint, collect_datapoints_parallel, StageReport, DEFAULT_HLS_LIMITS, DEFAULT_SYNTH_LIMITS
+)
+from hw_nas.predictor_trainer import (
+    train_predictors_from_store, update_predictors_from_store, train_multi_target_from_store, test_trained_predictors
+)
+from hw_nas.synthesis_cache import SynthesisCache
+from hw_nas.datapoint_store import DatapointStore
+from hw_nas.features import FeaturePipeline, DEFAULT_EXTRACTORS
+from hw_nas.active_learning import run_active_learning
 
 # config
 NUM_DATAPOINTS_TO_GATHER = 1 # maybe 100? for demo, keep it small
+NUM_SYNTHESIS_WORKERS = 1 # > 1 runs that many HLS + Vivado jobs at once, each in its own job dir
+COLLECTION_MODE = "random" # "random" or "active" (experimental: synthesize informative candidates, beats random on average but not for every seed)
+ACTIVE_LEARNING = {
+    "num_initial": 20, # random designs before the first round
+    "num_rounds": 8,
+    "batch_size": 10, # designs synthesized per round
+    "pool_size": 5000, # random candidates scored per round
+}
 VIVADO_SCRIPT = "hls_vivado/run_synthesis.sh" # Vivado setup script
+STAGE_SCRIPT = "hls_vivado/run_stage.sh" # staged flow, rejects designs after HLS / synthesis early. None runs VIVADO_SCRIPT in one go
+STOP_AFTER = "impl" # last stage of the staged flow: "hls", "synth" or "impl" (partial results are stored too)
+# FUSE_RELU and DATAFLOW change the generated hardware but are not features of a datapoint,
+# so keep them the same for everything in one datapoint store / synthesis cache
+FUSE_RELU = False # generated designs apply a ReLU inside the conv / linear before it, no separate pass
+DATAFLOW = False # layers as concurrent dataflow processes with per layer PIPO buffers (more BRAM, higher throughput)
+CSIM_CHECK = False # compile + simulate every design with g++ against the torch model first (needs g++ and torch, ~8 s per design), broken ones never reach synthesis
 TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib" # saved time predictor path
 POWER_PREDICTOR_PATH = "data/saved_models/power_predictor.joblib" # saved power predictor path
+MULTI_TARGET_PREDICTOR_PATH = "data/saved_models/multi_target_predictor.joblib" # WNS, power, latency, II, resources in one model
+SYNTHESIS_CACHE_DIR = "data/synthesis_cache" # reuse results of already synthesized designs, None disables
+SYNTHESIS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DATAPOINT_STORE_PATH = "data/datapoints.sqlite" # every datapoint is written here as soon as it completes
+TRAINING_MODE = "full" # "full" refit or "incremental" (add trees for new datapoints, versioned models)
+RETRAIN_EVERY = 0 # incremental mode: update the predictors every n valid datapoints during collection, 0 = only at the end
+FEATURE_EXTRACTORS = DEFAULT_EXTRACTORS # predictor features (hw_nas.features registry), e.g. ['structure', 'cost']
+FEATURE_CACHE_PATH = None # e.g. "data/feature_cache.sqlite": feature matrices reused across runs, pays off for expensive extractors
 
 CONFIG = {
     "VIVADO_SCRIPT": VIVADO_SCRIPT,
+    "STAGE_SCRIPT": STAGE_SCRIPT,
+    "STOP_AFTER": STOP_AFTER,
+    "FUSE_RELU": FUSE_RELU,
+    "DATAFLOW": DATAFLOW,
+    "CSIM_CHECK": CSIM_CHECK,
+    "CSIM_DIR": "build_csim",
+    "HLS_LIMITS": DEFAULT_HLS_LIMITS, # kv260 resources, estimated clock
+    "SYNTH_LIMITS": DEFAULT_SYNTH_LIMITS, # kv260 resources, post synthesis WNS
     "GENERATED_CPP_FILE": "hls_vivado/src/generated_design.cpp",
     "BUILD_DIR": "build",
     "RESULTS_FILE": "build/results.txt",
     "VIVADO_LOG": "build/vivado.log",         
     "VIVADO_JOU": "build/vivado.jou",         
-    "HLS_OUTPUT_DIR": "build/top_function" 
+    "HLS_OUTPUT_DIR": "build/top_function",
+    "HLS_CONFIG_FILE": "hls_vivado/hls_config.cfg",
+    "OPS_HEADER_FILE": "hls_vivado/src/ops.h",
+    "BUILD_TCL_FILE": "hls_vivado/build.tcl",
+    "SYNTH_TCL_FILE": "hls_vivado/synth.tcl",
+    "IMPL_TCL_FILE": "hls_vivado/impl.tcl",
+    # parallel mode only
+    "JOBS_DIR": "build_jobs"
 }
 
 def main():
-    # database for real data
-    real_data_X = [] # feature vectors
-    real_data_y_timing = [] # WNS values
-    real_data_y_power = [] # Power values 
+    # database for real data, survives crashes and Ctrl-C
+    store = DatapointStore(DATAPOINT_STORE_PATH)
+
+    cache = None
+    if SYNTHESIS_CACHE_DIR is not None:
+        cache = SynthesisCache(SYNTHESIS_CACHE_DIR, SYNTHESIS_CACHE_MAX_BYTES)
+
+    # resume: only run what is missing from previous (interrupted) runs
+    stage_report = StageReport()
+    # training features are recomputed from the stored architectures, memoized
+    pipeline = FeaturePipeline(FEATURE_EXTRACTORS, disk_cache=FEATURE_CACHE_PATH)
+
+    done = store.count()
+    remaining = max(0, NUM_DATAPOINTS_TO_GATHER - done)
+    if done > 0:
+        print(f"RESUMING: {done} of {NUM_DATAPOINTS_TO_GATHER} runs already in {DATAPOINT_STORE_PATH}")
 
     # --- main data collection loop ---
-    print(f"start data collection for {NUM_DATAPOINTS_TO_GATHER} architectures")
-
-    for i in range(NUM_DATAPOINTS_TO_GATHER):
-        # pass the config and data lists to the collector function
-        features, wns, power = collect_single_datapoint(
-            i + 1, 
-            NUM_DATAPOINTS_TO_GATHER, 
-            CONFIG
+    print(f"start data collection for {remaining} architectures")
+
+    if COLLECTION_MODE == "active":
+        print("WARN: active collection is experimental, it does not beat random sampling for every seed")
+        # runs through the job pool, every synthesized design still lands in the store.
+        # the budget comes from ACTIVE_LEARNING, the resume count above does not apply
+        def synthesize(archs):
+            valid = []
+            for index, arch, features, wns, power, elapsed, metrics in collect_datapoints_parallel(archs, NUM_SYNTHESIS_WORKERS, CONFIG, cache):
+                # stored as they finish, handed to the forests in input order
+                store.append(arch, features, wns, power, elapsed, metrics)
+                stage_report.add(metrics)
+                if wns is not None and power is not None:
+                    valid.append((index, (arch, features, wns, power)))
+            return [result for _, result in sorted(valid, key=lambda item: item[0])]
+
+        print(f"start active learning collection: {ACTIVE_LEARNING}")
+        run_active_learning(synthesize, **ACTIVE_LEARNING)
+        results = []
+    elif NUM_SYNTHESIS_WORKERS > 1:
+        # pool mode, results arrive in completion order
+        architectures = [get_random_architecture() for _ in range(remaining)]
+        results = (result[1:] for result in collect_datapoints_parallel(architectures, NUM_SYNTHESIS_WORKERS, CONFIG, cache))
+    else:
+        # pass the config to the collector function
+        results = (
+            collect_single_datapoint(done + i + 1, NUM_DATAPOINTS_TO_GATHER, CONFIG, cache)
+            for i in range(remaining)
         )
-        
+
+    for arch, features, wns, power, elapsed, metrics in results:
+        # failed runs are stored too, so they count towards the resume point
+        store.append(arch, features, wns, power, elapsed, metrics)
+        stage_report.add(metrics)
         if features is not None and wns is not None and power is not None:
-            # for valid data point save features + wns + power
             print(f"SUCCESS: Real WNS: {wns:.2f} ns, Real Power: {power:.4f} W")
-            real_data_X.append(features)
-            real_data_y_timing.append(wns)
-            real_data_y_power.append(power)
+            if TRAINING_MODE == "incremental" and RETRAIN_EVERY and store.count('ok') % RETRAIN_EVERY == 0:
+                update_predictors_from_store(store, TIMING_PREDICTOR_PATH, POWER_PREDICTOR_PATH, pipeline)
+        elif metrics is not None and metrics.outcome in ("rejected", "stopped"):
+            print(f"Stored partial results ({metrics.outcome} after {metrics.stage}).")
         else:
             print("Skipping this data point due to error.")
 
 
     print("\n\n--- FINISHED DATA COLLECTION ---")
-    print(f"COLLECTED {len(real_data_y_timing)} VALID DATA POINTS FROM {NUM_DATAPOINTS_TO_GATHER} RUNS.")
+    print(f"COLLECTED {store.count('ok')} VALID DATA POINTS FROM {store.count()} RUNS.")
+    if STAGE_SCRIPT is not None:
+        print(f"{store.count('rejected')} rejected early, {store.count('stopped')} stopped after {STOP_AFTER}.")
+        stage_report.print_report()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"SYNTHESIS CACHE: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate), {stats['evictions']} evictions, "
+              f"{stats['entries']} entries / {stats['size_bytes'] / 1e6:.1f} MB")
 
     # --- predictor training with real data ---
-    timing_predictor, power_predictor = train_predictors(
-        real_data_X,
-        real_data_y_timing,
-        real_data_y_power,
-        TIMING_PREDICTOR_PATH,
-        POWER_PREDICTOR_PATH
-    )
+    if TRAINING_MODE == "incremental":
+        timing_predictor, power_predictor = update_predictors_from_store(
+            store,
+            TIMING_PREDICTOR_PATH,
+            POWER_PREDICTOR_PATH,
+            pipeline
+        )
+    else:
+        timing_predictor, power_predictor = train_predictors_from_store(
+            store,
+            TIMING_PREDICTOR_PATH,
+            POWER_PREDICTOR_PATH,
+            pipeline
+        )
+    train_multi_target_from_store(store, MULTI_TARGET_PREDICTOR_PATH, pipeline=pipeline)
+    print(f"FEATURES: schema {pipeline.schema_id}, {pipeline.stats()}")
+    store.close()
 
     # --- testing ---
     test_trained_predictors(timing_predictor, power_predictor)
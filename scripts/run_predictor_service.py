@@ -0,0 +1,34 @@
+import sys
+import os
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.predictor_service import PredictorService, DEFAULT_SOCKET_PATH
+
+# config paths
+TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib"
+POWER_PREDICTOR_PATH = "data/saved_models/power_predictor.joblib"
+SOCKET_PATH = DEFAULT_SOCKET_PATH
+
+# micro-batching
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_S = 0.002 # how long the first request of a batch waits for company
+RELOAD_INTERVAL_S = 2.0 # how often the .joblib files are checked for changes
+
+def main():
+    service = PredictorService(
+        TIMING_PREDICTOR_PATH,
+        POWER_PREDICTOR_PATH,
+        socket_path=SOCKET_PATH,
+        max_batch_rows=MAX_BATCH_ROWS,
+        max_wait_s=MAX_WAIT_S,
+        reload_interval_s=RELOAD_INTERVAL_S
+    )
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("\nstopping predictor service.")
+
+if __name__ == "__main__":
+    main()
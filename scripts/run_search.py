@@ -0,0 +1,52 @@
+import sys
+import os
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from hw_nas.evolution import RegularizedEvolution
+from hw_nas.fast_forest import load_predictor
+
+# config paths
+TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib"
+POWER_PREDICTOR_PATH = "data/saved_models/power_predictor.joblib"
+CHECKPOINT_PATH = "data/search_checkpoint.joblib" # resumed if it exists
+
+# search params
+POPULATION_SIZE = 100
+SAMPLE_SIZE = 25
+GENERATION_SIZE = 256
+NUM_GENERATIONS = 50
+SEED = 0
+COST_LIMITS = {"macs": 50_000_000} # analytical pre-filter (hw_nas.cost_model names), None disables
+
+def main():
+    print("--- LOADING PREDICTORS ---")
+    timing_predictor = load_predictor(TIMING_PREDICTOR_PATH)
+    power_predictor = load_predictor(POWER_PREDICTOR_PATH)
+
+    if os.path.exists(CHECKPOINT_PATH):
+        search = RegularizedEvolution.load_checkpoint(CHECKPOINT_PATH, timing_predictor, power_predictor)
+        print(f"RESUMING search from {CHECKPOINT_PATH} at generation {search.generation}")
+    else:
+        search = RegularizedEvolution(
+            timing_predictor,
+            power_predictor,
+            population_size=POPULATION_SIZE,
+            sample_size=SAMPLE_SIZE,
+            generation_size=GENERATION_SIZE,
+            seed=SEED,
+            cost_limits=COST_LIMITS
+        )
+
+    print(f"\n--- RUNNING {NUM_GENERATIONS} GENERATIONS ---")
+    search.run(NUM_GENERATIONS, checkpoint_path=CHECKPOINT_PATH)
+
+    print("\n--- TOP ARCHITECTURES ---")
+    for arch, fitness, wns, power in search.top(5):
+        print(f"fitness {fitness:.4f}, predicted WNS {wns:.2f} ns, predicted power {power:.4f} W")
+        print(f"  {arch}")
+
+if __name__ == "__main__":
+    os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+    main()
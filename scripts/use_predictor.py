@@ -1,4 +1,3 @@
-import joblib
 import os
 import numpy as np
 import sys 
@@ -8,16 +7,50 @@ sys.path.append(PROJECT_ROOT)
 
 
 from hw_nas.search_space import get_random_architecture
-from hw_nas.predictor import featurize
+from hw_nas.features import model_feature_schema, pipeline_for_schema
+from hw_nas.fast_forest import load_predictor
+from hw_nas.predictor_service import PredictorClient, DEFAULT_SOCKET_PATH
 
 # config paths 
 TIMING_PREDICTOR_PATH = "data/saved_models/timing_predictor.joblib"
 POWER_PREDICTOR_PATH = "data/saved_models/power_predictor.joblib"
+# running predictor service (scripts/run_predictor_service.py), used instead of loading the models if up
+PREDICTOR_SOCKET_PATH = DEFAULT_SOCKET_PATH
+
+def predict_with_service(test_arch):
+    """
+    Asks the predictor service, featurizing with the schema of the models it
+    serves. Returns (features, wns, power) or None if it is not reachable.
+    """
+    if not os.path.exists(PREDICTOR_SOCKET_PATH):
+        return None
+    try:
+        with PredictorClient(PREDICTOR_SOCKET_PATH) as client:
+            feature_schema = client.stats()["feature_schema"]
+            if feature_schema is None:
+                raise RuntimeError("no predictors loaded")
+            test_features = pipeline_for_schema(feature_schema).transform_one(test_arch).reshape(1, -1)
+            wns, power = client.predict(test_features, feature_schema=feature_schema)
+        return test_features, wns[0], power[0]
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"WARN: Predictor service not usable, loading the models instead: {e}")
+        return None
 
 def main():
     """
     Loads trained predictors and tests them with a new random architecture.
     """
+    test_arch = get_random_architecture()
+
+    service_result = predict_with_service(test_arch)
+    if service_result is not None:
+        print("\n--- TESTING PREDICTORS (SERVICE) ---")
+        print(f"test architecture: {test_arch}")
+        print(f"test features: {service_result[0]}")
+        print(f"predicted timing (WNS): {service_result[1]:.2f} ns")
+        print(f"predicted power: {service_result[2]:.4f} W")
+        return
+
     print("--- LOADING PREDICTORS ---")
 
     timing_predictor = None
@@ -26,7 +59,7 @@ def main():
     # load timing predictor
     if os.path.exists(TIMING_PREDICTOR_PATH):
         try:
-            timing_predictor = joblib.load(TIMING_PREDICTOR_PATH)
+            timing_predictor = load_predictor(TIMING_PREDICTOR_PATH)
             print(f"Successfully loaded timing predictor from {TIMING_PREDICTOR_PATH}")
         except Exception as e:
             print(f"ERROR: Failed to load timing predictor: {e}")
@@ -36,20 +69,24 @@ def main():
     # load power predictor
     if os.path.exists(POWER_PREDICTOR_PATH):
         try:
-            power_predictor = joblib.load(POWER_PREDICTOR_PATH)
+            power_predictor = load_predictor(POWER_PREDICTOR_PATH)
             print(f"Successfully loaded power predictor from {POWER_PREDICTOR_PATH}")
         except Exception as e:
             print(f"ERROR: Failed to load power predictor: {e}")
     else:
         print(f"WARN: Power predictor file not found at {POWER_PREDICTOR_PATH}")
 
+    # features of the schema the models were trained on (older ones stay computable)
+    schemas = {model_feature_schema(model) for model in (timing_predictor, power_predictor) if model is not None}
+    if len(schemas) > 1:
+        print(f"ERROR: timing and power predictors use different feature schemas {sorted(schemas)}")
+        return
 
     # testing
     if timing_predictor is not None or power_predictor is not None:
         print("\n--- TESTING PREDICTORS ---")
         print("testing predictor(s) with new random architecture.")
-        test_arch = get_random_architecture()
-        test_features = featurize(test_arch).reshape(1, -1)
+        test_features = pipeline_for_schema(schemas.pop()).transform_one(test_arch).reshape(1, -1)
 
         print(f"test architecture: {test_arch}")
         print(f"test features: {test_features}")